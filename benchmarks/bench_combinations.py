@@ -0,0 +1,84 @@
+"""Benchmarks the search for the most specific combination of sites
+
+Each locality in the corpus combines common place names that match many
+features scattered across the United States, plus one tight cluster near
+the actual locality. The search used by MatchEvaluator is compared against
+building and encompassing every combination of sites.
+
+Usage: python benchmarks/bench_combinations.py
+"""
+
+import itertools
+import random
+import time
+
+from nmnh_ms_tools.records import Site
+from nmnh_ms_tools.tools.georeferencer.evaluators import MatchEvaluator
+
+# Names and number of matching features for each pathological locality
+CORPUS = [
+    {"Springfield": 25, "Franklin": 25},
+    {"Springfield": 12, "Franklin": 12, "Clinton": 12},
+    {"Greenville": 8, "Salem": 8, "Fairview": 8, "Madison": 8},
+    {"Washington": 6, "Georgetown": 6, "Marion": 6, "Oxford": 6, "Arlington": 6},
+]
+
+
+def make_sites(names, seed=0):
+    """Builds sites matching each name at random points plus one cluster"""
+    rand = random.Random(seed)
+    lat0, lng0 = rand.uniform(30, 45), rand.uniform(-115, -80)
+    sites = []
+    for name, count in names.items():
+        lat_lngs = [(lat0 + rand.uniform(-0.1, 0.1), lng0 + rand.uniform(-0.1, 0.1))]
+        while len(lat_lngs) < count:
+            lat_lngs.append((rand.uniform(25, 49), rand.uniform(-124, -67)))
+        for lat, lng in lat_lngs:
+            site = Site(
+                {
+                    "location_id": f"{name}:{lat:.4f},{lng:.4f}",
+                    "latitude": round(lat, 4),
+                    "longitude": round(lng, 4),
+                    "crs": 4326,
+                    "radius_km": 2,
+                }
+            )
+            site.field = "locality"
+            site.filter["name"] = name
+            sites.append(site)
+    return sites
+
+
+def exhaustive(evaluator, sites):
+    """Encompasses every combination of sites and keeps the smallest"""
+    groups = list(evaluator.group_by_name(sites).values())
+    combinations = []
+    for group in itertools.product(*groups):
+        geom = evaluator.encompass_sites(list(group))
+        combinations.append((geom, group))
+    combinations.sort(key=lambda c: c[0].radius_km)
+    return combinations[0]
+
+
+def main():
+    print(f"{'names':>6}{'combinations':>14}{'exhaustive':>14}{'search':>12}")
+    for i, names in enumerate(CORPUS):
+        sites = make_sites(names, seed=i)
+        num_combos = 1
+        for count in names.values():
+            num_combos *= count
+
+        start = time.perf_counter()
+        expected, _ = exhaustive(MatchEvaluator(), sites)
+        before = time.perf_counter() - start
+
+        start = time.perf_counter()
+        geom, _ = MatchEvaluator().most_specific_combination(sites)
+        after = time.perf_counter() - start
+
+        assert geom.radius_km == expected.radius_km
+        print(f"{len(names):>6}{num_combos:>14,}{before:>12.2f} s{after:>10.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmarks the maximum and minimum distances between geometries
+
+Compares the vectorized GeoMetry.max_dist_km and GeoMetry.min_dists_km
+against the vertex-by-vertex and pair-by-pair loops they replaced, using
+irregular polygons with many vertices like those in admin and river layers.
+
+Usage: python benchmarks/bench_distances.py [--vertices N] [--others N]
+"""
+
+import argparse
+import random
+import time
+
+from nmnh_ms_tools.tools.geographic_operations.geometry import GeoMetry
+from nmnh_ms_tools.utils import get_dist_km, translate
+
+
+def make_polygon(lat, lon, dist_km, vertices, rand):
+    """Builds a star-shaped polygon with irregular vertices around a point"""
+    azimuths = [i * 360 / vertices for i in range(vertices)]
+    dists_km = [dist_km * rand.uniform(0.5, 1) for _ in azimuths]
+    poly = translate([lat] * vertices, [lon] * vertices, azimuths, dists_km)
+    return GeoMetry(poly, crs=4326)
+
+
+def max_dist_km_loop(geom, other):
+    """Calculates the maximum distance the way GeoMetry did previously"""
+    geom = geom.as_wgs84.convex_hull
+    other = other.as_wgs84.convex_hull
+    dists_km = []
+    for lon, lat in geom.coords:
+        for olon, olat in other.coords:
+            dists_km.append(get_dist_km(lat, lon, olat, olon))
+    return max(dists_km)
+
+
+def min_dist_km_loop(geom, other):
+    """Calculates the minimum distance the way GeoMetry did previously"""
+    if geom.intersects(other):
+        return 0.0
+    pts = [p.centroid.shape for p in geom.nearest_points(other)]
+    return get_dist_km(pts[0].y, pts[0].x, pts[1].y, pts[1].x)
+
+
+def timed(func, *args):
+    start_time = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vertices", type=int, default=500)
+    parser.add_argument("--others", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rand = random.Random(args.seed)
+    geom = make_polygon(40, -100, 200, args.vertices, rand)
+    others = [
+        make_polygon(
+            rand.uniform(25, 49), rand.uniform(-124, -67), 50, args.vertices, rand
+        )
+        for _ in range(args.others)
+    ]
+
+    print(f"{'operation':<14}{'loop':>12}{'vectorized':>12}{'speedup':>10}")
+
+    before, before_time = timed(max_dist_km_loop, geom, others[0])
+    after, after_time = timed(geom.max_dist_km, others[0])
+    assert abs(before - after) < 1e-6, (before, after)
+    print(
+        f"{'max_dist_km':<14}{before_time:>10.3f} s{after_time:>10.3f} s"
+        f"{before_time / after_time:>9.1f}x"
+    )
+
+    before, before_time = timed(lambda: [min_dist_km_loop(geom, o) for o in others])
+    after, after_time = timed(geom.min_dists_km, others)
+    # Distances differ slightly because each pair was projected separately
+    assert all(abs(b - a) <= max(0.01 * b, 0.1) for b, a in zip(before, after))
+    print(
+        f"{'min_dists_km':<14}{before_time:>10.3f} s{after_time:>10.3f} s"
+        f"{before_time / after_time:>9.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
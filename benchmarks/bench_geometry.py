@@ -0,0 +1,78 @@
+"""Micro-benchmarks for common GeoMetry operations
+
+Compares the shapely-backed GeoMetry against the same operations performed on
+one-item GeoSeries objects, which is how GeoMetry stored geometries previously.
+
+Usage: python benchmarks/bench_geometry.py [--number N]
+"""
+
+import argparse
+import timeit
+
+import geopandas as gpd
+from shapely import Point, Polygon
+
+from nmnh_ms_tools.tools.geographic_operations.geometry import GeoMetry
+
+POLY = Polygon([(-120.6, 46.9), (-120.4, 46.9), (-120.4, 47.1), (-120.6, 47.1)])
+POINT = Point(-120.5, 47.0)
+EQUAL_AREA = (
+    "+proj=eck4 +lat_0=0.0 +lon_0=-120.0 +x_0=0 +y_0=0 +datum=WGS84 +units=m +no_defs"
+)
+
+
+def bench_geometry():
+    poly = GeoMetry(POLY, crs=4326)
+    point = GeoMetry(POINT, crs=4326, radius_km=1)
+    return {
+        "init": lambda: GeoMetry(POLY, crs=4326),
+        "contains": lambda: poly.contains(point),
+        "contains_new": lambda: poly.contains(GeoMetry(POINT, crs=4326, radius_km=1)),
+        "intersects": lambda: poly.intersects(point),
+        "buffer": lambda: poly.buffer(10),
+        "to_crs": lambda: poly.to_crs(EQUAL_AREA),
+    }
+
+
+def bench_geoseries():
+    poly = gpd.GeoSeries([POLY], crs=4326)
+    point = gpd.GeoSeries([POINT], crs=4326)
+
+    def contains():
+        return poly.to_crs(EQUAL_AREA).contains(point.to_crs(EQUAL_AREA)).iloc[0]
+
+    def intersects():
+        return poly.to_crs(EQUAL_AREA).intersects(point.to_crs(EQUAL_AREA)).iloc[0]
+
+    def buffer():
+        return poly.to_crs(EQUAL_AREA).buffer(10000).to_crs(4326)
+
+    return {
+        "init": lambda: gpd.GeoSeries([POLY], crs=4326),
+        "contains": contains,
+        "contains_new": contains,
+        "intersects": intersects,
+        "buffer": buffer,
+        "to_crs": lambda: poly.to_crs(EQUAL_AREA),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    geoseries = bench_geoseries()
+    geometry = bench_geometry()
+
+    print(f"{'operation':<14}{'geoseries':>14}{'geometry':>14}{'speedup':>10}")
+    for key in geometry:
+        before = min(timeit.repeat(geoseries[key], number=args.number, repeat=3))
+        after = min(timeit.repeat(geometry[key], number=args.number, repeat=3))
+        before *= 1e6 / args.number
+        after *= 1e6 / args.number
+        print(f"{key:<14}{before:>11.1f} us{after:>11.1f} us{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Benchmarks reading parsed localities from the LocalityCache
+
+Compares restoring serialized parser objects against reparsing the verbatim
+text with the named parser, which is how entries were stored previously.
+
+Usage: python benchmarks/bench_locality_cache.py [--number N]
+"""
+
+import argparse
+import json
+import timeit
+from collections import namedtuple
+
+from nmnh_ms_tools.tools.geographic_names.caches import LocalityCache
+from nmnh_ms_tools.tools.geographic_names.parsers import parse_localities
+
+LOCALITIES = [
+    "20 km south of Iceland; Atlantic Ocean, North",
+    "37 km E of Riberalta on road to Guayaramerin",
+    "Aranjuez surroundings. Circa 7 km NW, S of jct. E-5 and M-40",
+    "BR 156, road between Calçoene and Oiapoque, 60 Km SSE of Oiapoque",
+    "Bouanane, 30 Km NE",
+    "Castle Hayne, 4.5mi NE of; end of NC Route 2023",
+    "West Coast Of Florida",
+    "Wyville--Thomson Ridge; between the Faroe Islands and Scotland",
+]
+
+Row = namedtuple("Row", ["key", "val"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=100)
+    args = parser.parse_args()
+
+    structured = []
+    verbatim = []
+    for loc in LOCALITIES:
+        features = parse_localities(loc)
+        structured.append(Row(loc, LocalityCache.writer((features, ""))))
+        legacy = [(f.__class__.__name__, f.verbatim) for f in features]
+        verbatim.append(Row(loc, json.dumps([legacy, ""])))
+
+    def read(rows):
+        return lambda: [LocalityCache.reader(r) for r in rows]
+
+    print(f"{'format':<12}{'us/hit':>10}")
+    for name, rows in (("verbatim", verbatim), ("structured", structured)):
+        elapsed = timeit.timeit(read(rows), number=args.number)
+        usec = 1e6 * elapsed / args.number / len(rows)
+        print(f"{name:<12}{usec:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
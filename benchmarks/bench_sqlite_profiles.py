@@ -0,0 +1,83 @@
+"""Benchmarks loading and searching a gazetteer using each SQLite profile
+
+The GeoNames test fixture is copied many times with new identifiers to build
+a larger gazetteer, which is loaded into a new database and then searched
+using each of the profiles defined in the databases section of the config.
+
+Usage: python benchmarks/bench_sqlite_profiles.py [--copies N] [--lookups N]
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+from nmnh_ms_tools.config import CONFIG, TEST_DIR
+from nmnh_ms_tools.databases.geonames import GeoNamesFeatures, init_db
+from nmnh_ms_tools.utils import skip_hashed
+
+
+def make_gazetteer(fp, copies):
+    """Writes copies of the test fixture with unique identifiers to fp"""
+    with open(
+        os.path.join(TEST_DIR, "db_geonames.csv"), encoding="utf-8-sig", newline=""
+    ) as f:
+        rows = csv.reader(skip_hashed(f), dialect="excel")
+        keys = next(rows)
+        rows = list(rows)
+    names = [r[keys.index("name")] for r in rows]
+    with open(fp, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, dialect="excel")
+        writer.writerow(keys)
+        for i in range(copies):
+            for row in rows:
+                row = row[:]
+                row[0] = str(int(row[0]) + i * 10**8)
+                writer.writerow(row)
+    return len(rows) * copies, names
+
+
+def bench_profile(profile, src, num_rows, names, lookups):
+    """Times loading and searching a gazetteer using a profile"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        init_db(os.path.join(tmpdir, "geonames.sqlite"), profile=profile)
+        feat_db = GeoNamesFeatures()
+        feat_db.keys = None
+        feat_db.delim = "|"
+        feat_db.csv_kwargs = {"dialect": "excel"}
+        feat_db.load_profile = profile
+
+        start = time.perf_counter()
+        feat_db.from_csv(src)
+        load = num_rows / (time.perf_counter() - start)
+
+        rand = random.Random(0)
+        start = time.perf_counter()
+        for _ in range(lookups):
+            feat_db.search_json(rand.choice(names))
+        search = lookups / (time.perf_counter() - start)
+
+        feat_db.session.get_bind().dispose()
+    return load, search
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--copies", type=int, default=2000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        src = os.path.join(tmpdir, "gazetteer.csv")
+        num_rows, names = make_gazetteer(src, args.copies)
+        print(f"{num_rows:,} rows, {args.lookups:,} lookups")
+        print(f"{'profile':<10}{'load (rows/s)':>16}{'search (/s)':>14}")
+        for profile in CONFIG["databases"]["profiles"]:
+            load, search = bench_profile(profile, src, num_rows, names, args.lookups)
+            print(f"{profile:<10}{load:>16,.0f}{search:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
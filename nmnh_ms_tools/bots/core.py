@@ -4,28 +4,101 @@ from functools import wraps
 import logging
 import pprint as pp
 import random
+import threading
 import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
 
 import requests
 import requests_cache
 from lxml import etree
 
 from ..config import CONFIG
+from ..utils import count_stage
 
 
 logger = logging.getLogger(__name__)
 
 
+class TokenBucket:
+    """Limits the rate of requests to a single host
+
+    Tokens are added at a rate of one every interval seconds up to capacity,
+    and each request consumes one token, waiting until one is available.
+    Waits are reserved when a token is requested, so concurrent callers are
+    released in order at the configured rate instead of all at once.
+
+    Parameters
+    ----------
+    interval : float
+        minimum average number of seconds between requests
+    capacity : int
+        number of requests that can be made at once after a period of
+        inactivity
+    """
+
+    def __init__(self, interval, capacity=1):
+        self.interval = interval
+        self.capacity = capacity
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, interval=None):
+        """Waits until a request can be made
+
+        Parameters
+        ----------
+        interval : float
+            number of seconds to wait before the next request. Applies only to
+            this request, so bots sharing the bucket can use different waits.
+            Defaults to the interval of the bucket.
+
+        Returns
+        -------
+        float
+            number of seconds spent waiting
+        """
+        with self._lock:
+            if interval is None:
+                interval = self.interval
+            now = time.monotonic()
+            burst = (self.capacity - 1) * interval
+            self._next = max(self._next, now)
+            wait = self._next - burst - now
+            self._next += interval
+        if wait > 0:
+            time.sleep(wait)
+            return wait
+        return 0
+
+    def pause(self, seconds):
+        """Stops releasing tokens for the given number of seconds"""
+        with self._lock:
+            burst = (self.capacity - 1) * self.interval
+            self._next = max(self._next, time.monotonic() + seconds + burst)
+
+
 class Bot:
-    """Methods to handle and retry HTTP requests"""
+    """Methods to handle and retry HTTP requests
+
+    Requests to external hosts are paced by a token bucket shared by all bots
+    making requests to the same host. Methods can be run concurrently using
+    map, which allows up to max_workers requests to be in flight at once
+    while still honoring the rate limit for each host.
+    """
 
     try:
         email = CONFIG["bots"]["email"]
     except KeyError:
         email = input("Email: ")
 
+    buckets = {}
+    local_hosts = ("localhost", "127.0.0.1")
+    _buckets_lock = threading.Lock()
+
     def __init__(
         self,
         wait=3,
@@ -35,6 +108,8 @@ class Bot:
         limit_param=None,
         paged=False,
         num_retries=7,
+        max_workers=8,
+        burst=1,
         **kwargs,
     ):
         self.wait = wait
@@ -46,6 +121,8 @@ class Bot:
         self.limit_param = limit_param  # either a key or func(resp)
         self.paged = paged
         self.num_retries = num_retries
+        self.max_workers = max_workers
+        self.burst = burst
         self.kwargs = kwargs
         self.session = requests.Session()
         self._cached_session = None
@@ -105,18 +182,49 @@ class Bot:
     def head(self, *args, **kwargs):
         """Makes HEAD request with retry"""
         # HEAD requests are not resource intensive but don't seem to be cacheable,
-        # so reduce wait to a fraction of a second if
-        wait = self.wait
-        if wait > 0.1:
-            self.wait = 0.1
-        resp = self._retry("head", *args, **kwargs)
-        self.wait = wait
-        return resp
+        # so reduce wait to a fraction of a second
+        return self._retry("head", *args, wait=min(self.wait, 0.1), **kwargs)
 
     def validate(self, resp):
         """Placeholder function to validate resp"""
         return True
 
+    def map(self, func, *iterables, max_workers=None):
+        """Calls a method concurrently on each item in one or more iterables
+
+        Parameters
+        ----------
+        func : str | callable
+            a method of this bot or the name of one, for example, get
+        iterables : iterable
+            arguments to pass to func as with the builtin map
+        max_workers : int
+            maximum number of requests in flight at once. Defaults to
+            the max_workers attribute of the bot.
+
+        Returns
+        -------
+        list
+            the result of each call in the same order as the iterables
+        """
+        if isinstance(func, str):
+            func = getattr(self, func)
+        if max_workers is None:
+            max_workers = self.max_workers
+        self._check_cache()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(func, *iterables))
+
+    def bucket(self, host):
+        """Gets the token bucket used to limit requests to a host"""
+        with self._buckets_lock:
+            try:
+                return self.buckets[host]
+            except KeyError:
+                bucket = TokenBucket(self.wait, capacity=self.burst)
+                self.buckets[host] = bucket
+                return bucket
+
     def download(self, url, path, chunk_size=8192):
         """Downloads content at url to path"""
         with self.get(url, stream=True) as r:
@@ -175,24 +283,33 @@ class Bot:
         except AttributeError:
             pass
 
-    def _retry(self, method, *args, **kwargs):
-        """Routes requests to use single or paged"""
-        kwargs.setdefault("allow_redirects", True)
+    def _check_cache(self):
+        """Installs the cache from the config file if not already installed"""
         if CONFIG["bots"]["cache_name"] and not self.is_cached():
             self.install_cache(CONFIG["bots"]["cache_name"])
+
+    def _retry(self, method, *args, wait=None, **kwargs):
+        """Routes requests to use single or paged"""
+        kwargs.setdefault("allow_redirects", True)
+        self._check_cache()
         func = getattr(self.session, method)
         if self.start_param and self.wrapper:
-            resp = self._retry_paged(func, *args, **kwargs)
+            resp = self._retry_paged(func, *args, wait=wait, **kwargs)
         else:
-            resp = self._retry_one(func, *args, **kwargs)
+            resp = self._retry_one(func, *args, wait=wait, **kwargs)
         if not resp:
             self.handle_error(resp)
         if self.wrapper:
             return self.wrapper(resp)
         return resp
 
-    def _retry_one(self, func, *args, **kwargs):
-        """Retries failed request using a simple exponential backoff"""
+    def _retry_one(self, func, *args, wait=None, **kwargs):
+        """Retries failed request using a simple exponential backoff
+
+        The wait between requests defaults to self.wait. It is passed to the
+        bucket for each request instead of being stored, so concurrent
+        requests with different waits do not interfere.
+        """
         # Update headers based on defaults
         kwargs.setdefault("headers", {})
         for key, val in self.headers.items():
@@ -202,13 +319,32 @@ class Bot:
                 kwargs["headers"][key] = val
         if not kwargs["headers"]["User-Agent"]:
             raise ValueError("User agent is required")
+        # Requests to external hosts are limited by a bucket shared by host
+        url = args[0] if args else kwargs["url"]
+        host = urlparse(url).hostname
+        throttle = host not in self.local_hosts
+        interval = self.wait if wait is None else wait
         # Make the request, repeating it if a resolvable error is encountered
         for i in range(self.num_retries):
             logger.debug(f"Making request: {args}, {kwargs}")
+            resp = None
+            retry_after = None
             try:
-                resp = func(*args, **kwargs)
+                # Check the cache first so that cached responses do not use tokens
+                if throttle and self.is_cached():
+                    resp = func(*args, only_if_cached=True, **kwargs)
+                    if resp.status_code == 504 and resp.reason == "Not Cached":
+                        resp = None
+                if resp is None:
+                    if throttle:
+                        self.bucket(host).acquire(interval)
+                    resp = func(*args, **kwargs)
+                    count_stage("bot_requests")
                 # Retry if status code indicates a temporary problem
                 if resp.status_code in (429, 503):
+                    retry_after = self._retry_after(resp)
+                    if throttle and retry_after:
+                        self.bucket(host).pause(retry_after)
                     raise requests.exceptions.ConnectionError(
                         f"Request failed: {resp.url} (status_code={resp.status_code})"
                     )
@@ -216,6 +352,8 @@ class Bot:
                 # Add a random number of milliseconds to the wait time to prevent
                 # multiple retries from synchronizing
                 wait = 2**i + random.randint(1, 1000) / 1000
+                if retry_after is not None:
+                    wait = retry_after
                 req = (
                     [func.__name__]
                     + list(args)
@@ -227,22 +365,36 @@ class Bot:
                 # Ensure that the response has the from_cache attribute
                 if not hasattr(resp, "from_cache"):
                     resp.from_cache = None
-                # Enforce the minimum wait only if response is from an external server
-                local = resp.url.startswith(("http://localhost", "http://127.0.0.1"))
-                if not local and not resp.from_cache:
+                # Update the wait for the next request to an external server
+                if throttle and not resp.from_cache:
                     logger.info(f"Made new request: {resp.url}")
-                    # Update wait based on rate limit
-                    time.sleep(self.wait_from_rate_limit(resp))
+                    self.wait_from_rate_limit(resp)
                 # Validate the response, returning the response object if OK
                 if self.validate(resp):
                     return resp
         raise Exception("Maximum retries exceeded")
 
-    def _retry_paged(self, *args, **kwargs):
+    @staticmethod
+    def _retry_after(resp):
+        """Reads the number of seconds to wait from the Retry-After header"""
+        try:
+            val = resp.headers["retry-after"]
+        except (AttributeError, KeyError):
+            return None
+        try:
+            return max(float(val), 0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(val).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return None
+
+    def _retry_paged(self, *args, wait=None, **kwargs):
         """Repeats request with retry across paginated content"""
         responses = []
         while True:
-            resp = self._retry_one(*args, **kwargs)
+            resp = self._retry_one(*args, wait=wait, **kwargs)
             if resp:
                 responses.append(resp)
             elif responses:
@@ -46,6 +46,7 @@ class AdminFeatures(GeoNamesFeatures):
     def __init__(self):
         super().__init__()
         self.names = AdminNames
+        self.api_records = None
         self.base = Base
         self.keys = [
             "geoname_id",
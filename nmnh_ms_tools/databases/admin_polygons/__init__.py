@@ -0,0 +1,4 @@
+"""Defines a precomputed index of administrative polygons"""
+
+from .admin_index import *
+from .database import *
@@ -0,0 +1,250 @@
+"""Stores and queries precomputed polygons for administrative divisions"""
+
+import json
+import logging
+
+import geopandas as gpd
+from shapely import Point, wkb
+from sqlalchemy import select, text
+
+from .database import Session, AdminLookups, AdminPolygons, init_db
+from ..admin import Session as AdminSession, AdminNames
+from ...tools.geographic_operations.geometry.geometry import transform_shape
+
+
+logger = logging.getLogger(__name__)
+
+
+class AdminIndex:
+    """Stores and queries precomputed polygons for administrative divisions
+
+    Site.map_admin resolves admin names and dissolves the polygons for each
+    admin field on every cache miss. This class stores the results so they
+    can be looked up instead. Each dissolved polygon is stored once as WKB in
+    the CRS in which it was computed, and an R-tree of WGS84 bounds supports
+    point-in-admin queries.
+    """
+
+    def __init__(self, path=None):
+        if path is not None:
+            init_db(path)
+        self._session = None
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def __contains__(self, key):
+        return self.session.get(AdminLookups, key) is not None
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = Session()
+        return self._session
+
+    def get(self, key):
+        """Gets the admin polygons and names stored under a key
+
+        Parameters
+        ----------
+        key : str
+            JSON-encoded list of admin names as used by Site.map_admin
+
+        Returns
+        -------
+        tuple of (geopandas.GeoDataFrame, dict, dict)
+            the admin polygons, the admin names and codes resolved for the
+            key, and a mapping of (field, name) to geoname_id
+
+        Raises
+        ------
+        KeyError
+            if the key is not in the index
+        """
+        lookup = self.session.get(AdminLookups, key)
+        if lookup is None:
+            raise KeyError(key)
+        polygon_ids = json.loads(lookup.polygon_ids)
+        rows = self.session.scalars(
+            select(AdminPolygons).where(AdminPolygons.id.in_(polygon_ids))
+        )
+        rows = {r.id: r for r in rows}
+        data = {"field": [], "geometry": [], "area": []}
+        for polygon_id in polygon_ids:
+            row = rows[polygon_id]
+            shape = wkb.loads(row.geometry)
+            if row.crs != lookup.crs:
+                shape = transform_shape(shape, row.crs, lookup.crs)
+            data["field"].append(row.field)
+            data["geometry"].append(shape)
+            data["area"].append(row.area)
+        gdf = gpd.GeoDataFrame(data, crs=lookup.crs)
+        interpreted = {(f, v): i for f, v, i in json.loads(lookup.interpreted)}
+        return gdf, json.loads(lookup.result), interpreted
+
+    def save(self, keys, gdf, result, interpreted, id_to_field):
+        """Saves the admin polygons and names resolved by Site.map_admin
+
+        Parameters
+        ----------
+        keys : list of str
+            JSON-encoded lists of admin names to store the result under
+        gdf : geopandas.GeoDataFrame
+            the dissolved admin polygons with field, geometry, and area columns
+        result : dict
+            the admin names and codes resolved for the keys
+        interpreted : dict
+            mapping of (field, name) to geoname_id
+        id_to_field : dict
+            mapping of geoname_id to the admin field for that feature
+
+        Returns
+        -------
+        None
+        """
+        session = self.session
+        crs = gdf.crs.srs
+        names = {}
+        for field, val in interpreted:
+            names.setdefault(field, []).append(val)
+        polygon_ids = []
+        for row in gdf.itertuples():
+            geoname_ids = json.dumps(
+                sorted(k for k, v in id_to_field.items() if v == row.field)
+            )
+            polygon = session.scalars(
+                select(AdminPolygons).where(
+                    AdminPolygons.field == row.field,
+                    AdminPolygons.geoname_ids == geoname_ids,
+                )
+            ).first()
+            if polygon is None:
+                polygon = AdminPolygons(
+                    field=row.field,
+                    geoname_ids=geoname_ids,
+                    name=" | ".join(names.get(row.field, [])),
+                    area=row.area,
+                    crs=crs,
+                    geometry=row.geometry.wkb,
+                )
+                session.add(polygon)
+                session.flush()
+                min_x, min_y, max_x, max_y = transform_shape(
+                    row.geometry, crs, 4326
+                ).bounds
+                session.execute(
+                    text(
+                        "INSERT INTO admin_polygons_rtree"
+                        " VALUES (:id, :min_x, :max_x, :min_y, :max_y)"
+                    ),
+                    {
+                        "id": polygon.id,
+                        "min_x": min_x,
+                        "max_x": max_x,
+                        "min_y": min_y,
+                        "max_y": max_y,
+                    },
+                )
+            polygon_ids.append(polygon.id)
+        for key in keys:
+            session.merge(
+                AdminLookups(
+                    key=key,
+                    crs=crs,
+                    result=json.dumps(result),
+                    interpreted=json.dumps([[*k, v] for k, v in interpreted.items()]),
+                    polygon_ids=json.dumps(polygon_ids),
+                )
+            )
+        session.commit()
+
+    def query(self, lat, lng, field=None):
+        """Finds the admin divisions containing a point
+
+        Parameters
+        ----------
+        lat : float
+            latitude of the point in WGS84
+        lng : float
+            longitude of the point in WGS84
+        field : str
+            admin field to return, for example, country or county. If
+            omitted, matches for all fields are returned.
+
+        Returns
+        -------
+        list of AdminPolygons
+            the matching admin polygons ordered from largest to smallest
+        """
+        stmt = text(
+            "SELECT id FROM admin_polygons_rtree"
+            " WHERE min_x <= :x AND max_x >= :x AND min_y <= :y AND max_y >= :y"
+        )
+        ids = self.session.scalars(stmt, {"x": lng, "y": lat}).all()
+        stmt = select(AdminPolygons).where(AdminPolygons.id.in_(ids))
+        if field is not None:
+            stmt = stmt.where(AdminPolygons.field == field)
+        point = Point(lng, lat)
+        matches = []
+        for row in self.session.scalars(stmt):
+            shape = wkb.loads(row.geometry)
+            if shape.intersects(transform_shape(point, 4326, row.crs)):
+                matches.append(row)
+        return sorted(matches, key=lambda r: r.area, reverse=True)
+
+    def build(self, fcodes=("PCLI", "ADM1", "ADM2")):
+        """Precomputes admin polygons for divisions in the admin database
+
+        Parameters
+        ----------
+        fcodes : list-like
+            feature codes of the admin divisions to index
+
+        Returns
+        -------
+        int
+            number of divisions that were indexed
+        """
+        from ...records import Site  # lazy load to avoid import conflict
+
+        if Site.admin_index is None:
+            Site.admin_index = self
+
+        session = AdminSession()
+        stmt = (
+            select(
+                AdminNames.country_code,
+                AdminNames.admin_code_1,
+                AdminNames.admin_code_2,
+            )
+            .where(AdminNames.fcode.in_(fcodes))
+            .distinct()
+        )
+        rows = session.execute(stmt).all()
+        session.close()
+
+        count = 0
+        for i, row in enumerate(rows):
+            # Map codes to names because Site.map_admin only checks names
+            codes = [c if c and c != "00" else None for c in row]
+            try:
+                admin = Site.adm.get(*codes, is_name=False)
+            except ValueError as exc:
+                logger.warning(f"Could not index {codes}: {exc}")
+                continue
+            site = Site(
+                {
+                    "country": admin.get("country"),
+                    "state_province": admin.get("state_province") if codes[1] else None,
+                    "county": admin.get("county") if codes[2] else None,
+                }
+            )
+            try:
+                site.map_admin()
+            except (IndexError, KeyError, ValueError) as exc:
+                logger.warning(f"Could not index {codes}: {exc}")
+            else:
+                count += 1
+            if i and not i % 1000:
+                logger.info(f"Indexed {i:,}/{len(rows):,} admin divisions")
+        return count
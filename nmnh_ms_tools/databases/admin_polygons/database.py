@@ -0,0 +1,61 @@
+"""Defines tables in the admin polygon SQL file"""
+
+import logging
+
+from sqlalchemy import Column, Float, Integer, LargeBinary, String, text
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.schema import Index
+
+from ...config import CONFIG
+from ..helpers import init_helper
+
+
+logger = logging.getLogger(__name__)
+Base = declarative_base()
+Session = sessionmaker()
+
+
+class AdminLookups(Base):
+    """Maps admin names on a site to resolved names and dissolved polygons"""
+
+    __tablename__ = "admin_lookups"
+    key = Column(String, primary_key=True)
+    crs = Column(String)
+    result = Column(String)
+    interpreted = Column(String)
+    polygon_ids = Column(String)
+
+
+class AdminPolygons(Base):
+    """Defines table of dissolved polygons for each administrative unit"""
+
+    __tablename__ = "admin_polygons"
+    id = Column(Integer, primary_key=True)
+    field = Column(String(collation="nocase"))
+    geoname_ids = Column(String)
+    name = Column(String(collation="nocase"))
+    area = Column(Float)
+    crs = Column(String)
+    geometry = Column(LargeBinary)
+    __table_args__ = (
+        Index("apg_ids", "field", "geoname_ids", unique=True),
+        Index("apg_names", "name"),
+    )
+
+
+def init_db(fp=None, tables=None, **kwargs):
+    """Creates the database based on the given path"""
+    global Base
+    global Session
+    if fp is None:
+        fp = CONFIG["data"]["admin_polygons"]
+    init_helper(fp, base=Base, session=Session, tables=tables, **kwargs)
+
+    # Index WGS84 bounds of each polygon for point-in-admin queries
+    with Session.kw["bind"].begin() as conn:
+        conn.execute(
+            text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS admin_polygons_rtree"
+                " USING rtree(id, min_x, max_x, min_y, max_y)"
+            )
+        )
@@ -2,22 +2,42 @@
 
 import logging
 import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
 
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert
 
 from .database import Session, Cache, init_db
 
 
 logger = logging.getLogger(__name__)
+_caches = weakref.WeakSet()
+_flusher = None
+_fork_locks = []
 
 
 class CacheDict:
-    """Defines dict linked to a SQLite file"""
+    """Defines dict linked to a SQLite file
+
+    Recently used key-value pairs are kept in memory in least-recently-used
+    order. New pairs are written to the database in batches when the number of
+    pending writes reaches max_pending, when flush_interval seconds have passed
+    since the last write, or when flush or close is called. Pending pairs are
+    also written if the cache is garbage collected or the process exits.
+    """
 
     def __init__(self, *args, **kwargs):
         self.session = None
-        self.recent = {}
+        self.recent = OrderedDict()
         self.max_recent = 5000
+        self.pending = {}
+        self.max_pending = 1000
+        self.flush_interval = 30
+        self._last_flush = time.monotonic()
+        # Guards the session, which is shared with the background flusher
+        self._lock = threading.RLock()
         for key, val in dict(*args, **kwargs).items():
             self[key] = val
 
@@ -27,34 +47,37 @@ class CacheDict:
     def __setitem__(self, key, val):
         key = self.keyer(key)
         try:
-            self.recent[key]
+            self.recent.move_to_end(key)
         except KeyError:
-            # Add key-val to persistent cache if configured
+            # Queue key-val for the persistent cache if configured
             if self.session is not None:
                 try:
-                    self.session.add(Cache(key=key, val=self.writer(val)))
-                    self.session.commit()
+                    val_ = self.writer(val)
                 except ValueError:
                     # Writer method threw an error, so don't save this pair
                     return
-                except IntegrityError:
-                    # Record already exists
-                    self.session.rollback()
-            # Limit recent to max length by deleting oldest key
-            self.recent[key] = val
-            while len(self.recent) > self.max_recent:
-                self.recent.popitem(last=False)
+                with self._lock:
+                    self.pending.setdefault(key, val_)
+                    if len(self.pending) >= self.max_pending:
+                        self.flush()
+            self._add_recent(key, val)
 
     def __getitem__(self, key):
         key = self.keyer(key)
         try:
+            self.recent.move_to_end(key)
             return self.recent[key]
         except KeyError:
             if self.session is not None:
-                query = self.session.query(Cache.val).filter_by(key=key)
+                with self._lock:
+                    try:
+                        # Pending pairs have not been written to the database
+                        row = Cache(key=key, val=self.pending[key])
+                    except KeyError:
+                        row = self.session.query(Cache.val).filter_by(key=key).first()
                 try:
-                    val = self.reader(query.first())
-                    self.recent[key] = val
+                    val = self.reader(row)
+                    self._add_recent(key, val)
                     return val
                 except AttributeError:
                     pass
@@ -71,12 +94,42 @@ class CacheDict:
             pass
         init_db(path)
         self.session = Session()
+        _caches.add(self)
+        # Write pending pairs when the cache is garbage collected or at exit.
+        # The finalizer must not refer to the cache itself.
+        weakref.finalize(self, _write_pending, self.session, self.pending, self._lock)
+        _start_flusher()
 
     def fill_recent(self):
         """Fills the recent dictionary with previously cached entries"""
         if self.session:
-            query = self.session.query(Cache).limit(self.max_recent)
-            self.recent = {r.key: self.reader(r) for r in query}
+            with self._lock:
+                self.flush()
+                rows = self.session.query(Cache).limit(self.max_recent).all()
+            self.recent = OrderedDict((r.key, self.reader(r)) for r in rows)
+
+    def flush(self):
+        """Writes pending key-value pairs to the database in one transaction"""
+        _write_pending(self.session, self.pending, self._lock)
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """Writes pending key-value pairs and closes the database session"""
+        self.flush()
+        if self.session is not None:
+            with self._lock:
+                self.session.close()
+
+    def _flush_if_due(self):
+        """Writes pending key-value pairs if flush_interval has passed"""
+        if self.pending and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _add_recent(self, key, val):
+        """Adds a key-value pair to recent, removing the least recently used"""
+        self.recent[key] = val
+        while len(self.recent) > self.max_recent:
+            self.recent.popitem(last=False)
 
     @staticmethod
     def keyer(key):
@@ -92,3 +145,79 @@ class CacheDict:
     def reader(row):
         """Defines function to apply when key is retrieved"""
         return row.val
+
+
+def flush_caches():
+    """Writes pending key-value pairs from all caches
+
+    Forked worker processes exit without running atexit handlers or
+    finalizers, so they should call this before exiting.
+    """
+    for cache in list(_caches):
+        try:
+            cache.flush()
+        except Exception as exc:
+            logger.warning(f"Could not flush cache: {exc}")
+
+
+def _write_pending(session, pending, lock):
+    """Writes pending key-value pairs to the database in one transaction"""
+    with lock:
+        if pending and session is not None:
+            logger.debug(f"Writing {len(pending):,} pairs to cache")
+            rows = [{"key": key, "val": val} for key, val in pending.items()]
+            # Existing records are not overwritten
+            session.execute(insert(Cache).on_conflict_do_nothing(), rows)
+            session.commit()
+            # Cleared in place because the finalizer holds this dict
+            pending.clear()
+
+
+def _acquire_locks():
+    """Acquires every cache lock before the process forks
+
+    A child process inherits locks in the state they were in when the process
+    forked, so a lock held by the flusher or another thread would never be
+    released in the child.
+    """
+    _fork_locks.extend(cache._lock for cache in list(_caches))
+    for lock in _fork_locks:
+        lock.acquire()
+
+
+def _release_locks():
+    """Releases the cache locks acquired before the process forked"""
+    for lock in reversed(_fork_locks):
+        lock.release()
+    _fork_locks.clear()
+
+
+def _start_flusher():
+    """Starts a thread that writes caches once flush_interval has passed"""
+    global _flusher
+    # Threads do not survive a fork, so check that the thread is still running
+    if _flusher is None or not _flusher.is_alive():
+        _flusher = threading.Thread(target=_run_flusher, daemon=True)
+        _flusher.start()
+
+
+def _run_flusher():
+    """Checks every second whether any cache is due to be written"""
+    while True:
+        time.sleep(1)
+        for cache in list(_caches):
+            # In-memory databases exist only in the thread that created them
+            if cache.session.get_bind().url.database in (None, "", ":memory:"):
+                continue
+            try:
+                cache._flush_if_due()
+            except Exception as exc:
+                logger.warning(f"Could not flush cache: {exc}")
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=_acquire_locks,
+        after_in_parent=_release_locks,
+        after_in_child=_release_locks,
+    )
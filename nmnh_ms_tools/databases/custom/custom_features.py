@@ -19,6 +19,7 @@ class CustomFeatures(GeoNamesFeatures):
         super().__init__()
         self.features = AllCustom
         self.names = AlternateNames
+        self.api_records = None
         self.base = Base
         self.keys = None  # overrides attribute in base class
         self.csv_kwargs = {"dialect": "excel"}
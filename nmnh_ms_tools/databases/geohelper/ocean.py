@@ -1,28 +1,49 @@
 """Builds and queries tiles representing the global ocean"""
 
+import logging
+import os
+import pickle
 import re
 from collections import namedtuple
 from functools import cache
 
+import numpy as np
 import pandas as pd
 import geopandas as gpd
+import shapely
 from shapely import Geometry, union_all, wkb
 from shapely.geometry import Polygon
+from sqlalchemy import func
 
 from .database import Session, OceanTiles
 from ..natural_earth import Session as NaturalEarthSession, Ocean
 from ...tools.geographic_operations.geometry import GeoMetry
 
 
+logger = logging.getLogger(__name__)
 Tile = namedtuple("Tile", ["geom", "name"])
 
 
 class OceanQuery:
-    """Tiles and queries the global ocean"""
+    """Tiles and queries the global ocean
+
+    Tiles are read from the geohelper database the first time they are needed
+    and are shared by all instances along with a spatial index.
+
+    Parameters
+    ----------
+    cache_path : str
+        path to a file used to store the tiles between sessions. The file is
+        rebuilt if the tiles in the database or the versions of the packages
+        used to store them change.
+    """
 
     # Deferred but not with LazyAttr
     gdf = None
 
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+
     @staticmethod
     def std_ocean(name):
         """Extracts the standardized name of an ocean"""
@@ -39,32 +60,125 @@ class OceanQuery:
         if self.gdf is None:
             self._build_gdf()
 
-        gdf = self.gdf.copy()
+        gdf = self.gdf
         if geom is not None:
-            if not isinstance(geom, Geometry):
-                geom = union_all(GeoMetry(geom).geom.to_crs(4326))
-            gdf = gdf[gdf.intersects(geom)]
+            idx = gdf.sindex.query(self._as_shape(geom), predicate="intersects")
+            gdf = gdf.iloc[np.sort(idx)]
+        if ocean is not None:
+            gdf = gdf[gdf["ocean"] == self.std_ocean(ocean)]
+        # Never return the shared dataframe itself
+        return gdf.copy() if gdf is self.gdf else gdf
+
+    def query_many(self, geoms, ocean=None):
+        """Identifies tiles matching each of a list of geometries
+
+        Parameters
+        ----------
+        geoms : list | geopandas.GeoSeries
+            points or other geometries to look up
+        ocean : str
+            name of the ocean to limit results to
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            matching tiles with a query column giving the position of the
+            matching geometry in geoms, sorted by query. Tiles that match
+            more than one geometry are repeated.
+        """
+        if self.gdf is None:
+            self._build_gdf()
+
+        if isinstance(geoms, gpd.GeoSeries):
+            shapes = geoms.to_crs(4326).values
+        else:
+            shapes = np.empty(len(geoms), dtype=object)
+            shapes[:] = [self._as_shape(g) for g in geoms]
+
+        query_idx, tile_idx = self.gdf.sindex.query(shapes, predicate="intersects")
+        order = np.lexsort((tile_idx, query_idx))
+        gdf = self.gdf.iloc[tile_idx[order]].assign(query=query_idx[order])
         if ocean is not None:
             gdf = gdf[gdf["ocean"] == self.std_ocean(ocean)]
         return gdf
 
     def intersection(self, geom, ocean=None):
-        if not isinstance(geom, Geometry):
-            geom = union_all(GeoMetry(geom).geom.to_crs(4326))
+        geom = self._as_shape(geom)
         gdf = self.query(geom=geom, ocean=ocean)
         return gpd.GeoDataFrame(geometry=[union_all(gdf.intersection(geom))], crs=4326)
-        gs = [union_all(gdf.intersection(geom))]
+
+    @staticmethod
+    def _as_shape(geom):
+        """Converts a geometry to a shapely object in WGS84"""
+        if not isinstance(geom, Geometry):
+            geom = union_all(GeoMetry(geom).geom.to_crs(4326))
+        return geom
 
     def _build_gdf(self):
         """Retrieves and indexes ocean tiles"""
         session = Session()
-        query = session.query(OceanTiles).order_by(OceanTiles.id)
-        if not any(query):
-            raise ValueError("ocean database is empty")
-        rows = []
-        for row in query:
-            rows.append({"ocean": row.ocean, "coast": row.coast, "wkb": row.geometry})
-        df = pd.DataFrame(rows)
-        gs = gpd.GeoSeries.from_wkb(df["wkb"])
-        self.__class__.gdf = gpd.GeoDataFrame(df, geometry=gs, crs=4326)
+        try:
+            key = self._cache_key(session)
+            if not key[0]:
+                raise ValueError("ocean database is empty")
+            gdf = self._read_cache(key)
+            if gdf is None:
+                query = session.query(OceanTiles).order_by(OceanTiles.id)
+                rows = []
+                for row in query:
+                    rows.append(
+                        {"ocean": row.ocean, "coast": row.coast, "wkb": row.geometry}
+                    )
+                df = pd.DataFrame(rows)
+                gs = gpd.GeoSeries.from_wkb(df["wkb"])
+                gdf = gpd.GeoDataFrame(df, geometry=gs, crs=4326)
+                self._write_cache(gdf, key)
+        finally:
+            session.close()
+        # Build the spatial index once so every query can reuse it
+        gdf.sindex
+        self.__class__.gdf = gdf
         return self.gdf
+
+    @staticmethod
+    def _cache_key(session):
+        """Summarizes the tiles in the database and the packages used to store them
+
+        The key includes the number of tiles, the highest tile id, the number
+        of coastal tiles, and the total size of the names and geometries, so it
+        changes when tiles are added, removed, or edited without reading every
+        tile.
+        """
+        row = session.query(
+            func.count(OceanTiles.id),
+            func.max(OceanTiles.id),
+            func.total(func.length(OceanTiles.ocean)),
+            func.total(OceanTiles.coast),
+            func.total(func.length(OceanTiles.geometry)),
+        ).one()
+        return tuple(row) + (pd.__version__, gpd.__version__, shapely.__version__)
+
+    def _read_cache(self, key):
+        """Reads tiles from the cache file if it matches the database"""
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return None
+        # Any problem reading the file means the tiles are rebuilt
+        try:
+            with open(self.cache_path, "rb") as f:
+                cached = pickle.load(f)
+            if cached["key"] != key:
+                logger.debug("Ocean tile cache is stale")
+                return None
+            gdf = cached["gdf"]
+        except Exception as exc:
+            logger.warning(f"Could not read ocean tiles from cache: {exc}")
+            return None
+        logger.debug(f"Read ocean tiles from {self.cache_path}")
+        return gdf
+
+    def _write_cache(self, gdf, key):
+        """Writes tiles to the cache file"""
+        if self.cache_path is not None:
+            with open(self.cache_path, "wb") as f:
+                pickle.dump({"key": key, "gdf": gdf}, f, pickle.HIGHEST_PROTOCOL)
+            logger.debug(f"Wrote ocean tiles to {self.cache_path}")
@@ -60,6 +60,14 @@ class AlternateNames(Base):
     ocean = Column(String(collation="nocase"))
 
 
+class ApiRecords(Base):
+    """Defines optional table storing features serialized in the API format"""
+
+    __tablename__ = "api_records"
+    geoname_id = Column(ForeignKey("all_countries.geoname_id"), primary_key=True)
+    api_json = Column(String)
+
+
 def init_db(fp=None, tables=None, **kwargs):
     """Creates the database based on the given path"""
     global Base
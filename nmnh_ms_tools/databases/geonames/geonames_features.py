@@ -1,23 +1,30 @@
 """Defines helper functions for the GeoNames SQLite table"""
 
 import csv
-import datetime as dt
 import json
 import logging
+import multiprocessing as mp
 import os
 import re
+import time
+import warnings
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 from functools import cache
+from itertools import islice
 
 from shapely import wkt
-from sqlalchemy import case, or_
+from sqlalchemy import Integer, case, inspect, or_, text
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.schema import Index
 
+from ..helpers import engine_profile, iter_keyset, reset_connections
 from .database import (
     Base,
     Session,
     AllCountries,
     AlternateNames,
+    ApiRecords,
 )
 from ...config import DATA_DIR
 from ...utils import (
@@ -58,12 +65,25 @@ class GeoNamesFeatures:
     country_code_to_name = None
     country_code_to_continent = None
 
+    # Records converted to the API format are shared by all instances
+    api_cache = OrderedDict()
+    max_api_cache = 10000
+
     def __init__(self):
         self.features = AllCountries
         self.names = AlternateNames
+        self.api_records = ApiRecords
         self.base = Base
         self._session = None
+        self._has_api_records = None
         self.batch_size = 100000
+        # Maximum number of parameters to include in a single query
+        self.max_params = 900
+        # Settings used when loading the dump file
+        self.processes = 1
+        self.chunk_size = 10000
+        self.commit_size = 500000
+        self.load_profile = "load"
         self.keys = [
             "geoname_id",
             "name",
@@ -88,6 +108,9 @@ class GeoNamesFeatures:
         ]
         self.csv_kwargs = {"delimiter": "\t", "quotechar": '"'}
         self.delim = ","
+        # Build an FTS5 trigram index on st_name when indexing the names table
+        self.use_fts = False
+        self._has_fts = None
         # List of geonameid-st_name pairs that should be removed
         self.unwanted_names = {
             3358844: "atlantic-ocean",
@@ -119,9 +142,142 @@ class GeoNamesFeatures:
         except ValueError:
             return key
 
+    @property
+    def fts_table(self):
+        """Name of the FTS5 table used to index self.names"""
+        return f"{self.names.__tablename__}_fts"
+
+    @property
+    def has_fts(self):
+        """Whether the FTS5 trigram index on self.names exists"""
+        if self._has_fts is None:
+            bind = self.session.get_bind()
+            self._has_fts = inspect(bind).has_table(self.fts_table)
+        return self._has_fts
+
+    @property
+    def has_api_records(self):
+        """Whether features have been precomputed in self.api_records"""
+        if self.api_records is None:
+            return False
+        if self._has_api_records is None:
+            try:
+                row = self.session.query(self.api_records.geoname_id).first()
+            except OperationalError:
+                self.session.rollback()
+                row = None
+            self._has_api_records = row is not None
+        return self._has_api_records
+
     def std_names(self, names, std_func=None):
         return std_names(names, std_func=std_func if std_func else self.std)
 
+    def to_api(self, rows):
+        """Maps rows from self.features to the format used by the GeoNames API
+
+        Converted records are kept in a cache shared by all instances. Records
+        missing from that cache are read from self.api_records if that table
+        has been populated using precompute_api_records, then converted from
+        the rows themselves as a last resort.
+
+        Parameters
+        ----------
+        rows : list
+            rows from self.features
+
+        Returns
+        -------
+        list
+            list of records in the format used by the GeoNames API
+        """
+        rows = list(rows)
+        cache = self.api_cache
+        table = self.features.__tablename__
+        serialized = {}
+        for row in rows:
+            key = (table, row.geoname_id)
+            try:
+                cache.move_to_end(key)
+                serialized[row.geoname_id] = cache[key]
+            except KeyError:
+                pass
+        missing = {r.geoname_id for r in rows if r.geoname_id not in serialized}
+        if missing and self.has_api_records:
+            query = self.session.query(self.api_records).filter(
+                self.api_records.geoname_id.in_(missing)
+            )
+            for row in query:
+                serialized[row.geoname_id] = row.api_json
+        for row in rows:
+            if row.geoname_id not in serialized:
+                serialized[row.geoname_id] = json.dumps(to_geonames_api(row))
+            cache[(table, row.geoname_id)] = serialized[row.geoname_id]
+        while len(cache) > self.max_api_cache:
+            cache.popitem(last=False)
+        # Load from JSON so that callers can modify the records they receive
+        return [json.loads(serialized[r.geoname_id]) for r in rows]
+
+    def precompute_api_records(self):
+        """Stores every feature in self.api_records in the API format"""
+        if self.api_records is None:
+            raise ValueError(
+                f"No api_records table is defined for"
+                f" {repr(self.features.__tablename__)}"
+            )
+        self.clear_api_records()
+        session = self.session
+        records = []
+        rows = iter_keyset(
+            session.query(self.features), self.features.geoname_id, self.batch_size
+        )
+        for row in rows:
+            records.append(
+                {
+                    "geoname_id": row.geoname_id,
+                    "api_json": json.dumps(to_geonames_api(row)),
+                }
+            )
+            if len(records) >= 10000:
+                session.bulk_insert_mappings(self.api_records, records)
+                session.commit()
+                records = []
+        session.bulk_insert_mappings(self.api_records, records)
+        session.commit()
+        session.close()
+        self._has_api_records = None
+
+    def clear_api_records(self, geoname_ids=None):
+        """Discards records stored in the API format
+
+        Must be called whenever features are modified so that stale records
+        are not returned by searches. Clears both the in-memory cache and
+        self.api_records.
+
+        Parameters
+        ----------
+        geoname_ids : list
+            identifiers to clear. If omitted, clears all records.
+        """
+        table = self.features.__tablename__
+        if geoname_ids is None:
+            for key in [k for k in self.api_cache if k[0] == table]:
+                del self.api_cache[key]
+        else:
+            geoname_ids = [self.prep_id(gid) for gid in geoname_ids]
+            for geoname_id in geoname_ids:
+                self.api_cache.pop((table, geoname_id), None)
+        if self.api_records is not None:
+            session = self.session
+            query = session.query(self.api_records)
+            if geoname_ids is not None:
+                query = query.filter(self.api_records.geoname_id.in_(geoname_ids))
+            try:
+                query.delete(synchronize_session=False)
+                session.commit()
+            except OperationalError:
+                session.rollback()
+            self._has_api_records = None
+
     def get_json(self, geoname_id, fill_record=False):
         """Retrieves the feature matching a GeoName ID"""
         geoname_id = self.prep_id(geoname_id)
@@ -140,47 +296,60 @@ class GeoNamesFeatures:
             except NotImplementedError:
                 # Subclasses should raise this error
                 pass
+        result = self.to_api([row])[0]
         session.close()
-        return to_geonames_api(row)
+        return result
 
     def get_many(self, geoname_ids):
         """Retrieves features matchinng a list of GeoNames IDs"""
         geoname_ids = [self.prep_id(gid) for gid in geoname_ids]
+        records = self.get_batch(geoname_ids)
+        # Return records in the order given regardless of which were cached
+        return [records[gid] for gid in dict.fromkeys(geoname_ids) if gid in records]
+
+    def get_batch(self, geoname_ids):
+        """Retrieves features matching any number of GeoNames IDs
+
+        Records already in the API cache are returned without querying the
+        database. The remaining IDs are queried in chunks of self.max_params
+        to stay under the SQLite limit on the number of parameters.
+
+        Parameters
+        ----------
+        geoname_ids : iterable
+            GeoNames IDs
+
+        Returns
+        -------
+        dict
+            records in the format used by the GeoNames API keyed by the
+            GeoNames ID as stored in the database. IDs that do not exist are
+            omitted.
+        """
+        table = self.features.__tablename__
+        results = {}
+        missing = []
+        for geoname_id in dict.fromkeys(self.prep_id(gid) for gid in geoname_ids):
+            try:
+                self.api_cache.move_to_end((table, geoname_id))
+                results[geoname_id] = json.loads(self.api_cache[(table, geoname_id)])
+            except KeyError:
+                missing.append(geoname_id)
         session = self.session
-        rows = (
-            session.query(self.features)
-            .filter(self.features.geoname_id.in_(geoname_ids))
-            .limit(len(geoname_ids))
-        )
+        for i in range(0, len(missing), self.max_params):
+            chunk = missing[i : i + self.max_params]
+            rows = list(
+                session.query(self.features).filter(self.features.geoname_id.in_(chunk))
+            )
+            for row, result in zip(rows, self.to_api(rows)):
+                results[row.geoname_id] = result
         session.close()
-        return to_geonames_api(rows)
+        return results
 
     def search_json(self, st_name, limit=100, **kwargs):
         """Searches for a feature by name"""
         logger.debug(f"Searching for {st_name} ({kwargs})")
         session = self.session
-        # Map kwargs used by the GeoNames webservice to those needed here
-        kwarg_map = {
-            "adminCode1": "admin_code_1",
-            "adminCode2": "admin_code_2",
-            "continentCode": "continent_code",
-            "country": "country_code",
-            "featureClass": "fcl",
-            "featureCode": "fcode",
-        }
-        # Define sort order
-        sort_order = case(
-            (self.features.fcl == "A", 1),
-            (self.features.fcl == "P", 2),
-            (self.features.fcl == "H", 3),
-            (self.features.fcl == "L", 4),
-            (self.features.fcl == "T", 5),
-            (self.features.fcl == "V", 6),
-            (self.features.fcl == "S", 7),
-            (self.features.fcl == "R", 8),
-            (self.features.fcl == "U", 9),
-            (self.features.fcl == None, 10),
-        )
         # Build search filter
         if not re.match(r"^[-a-z0-9]$", st_name):
             try:
@@ -190,19 +359,12 @@ class GeoNamesFeatures:
         names = set([n for n in [st_name, st_name.replace("-", "")] if n])
         if not names:
             return []
-        fltr = [self.names.st_name.in_(names)]
-        for key, val in kwargs.items():
-            if val:
-                db_field = getattr(self.names, kwarg_map.get(key, key))
-                if isinstance(val, (list, tuple)):
-                    fltr.append(db_field.in_(val))
-                else:
-                    fltr.append(db_field == val)
+        fltr = [self.names.st_name.in_(names)] + self._search_filter(**kwargs)
         query = (
             session.query(self.features)
             .join(self.names)
             .filter(*fltr)
-            .order_by(sort_order)
+            .order_by(self._sort_order())
             .limit(limit)
         )
         # from ..helpers import time_query
@@ -210,31 +372,189 @@ class GeoNamesFeatures:
         results = list(query)
         # Extend result with a like query if too few results found
         if len(results) < limit and len(st_name) >= 3:
-            fltr[0] = or_(
-                self.names.st_name.like(st_name + "%"),
-                self.names.st_name_rev.like(st_name[::-1] + "%"),
-            )
+            fltr[0] = self.name_filter(st_name)
             query = (
                 session.query(self.features)
                 .join(self.names)
                 .filter(*fltr)
-                .order_by(sort_order)
+                .order_by(self._sort_order())
                 .limit(limit - len(results))
             )
             # from ..helpers import time_query
             # time_query(query)
             results.extend(query)
+        results = self.to_api(dedupe(results))
         session.close()
         logger.debug(f"Search complete")
-        return to_geonames_api(dedupe(results))
-
-    def from_csv(self, fp, delete_existing=True):
-        """Fills the database from the GeoNames text dump file"""
+        return results
+
+    def search_partial(self, st_name, how="substring", limit=100, **kwargs):
+        """Searches for features with names that start, end, or contain a string
+
+        Parameters
+        ----------
+        st_name : str
+            name to search for. Standardized before searching.
+        how : str
+            one of prefix, suffix, or substring
+        limit : int
+            maximum number of records to return
+        kwargs :
+            additional filters using the keywords from search_json
+
+        Returns
+        -------
+        list
+            list of matching records in the format used by the GeoNames API
+        """
+        try:
+            st_name = self.std(st_name)
+        except ValueError:
+            return []
+        if not st_name:
+            return []
         session = self.session
+        fltr = [
+            self.name_filter(
+                st_name,
+                prefix=how == "prefix",
+                suffix=how == "suffix",
+                substring=how == "substring",
+            )
+        ]
+        query = (
+            session.query(self.features)
+            .join(self.names)
+            .filter(*fltr + self._search_filter(**kwargs))
+            .order_by(self._sort_order())
+            .limit(limit)
+        )
+        results = self.to_api(dedupe(list(query)))
+        session.close()
+        return results
+
+    def name_filter(self, st_name, prefix=True, suffix=True, substring=False):
+        """Builds a filter matching names that start, end, or contain a string
+
+        Uses the FTS5 trigram index to limit the rows checked by the LIKE
+        clauses if that index exists. The LIKE clauses are retained either
+        way, so the filter matches the same rows with or without the index.
+
+        Parameters
+        ----------
+        st_name : str
+            standardized name
+        prefix : bool
+            whether to match names starting with st_name
+        suffix : bool
+            whether to match names ending with st_name
+        substring : bool
+            whether to match names containing st_name anywhere
+
+        Returns
+        -------
+        sqlalchemy.sql.elements.ColumnElement
+            filter on self.names
+        """
+        clauses = []
+        patterns = []
+        if substring:
+            clauses.append(self.names.st_name.like(f"%{st_name}%"))
+            patterns.append(f"%{st_name}%")
+        else:
+            if prefix:
+                clauses.append(self.names.st_name.like(st_name + "%"))
+                patterns.append(st_name + "%")
+            if suffix:
+                clauses.append(self.names.st_name_rev.like(st_name[::-1] + "%"))
+                patterns.append("%" + st_name)
+        fltr = or_(*clauses)
+        # Trigram indexes can only be used for strings of three or more characters
+        if patterns and len(st_name) >= 3 and self.has_fts:
+            sql = " UNION ".join(
+                f"SELECT rowid FROM {self.fts_table} WHERE st_name LIKE :pattern{i}"
+                for i in range(len(patterns))
+            )
+            params = {f"pattern{i}": p for i, p in enumerate(patterns)}
+            rowids = text(sql).bindparams(**params).columns(rowid=Integer)
+            fltr = self.names.id.in_(rowids) & fltr
+        return fltr
+
+    def _search_filter(self, **kwargs):
+        """Maps search keywords to filters on self.names"""
+        # Map kwargs used by the GeoNames webservice to those needed here
+        kwarg_map = {
+            "adminCode1": "admin_code_1",
+            "adminCode2": "admin_code_2",
+            "continentCode": "continent_code",
+            "country": "country_code",
+            "featureClass": "fcl",
+            "featureCode": "fcode",
+        }
+        fltr = []
+        for key, val in kwargs.items():
+            if val:
+                db_field = getattr(self.names, kwarg_map.get(key, key))
+                if isinstance(val, (list, tuple)):
+                    fltr.append(db_field.in_(val))
+                else:
+                    fltr.append(db_field == val)
+        return fltr
+
+    def _sort_order(self):
+        """Defines the sort order for search results based on feature class"""
+        return case(
+            (self.features.fcl == "A", 1),
+            (self.features.fcl == "P", 2),
+            (self.features.fcl == "H", 3),
+            (self.features.fcl == "L", 4),
+            (self.features.fcl == "T", 5),
+            (self.features.fcl == "V", 6),
+            (self.features.fcl == "S", 7),
+            (self.features.fcl == "R", 8),
+            (self.features.fcl == "U", 9),
+            (self.features.fcl == None, 10),
+        )
+
+    def from_csv(self, fp, delete_existing=True, processes=None):
+        """Fills the database from the GeoNames text dump file
+
+        Rows are read in chunks of self.chunk_size rows. Each chunk is mapped
+        and standardized, either in this process or in a pool of worker
+        processes, then written to the database by this process. Changes are
+        committed about every self.commit_size rows. Indexes are dropped
+        before the load and rebuilt after it. Connections made during the
+        load are tuned using the profile named in self.load_profile.
+
+        Parameters
+        ----------
+        fp : str
+            path to the dump file
+        delete_existing : bool
+            whether to delete existing records before loading the file
+        processes : int
+            number of worker processes used to map and standardize rows.
+            Defaults to self.processes.
+
+        Returns
+        -------
+        GeoNamesFeatures
+            this object
+        """
+        if processes is None:
+            processes = self.processes
+        self.session.close()
+        with engine_profile(self.session.get_bind(), self.load_profile):
+            self._from_csv(fp, delete_existing, processes)
+        return self
+
+    def _from_csv(self, fp, delete_existing, processes):
+        """Fills the database from the dump file using the current profile"""
         if delete_existing:
             self.delete_existing_records()
-        # Read data into tables
-        start = dt.datetime.now()
+        self.drop_indexes()
+        # Track the number of rows and seconds spent in each stage of the load
+        stats = {"parse": [0, 0], "standardize": [0, 0], "write": [0, 0]}
         with open(fp, "r", encoding="utf-8-sig", newline="") as f:
             rows = csv.reader(skip_hashed(f), **self.csv_kwargs)
 
@@ -244,69 +564,152 @@ class GeoNamesFeatures:
             else:
                 keys = [k for k in self.keys if k != "continent_code"]
 
-            # Import data
-            features = []
-            alt_names = []
-            for i, row in enumerate(rows):
-                rowdict = {k: v if v else None for k, v in zip(keys, row)}
-
+            chunks = self._read_chunks(rows, stats)
+            context = None
+            if processes > 1:
                 try:
-                    rowdict = self.mapper(rowdict)
-                except Exception as exc:
-                    logger.warning(f"Skipped unmappable row {rowdict}: {exc}")
-                    continue
+                    context = mp.get_context("fork")
+                except ValueError:
+                    warnings.warn(
+                        "Parallel loading requires the fork start method."
+                        " Loading sequentially instead."
+                    )
+            if context is None:
+                mapped = (self.map_rows(keys, c) for c in chunks)
+                self._write_chunks(mapped, stats)
+            else:
+                with ProcessPoolExecutor(
+                    processes,
+                    mp_context=context,
+                    initializer=_init_loader,
+                    initargs=(self,),
+                ) as executor:
+                    self._write_chunks(
+                        _map_chunks(executor, keys, chunks, 2 * processes), stats
+                    )
+
+        self.remove_unwanted_names()
+        self.create_indexes()
+        self.clear_api_records()
+
+    def map_row(self, keys, row):
+        """Maps a row from the dump file to records for both tables
+
+        Parameters
+        ----------
+        keys : list of str
+            column names from the dump file
+        row : list of str
+            row from the dump file
+
+        Returns
+        -------
+        tuple
+            feature for self.features and list of names for self.names, or
+            None if the row could not be mapped
+        """
+        rowdict = {k: v if v else None for k, v in zip(keys, row)}
 
-                # Check for multiple names in main name field
-                if self.delim in rowdict["name"]:
-                    names = [s.strip() for s in rowdict["name"].split(self.delim)]
-                    rowdict["name"] = names[0]
+        try:
+            rowdict = self.mapper(rowdict)
+        except Exception as exc:
+            logger.warning(f"Skipped unmappable row {rowdict}: {exc}")
+            return None
 
-                    # Get alternate names
-                    try:
-                        alt_names_ = rowdict["alternate_names"].split(",") + names[1:]
-                    except (AttributeError, KeyError):
-                        alt_names_ = names[1:]
+        # Check for multiple names in main name field
+        if self.delim in rowdict["name"]:
+            names = [s.strip() for s in rowdict["name"].split(self.delim)]
+            rowdict["name"] = names[0]
 
-                    rowdict["alternate_names"] = self.delim.join(
-                        sorted(set(alt_names_))
-                    )
+            # Get alternate names
+            try:
+                alt_names = rowdict["alternate_names"].split(",") + names[1:]
+            except (AttributeError, KeyError):
+                alt_names = names[1:]
 
-                rowdict = self.assign_short_country_name(rowdict)
-                rowdict = self.finalize_names(rowdict)
+            rowdict["alternate_names"] = self.delim.join(sorted(set(alt_names)))
 
-                # Add features
-                cols = self.features.__table__.columns
-                feature = {k: v for k, v in rowdict.items() if k in cols}
-                try:
-                    country_code = feature["country_code"]
-                    continent_code = self.get_continent(country_code, False)
-                    feature["continent_code"] = continent_code
-                except (AttributeError, KeyError):
-                    pass
-                features.append(feature)
-
-                alt_names.extend(self.map_alt_names(rowdict))
-                if i and not i % 25000:
-                    td = dt.datetime.now() - start
-                    logger.debug(f"{i:,} records processed (t={td}s)")
-                    session.bulk_insert_mappings(self.features, features)
-                    session.bulk_insert_mappings(self.names, alt_names)
-                    session.commit()
-                    features = []
-                    alt_names = []
-                    start = dt.datetime.now()
-                    # break
-
-            # Add remaining features
-            logger.debug(f"{i:,} records processed")
+        rowdict = self.assign_short_country_name(rowdict)
+        rowdict = self.finalize_names(rowdict)
+
+        # Add features
+        cols = self.features.__table__.columns
+        feature = {k: v for k, v in rowdict.items() if k in cols}
+        try:
+            country_code = feature["country_code"]
+            continent_code = self.get_continent(country_code, False)
+            feature["continent_code"] = continent_code
+        except (AttributeError, KeyError):
+            pass
+
+        return feature, self.map_alt_names(rowdict)
+
+    def map_rows(self, keys, rows):
+        """Maps a chunk of rows from the dump file
+
+        Returns
+        -------
+        tuple
+            list of features, list of names, number of rows, and seconds spent
+            mapping the chunk
+        """
+        start = time.perf_counter()
+        features = []
+        alt_names = []
+        for row in rows:
+            mapped = self.map_row(keys, row)
+            if mapped is not None:
+                features.append(mapped[0])
+                alt_names.extend(mapped[1])
+        return features, alt_names, len(rows), time.perf_counter() - start
+
+    def _read_chunks(self, rows, stats):
+        """Splits rows from the dump file into chunks"""
+        while True:
+            start = time.perf_counter()
+            chunk = list(islice(rows, self.chunk_size))
+            stats["parse"][0] += len(chunk)
+            stats["parse"][1] += time.perf_counter() - start
+            if not chunk:
+                return
+            yield chunk
+
+    def _write_chunks(self, mapped, stats):
+        """Writes mapped chunks to the database in large transactions"""
+        session = self.session
+        uncommitted = 0
+        for features, alt_names, num_rows, elapsed in mapped:
+            stats["standardize"][0] += num_rows
+            stats["standardize"][1] += elapsed
+            start = time.perf_counter()
             session.bulk_insert_mappings(self.features, features)
             session.bulk_insert_mappings(self.names, alt_names)
-            session.commit()
-            session.close()
+            uncommitted += num_rows
+            if uncommitted >= self.commit_size:
+                session.commit()
+                uncommitted = 0
+            stats["write"][0] += num_rows
+            stats["write"][1] += time.perf_counter() - start
+            if uncommitted < num_rows:
+                self._log_load_rates(stats)
+        start = time.perf_counter()
+        session.commit()
+        session.close()
+        stats["write"][1] += time.perf_counter() - start
+        self._log_load_rates(stats)
 
-        self.remove_unwanted_names()
-        self.create_indexes()
-        return self
+    @staticmethod
+    def _log_load_rates(stats):
+        """Logs the number of rows processed per second in each stage of a load
+
+        Rates for the standardize stage are per second of work in each process
+        and do not reflect the number of processes.
+        """
+        rates = []
+        for stage, (num_rows, elapsed) in stats.items():
+            rate = num_rows / elapsed if elapsed else 0
+            rates.append(f"{stage}={rate:,.0f} rows/s")
+        logger.info(f"{stats['write'][0]:,} records loaded ({', '.join(rates)})")
 
     def delete_existing_records(self, source=None):
         """Deletes associated records in both tables"""
@@ -330,6 +733,7 @@ class GeoNamesFeatures:
                 )
         session.commit()
         session.close()
+        self.clear_api_records(None if source is None else loc_ids)
 
     def update_alt_names(self, source=None):
         """Regenerates alternate names table"""
@@ -343,25 +747,20 @@ class GeoNamesFeatures:
         session.commit()
         # Popuate names table
         alt_names = []
-        query = (
-            session.query(self.features)
-            .order_by(self.features.geoname_id)
-            .limit(self.batch_size)
-        )
         total = 0
-        offset = 0
-        while query.first():
-            logger.debug(f"New query: {offset:,}")
-            for row in query:
-                alt_names.extend(self.map_alt_names(dictify(row)))
-                if len(alt_names) >= 10000:
-                    session.bulk_insert_mappings(self.names, alt_names)
-                    session.commit()
-                    total += len(alt_names)
-                    logger.debug(f"Committed {total:,} records")
-                    alt_names = []
-            offset += self.batch_size
-            query = query.offset(offset)
+        rows = iter_keyset(
+            session.query(self.features), self.features.geoname_id, self.batch_size
+        )
+        for i, row in enumerate(rows):
+            if not i % self.batch_size:
+                logger.debug(f"New query: {i:,}")
+            alt_names.extend(self.map_alt_names(dictify(row)))
+            if len(alt_names) >= 10000:
+                session.bulk_insert_mappings(self.names, alt_names)
+                session.commit()
+                total += len(alt_names)
+                logger.debug(f"Committed {total:,} records")
+                alt_names = []
         if alt_names:
             session.bulk_insert_mappings(self.names, alt_names)
             session.commit()
@@ -466,6 +865,7 @@ class GeoNamesFeatures:
                 session.delete(row)
         session.commit()
         session.close()
+        self.clear_api_records(list(self.unwanted_names))
 
     def remove_geoname_ids(self, geoname_ids):
         """Removes list of GeoNames features from the database"""
@@ -478,11 +878,14 @@ class GeoNamesFeatures:
         ).delete()
         session.commit()
         session.close()
+        self.clear_api_records(geoname_ids)
 
-    def index_names(self, create=True, drop=True):
+    def index_names(self, create=True, drop=True, fts=None):
         """Builds or rebuilds indexes on the self.names table"""
         if create and not drop:
             drop = True
+        if fts is None:
+            fts = self.use_fts
 
         primary = [
             self.names.fcl,
@@ -513,6 +916,45 @@ class GeoNamesFeatures:
                     logger.debug(f"Created index {repr(index.name)}")
                 except OperationalError:
                     logger.debug(f"Failed to create index {repr(index.name)}")
+            # Index attaches itself to the table, so remove it to keep
+            # create_all from creating it again when a database is initialized
+            index.table.indexes.discard(index)
+        # The FTS table is dropped only when it is rebuilt. An existing table
+        # is rebuilt even if fts is False because it goes stale when the names
+        # table changes.
+        if create and (fts or self.has_fts):
+            self.index_names_fts(create=True, drop=True)
+
+    def index_names_fts(self, create=True, drop=True):
+        """Builds or rebuilds the FTS5 trigram index on self.names.st_name
+
+        The FTS5 table uses self.names as an external content table, so it
+        stores only the index, not a second copy of the names. It is not
+        updated when self.names changes and must be rebuilt after edits.
+        """
+        session = self.session
+        table = self.fts_table
+        if drop:
+            session.execute(text(f"DROP TABLE IF EXISTS {table}"))
+            logger.debug(f"Dropped FTS table {repr(table)}")
+        if create:
+            try:
+                session.execute(
+                    text(
+                        f"CREATE VIRTUAL TABLE {table} USING fts5("
+                        f"st_name, content='{self.names.__tablename__}',"
+                        f" content_rowid='id', tokenize='trigram')"
+                    )
+                )
+                session.execute(text(f"INSERT INTO {table}({table}) VALUES('rebuild')"))
+                logger.debug(f"Created FTS table {repr(table)}")
+            except OperationalError:
+                # Trigram tokenizer requires SQLite 3.34 or later
+                session.rollback()
+                logger.warning(f"Failed to create FTS table {repr(table)}")
+        session.commit()
+        session.close()
+        self._has_fts = None
 
     def create_indexes(self):
         """Helper method to create indexes on the names table"""
@@ -561,6 +1003,7 @@ class GeoNamesFeatures:
             except KeyError:
                 pass
         session.commit()
+        self.clear_api_records([geoname_id])
         return session.query(self.features).filter_by(geoname_id=geoname_id).first()
 
     def to_csv(self, fp, records=None, terms=None):
@@ -691,6 +1134,33 @@ def to_geonames_api(result):
         return rowdict
 
 
+def _init_loader(features):
+    """Prepares a forked process to map rows from a dump file"""
+    global _loader
+    reset_connections()
+    _loader = features
+
+
+def _load_worker(keys, rows):
+    """Maps a chunk of rows from a dump file in a worker process"""
+    return _loader.map_rows(keys, rows)
+
+
+def _map_chunks(executor, keys, chunks, max_pending):
+    """Maps chunks in a process pool, yielding results in order
+
+    The number of chunks submitted but not yet returned is limited to
+    max_pending so the dump file is not read into memory all at once.
+    """
+    pending = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(_load_worker, keys, chunk))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
 @cache
 def _get_continent_name_to_code():
     # Canonical values
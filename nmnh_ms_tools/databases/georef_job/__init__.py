@@ -1,4 +1,5 @@
 """Stores results of parsing and matching operations from a georeference"""
 
+from .checkpoints import CheckpointStore
 from .database import *
 from .helpers import use_observed_uncertainties
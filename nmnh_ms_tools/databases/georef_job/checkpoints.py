@@ -0,0 +1,224 @@
+"""Defines a persistent store for results from a georeferencing job"""
+
+import json
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+
+from .database import Checkpoints, Session
+from ..helpers import iter_keyset
+from ...records import RecordEncoder
+
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """Stores results from a georeferencing job in the job database
+
+    Results are keyed by the site hash from Georeferencer.keyer and are
+    written to the database in batches, so an interrupted job can be resumed
+    by reusing the results already stored for each site. Results are read
+    from the database as needed instead of being loaded into memory.
+
+    Parameters
+    ----------
+    max_pending : int
+        number of results to hold in memory before writing them to the
+        database
+    """
+
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self.pending = {}
+        self._session = None
+        self._count = None
+
+    def __getitem__(self, key):
+        try:
+            return self.pending[key]
+        except KeyError:
+            pass
+        row = self.session.query(Checkpoints.result).filter_by(key=key).first()
+        if row is None:
+            raise KeyError(f"{repr(key)} not found")
+        return json.loads(row.result)
+
+    def __setitem__(self, key, result):
+        # New pending keys are counted immediately. Keys that turn out to be
+        # stored already are subtracted from the count when they are written.
+        if key not in self.pending and self._count is not None:
+            self._count += 1
+        self.pending[key] = result
+        if len(self.pending) >= self.max_pending:
+            self.flush()
+
+    def __delitem__(self, key):
+        pending = self.pending.pop(key, None)
+        deleted = self.session.query(Checkpoints).filter_by(key=key).delete()
+        self.session.commit()
+        if pending is None and not deleted:
+            raise KeyError(f"{repr(key)} not found")
+        # Pending keys are always counted, including ones that are stored
+        if self._count is not None:
+            self._count -= (pending is not None) + deleted
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        self.flush()
+        for row in iter_keyset(self.session.query(Checkpoints.key), Checkpoints.key):
+            yield row.key
+
+    def __len__(self):
+        if self._count is None:
+            self.flush()
+            self._count = self.session.query(func.count(Checkpoints.key)).scalar()
+        return self._count
+
+    @property
+    def session(self):
+        # The session is created when first used so that the job database can
+        # be initialized after the store is created
+        if self._session is None:
+            self._session = Session()
+        return self._session
+
+    def get(self, key, default=None):
+        """Gets the result for a key, returning default if not found"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def update(self, *args, **kwargs):
+        """Adds results from a dict"""
+        for key, result in dict(*args, **kwargs).items():
+            self[key] = result
+
+    def keys(self):
+        """Iterates through the keys in the store"""
+        return iter(self)
+
+    def values(self):
+        """Iterates through the results in the store"""
+        self.flush()
+        query = self.session.query(Checkpoints.key, Checkpoints.result)
+        for row in iter_keyset(query, Checkpoints.key):
+            yield json.loads(row.result)
+
+    def status(self, key=None, location_id=None):
+        """Gets the status of a stored result
+
+        Parameters
+        ----------
+        key : str
+            site hash from Georeferencer.keyer
+        location_id : str
+            location_id of the record that produced the result
+
+        Returns
+        -------
+        str
+            status of the result (for example, success or failed) or None
+            if no result is stored
+        """
+        if location_id is not None:
+            self.flush()
+            query = self.session.query(Checkpoints.status)
+            row = query.filter_by(location_id=str(location_id)).first()
+            return row.status if row is not None else None
+        result = self.get(key)
+        return result["result"] if result is not None else None
+
+    def counts(self):
+        """Counts stored results by status
+
+        Returns
+        -------
+        dict
+            counts as status: count
+        """
+        self.flush()
+        query = self.session.query(Checkpoints.status, func.count(Checkpoints.key))
+        return dict(query.group_by(Checkpoints.status).all())
+
+    def flush(self):
+        """Writes pending results to the database in one transaction"""
+        if self.pending:
+            logger.debug(f"Writing {len(self.pending):,} checkpoints")
+            rows = [
+                {
+                    "key": key,
+                    "location_id": str(result.get("location_id")),
+                    "status": result.get("result"),
+                    "result": json.dumps(result, cls=RecordEncoder),
+                }
+                for key, result in self.pending.items()
+            ]
+            if self._count is not None:
+                self._count -= self._count_stored(self.pending)
+            stmt = insert(Checkpoints)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Checkpoints.key],
+                set_={
+                    "location_id": stmt.excluded.location_id,
+                    "status": stmt.excluded.status,
+                    "result": stmt.excluded.result,
+                },
+            )
+            self.session.execute(stmt, rows)
+            self.session.commit()
+            self.pending = {}
+
+    def _count_stored(self, keys, size=500):
+        """Counts the given keys that are already in the database"""
+        keys = list(keys)
+        count = 0
+        for i in range(0, len(keys), size):
+            query = self.session.query(func.count(Checkpoints.key))
+            query = query.filter(Checkpoints.key.in_(keys[i : i + size]))
+            count += query.scalar()
+        return count
+
+    def compact(self, drop_failed=False):
+        """Removes unused space from the job database
+
+        Parameters
+        ----------
+        drop_failed : bool
+            whether to remove failed results so they are retried when the
+            job is resumed
+        """
+        self.flush()
+        if drop_failed:
+            self.session.query(Checkpoints).filter_by(status="failed").delete()
+            self.session.commit()
+            self._count = None
+        # VACUUM cannot run inside a transaction
+        with self.session.get_bind().connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.exec_driver_sql("VACUUM")
+
+    def reopen(self):
+        """Discards the current session and any pending results
+
+        Used in forked processes, which must not share a session with the
+        parent process.
+        """
+        self._session = None
+        self.pending = {}
+        self._count = None
+
+    def close(self):
+        """Writes pending results and closes the database session"""
+        self.flush()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
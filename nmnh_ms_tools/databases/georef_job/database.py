@@ -53,6 +53,16 @@ class Localities(Base):
     has_poly = Column(Integer)
 
 
+class Checkpoints(Base):
+    """Stores the result of georeferencing each distinct site in a job"""
+
+    __tablename__ = "checkpoints"
+    key = Column(String, primary_key=True)
+    location_id = Column(String, index=True)
+    status = Column(String, index=True)
+    result = Column(String)
+
+
 def init_db(fp=None, tables=None, **kwargs):
     """Creates the database based on the given path"""
     global Base
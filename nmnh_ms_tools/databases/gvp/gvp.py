@@ -8,7 +8,14 @@ import numpy as np
 import pandas as pd
 
 from ...config import CONFIG, DATA_DIR
-from ...utils import LazyAttr, as_list
+from ...utils import LazyAttr, as_list, get_dists_km
+
+
+_KINDS = {
+    "feature": "GVPSUB",
+    "province": "GVPPROV",
+    "volcano": "GVPVLC",
+}
 
 
 class GVPVolcanoes:
@@ -17,6 +24,9 @@ class GVPVolcanoes:
     # Deferred class attributes are defined at the end of the file
     df = None
 
+    def __init__(self):
+        self._locality_cache = {}
+
     @cached_property
     def localities(self):
         localities = []
@@ -26,6 +36,30 @@ class GVPVolcanoes:
                     localities.extend(re.split(r"\s*\|\s+", val))
         return set(localities)
 
+    @cached_property
+    def terms(self) -> dict[str, np.ndarray]:
+        """Maps standardized names, synonyms, and numbers to rows in df"""
+        return self.df.groupby("index", sort=False).indices
+
+    @cached_property
+    def tokens(self) -> dict[str, np.ndarray]:
+        """Maps standardized words in names and synonyms to rows in df"""
+        tokens = {}
+        for i, term in enumerate(self.df["term"]):
+            for token in set(_tokenize(term)):
+                tokens.setdefault(token, []).append(i)
+        return {k: np.array(v) for k, v in tokens.items()}
+
+    @cached_property
+    def coords(self) -> tuple[np.ndarray, np.ndarray]:
+        """Gets the rows in df for each feature and their positions as unit vectors"""
+        cols = [c for c in self.df.columns if c not in {"index", "term"}]
+        rows = np.flatnonzero(~self.df.duplicated(subset=cols).values)
+        lats = pd.to_numeric(self.df["verbatim_latitude"].iloc[rows], errors="coerce")
+        lons = pd.to_numeric(self.df["verbatim_longitude"].iloc[rows], errors="coerce")
+        mask = (lats.notna() & lons.notna()).values
+        return rows[mask], _to_xyz(lats.values[mask], lons.values[mask])
+
     def find(
         self, term: str = None, kind: str = None, locality: str | list[str] = None
     ) -> pd.DataFrame:
@@ -45,35 +79,83 @@ class GVPVolcanoes:
         pd.DataFrame
             Dataframe with matching records
         """
-        matches = self.df
-
+        rows = None
         if term:
             term = _index_term(term)
             # Restrict searchs on volcano numbers to volcanoes
             if kind is None and term.isnumeric():
                 kind = "volcano"
-            matches = matches[matches["index"] == term]
+            rows = self.terms.get(term, np.array([], dtype=int))
+        return self._select(rows, kind=kind, locality=locality)
 
-        if locality is not None:
-            cond = None
-            for loc in as_list(locality):
-                if loc not in self.localities:
-                    raise ValueError(f"Unrecognzied locality: {repr(loc)}")
-                for key in ("country", "ocean"):
-                    if cond is None:
-                        cond = matches[key].str.contains(rf"\b{loc}\b")
-                    else:
-                        cond |= matches[key].str.contains(rf"\b{loc}\b")
-            matches = matches[cond]
+    def search(
+        self, text: str, kind: str = None, locality: str | list[str] = None
+    ) -> pd.DataFrame:
+        """Finds features with a name or synonym that includes every word in text
+
+        Parameters
+        ----------
+        text : str
+            one or more words from the name of a volcano or volcanic feature
+        kind : str, optional
+            the type of feature. One of 'volcano', 'feature', or 'province'.
+        locality : str | list[str], optional
+            the name of a country or ocean
+
+        returns
+        -------
+        pd.DataFrame
+            Dataframe with matching records
+        """
+        rows = None
+        for token in _tokenize(text):
+            matches = self.tokens.get(token, np.array([], dtype=int))
+            rows = matches if rows is None else np.intersect1d(rows, matches)
+        if rows is None:
+            rows = np.array([], dtype=int)
+        return self._select(rows, kind=kind, locality=locality)
+
+    def nearest(
+        self, lat: float, lon: float, num: int = 1, kind: str = "volcano"
+    ) -> pd.DataFrame:
+        """Finds the features closest to a point
+
+        Parameters
+        ----------
+        lat : float
+            the latitude of the point
+        lon : float
+            the longitude of the point
+        num : int, optional
+            the number of features to return
+        kind : str, optional
+            the type of feature. One of 'volcano', 'feature', or 'province'.
+
+        returns
+        -------
+        pd.DataFrame
+            Dataframe with matching records sorted by distance and a
+            dist_km column giving the distance to each from the point
+        """
+        rows, xyz = self.coords
         if kind is not None:
-            kind = {
-                "feature": "GVPSUB",
-                "province": "GVPPROV",
-                "volcano": "GVPVLC",
-            }[kind]
-            matches = matches[matches["site_kind"] == kind]
-        del matches["index"]
-        return matches.drop_duplicates()
+            mask = (self.df["site_kind"].values[rows] == _KINDS[kind]).nonzero()[0]
+            rows, xyz = rows[mask], xyz[mask]
+        # Straight-line distances between unit vectors sort the same way as
+        # great-circle distances, so only the nearest are measured on the
+        # ellipsoid
+        chords = ((xyz - _to_xyz(lat, lon)) ** 2).sum(axis=1)
+        num = min(num, len(rows))
+        nearest = np.argpartition(chords, num - 1)[:num] if num else rows[:0]
+        nearest = nearest[np.argsort(chords[nearest])]
+        matches = self.df.iloc[rows[nearest]].drop(columns=["index", "term"])
+        dists_km = get_dists_km(
+            lat,
+            lon,
+            matches["verbatim_latitude"].astype(float).values,
+            matches["verbatim_longitude"].astype(float).values,
+        )
+        return matches.assign(dist_km=dists_km)
 
     def find_volcano(
         self, term: str = None, locality: str | list[str] = None
@@ -93,6 +175,11 @@ class GVPVolcanoes:
             series with volcano data in GeoNames format
         """
         matches = self.find(term, locality=locality)
+        # Features are sometimes listed as synonyms of their volcano
+        volcanoes = matches[matches["site_kind"] == "GVPVLC"]
+        if len(volcanoes) == 1:
+            if set(matches["site_num"]) == {volcanoes.iloc[0].site_num}:
+                matches = volcanoes
         if len(matches) == 1:
             match = matches.iloc[0]
             # If the match isn't a volcano, use the volcano number to get it
@@ -103,6 +190,41 @@ class GVPVolcanoes:
             f"Could not find exactly one volcano matching {repr(term)} (locality={repr(locality)})"
         )
 
+    def _select(
+        self,
+        rows: np.ndarray = None,
+        kind: str = None,
+        locality: str | list[str] = None,
+    ) -> pd.DataFrame:
+        """Filters rows in df by kind and locality"""
+        if locality is not None:
+            locs = []
+            for loc in as_list(locality):
+                if loc not in self.localities:
+                    raise ValueError(f"Unrecognzied locality: {repr(loc)}")
+                locs.append(self._locality_rows(loc))
+            locs = np.unique(np.concatenate(locs))
+            rows = locs if rows is None else np.intersect1d(rows, locs)
+        matches = self.df if rows is None else self.df.iloc[rows]
+        if kind is not None:
+            matches = matches[matches["site_kind"] == _KINDS[kind]]
+        return matches.drop(columns=["index", "term"]).drop_duplicates()
+
+    def _locality_rows(self, loc: str) -> np.ndarray:
+        """Gets the rows in df that mention a country or ocean"""
+        try:
+            return self._locality_cache[loc]
+        except KeyError:
+            cond = None
+            for key in ("country", "ocean"):
+                if cond is None:
+                    cond = self.df[key].str.contains(rf"\b{loc}\b")
+                else:
+                    cond |= self.df[key].str.contains(rf"\b{loc}\b")
+            rows = np.flatnonzero(cond.values)
+            self._locality_cache[loc] = rows
+            return rows
+
 
 def _index_term(name: str) -> str:
     """Standardizes term for serarch"""
@@ -118,26 +240,39 @@ def _index_term(name: str) -> str:
     return name
 
 
+def _tokenize(name: str) -> list[str]:
+    """Splits a name into standardized words for search"""
+    tokens = (_index_term(w) for w in re.split(r"[\s,/-]+", str(name)))
+    return [t for t in tokens if t]
+
+
+def _to_xyz(lats, lons) -> np.ndarray:
+    """Converts coordinates to unit vectors"""
+    lats = np.radians(lats)
+    lons = np.radians(lons)
+    return np.stack(
+        [np.cos(lats) * np.cos(lons), np.cos(lats) * np.sin(lons), np.sin(lats)],
+        axis=-1,
+    )
+
+
 def _read_dataframe():
     """Reads the dataframe with GVP volcano data"""
     path = Path(DATA_DIR) / "gazetteers" / "global_volcanism_program_volcanoes.csv"
     df = pd.read_csv(path, dtype=str, comment="#")
-    rows = []
-    for _, row in df.iterrows():
-        vals = [row["site_names"]]
-        if row["site_kind"] == "GVPVLC":
-            vals.append(row["site_num"])
-        if not pd.isna(row["synonyms"]):
-            vals.extend(re.split(r"\s+\|\s+,", row["synonyms"]))
-            row["synonyms"] = np.nan
-        for val in vals:
-            if val and not pd.isna(val):
-                row_ = row.to_dict()
-                row_["index"] = val
-                rows.append(row_)
-    df = pd.DataFrame(rows)
-    df["index"] = df["index"].apply(_index_term)
-    df = df.fillna("")
+    # Index each feature by name, by number for volcanoes, and by synonym
+    terms = pd.concat(
+        [
+            df["site_names"],
+            df["site_num"].where(df["site_kind"] == "GVPVLC"),
+            df["synonyms"].str.split(r"\s*\|\s*").explode(),
+        ]
+    )
+    terms = terms[terms.notna() & (terms != "")].sort_index(kind="stable")
+    df = df.assign(synonyms=np.nan).loc[terms.index]
+    df["term"] = terms.values
+    df["index"] = df["term"].map({t: _index_term(t) for t in terms.unique()})
+    df = df.fillna("").reset_index(drop=True)
     return df
 
 
@@ -3,20 +3,47 @@
 import datetime as dt
 import logging
 import os
+import sqlite3
+from contextlib import contextmanager
+from functools import partial
 
 import pandas as pd
 import shapely
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import DeferredReflection
 from sqlalchemy.pool import NullPool
 
+from ..config import CONFIG
+
 
 logger = logging.getLogger(__name__)
 _sessions = []
+_profiles = {}
+
 
+def init_helper(
+    fp, base, session, deferred=False, tables=None, poolclass=None, profile=None
+):
+    """Creates the database based on the given path
 
-def init_helper(fp, base, session, deferred=False, tables=None, poolclass=None):
-    """Creates the database based on the given path"""
+    Parameters
+    ----------
+    fp : str
+        path to the SQLite database
+    base : sqlalchemy.orm.DeclarativeBase
+        declarative base for the tables in the database
+    session : sqlalchemy.orm.sessionmaker
+        sessionmaker to bind to the new engine
+    deferred : bool
+        whether to reflect tables from the database
+    tables : list
+        tables to create. If omitted, creates all tables in base.
+    poolclass : sqlalchemy.pool.Pool
+        connection pool class used by the engine
+    profile : str | dict
+        name of a profile from the databases section of the config file or a
+        dict of pragmas. Defaults to the profile given in the config file.
+    """
     global _sessions
     try:
         if fp == ":memory":
@@ -30,6 +57,7 @@ def init_helper(fp, base, session, deferred=False, tables=None, poolclass=None):
                 poolclass=poolclass,
             )
             os.chdir(cwd)
+        set_engine_profile(engine, profile)
         if deferred:
             DeferredReflection.prepare(engine)
         base.metadata.create_all(bind=engine, tables=tables)
@@ -39,6 +67,171 @@ def init_helper(fp, base, session, deferred=False, tables=None, poolclass=None):
         raise RuntimeError(f"Could not load {fp}") from e
 
 
+def get_engine_profile(profile=None):
+    """Gets the pragmas used to tune SQLite connections for a profile
+
+    Parameters
+    ----------
+    profile : str | dict
+        name of a profile from the databases section of the config file or a
+        dict of pragmas. Defaults to the profile given in the config file.
+
+    Returns
+    -------
+    dict
+        pragmas as name: value
+    """
+    if isinstance(profile, dict):
+        return profile.copy()
+    try:
+        config = CONFIG["databases"]
+    except KeyError:
+        config = {}
+    if profile is None:
+        profile = config.get("profile")
+        if profile is None:
+            return {}
+    try:
+        pragmas = config["profiles"][profile]
+    except KeyError:
+        raise ValueError(f"Unknown database profile: {repr(profile)}")
+    return dict(pragmas) if pragmas else {}
+
+
+def set_engine_profile(engine, profile=None):
+    """Applies a profile to new connections made by an engine
+
+    Pragmas are set when each connection is opened, so connections already
+    in the pool are discarded. Sessions using the engine should be closed
+    before calling this function.
+
+    Parameters
+    ----------
+    engine : sqlalchemy.engine.Engine
+        engine for a SQLite database
+    profile : str | dict
+        name of a profile from the databases section of the config file or a
+        dict of pragmas. Defaults to the profile given in the config file.
+
+    Returns
+    -------
+    dict
+        pragmas previously applied to the engine
+    """
+    previous = _profiles.get(engine)
+    if previous is not None:
+        event.remove(engine, "connect", previous)
+    pragmas = get_engine_profile(profile)
+    listener = partial(_set_pragmas, pragmas)
+    event.listen(engine, "connect", listener)
+    _profiles[engine] = listener
+    engine.dispose()
+    return previous.args[0] if previous is not None else {}
+
+
+@contextmanager
+def engine_profile(engine, profile):
+    """Temporarily applies a profile to new connections made by an engine
+
+    Parameters
+    ----------
+    engine : sqlalchemy.engine.Engine
+        engine for a SQLite database
+    profile : str | dict
+        name of a profile from the databases section of the config file or a
+        dict of pragmas
+    """
+    if engine.url.database in (None, "", ":memory:"):
+        # Pragmas on in-memory databases are lost when the pool is disposed
+        yield
+        return
+    previous = set_engine_profile(engine, profile)
+    try:
+        yield
+    finally:
+        set_engine_profile(engine, previous)
+
+
+def _set_pragmas(pragmas, dbapi_connection, connection_record):
+    """Sets pragmas on a new SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    for key, val in pragmas.items():
+        try:
+            cursor.execute(f"PRAGMA {key} = {val}")
+        except sqlite3.DatabaseError as exc:
+            # Some pragmas, like journal_mode=wal, fail on read-only files
+            logger.debug(f"Could not set PRAGMA {key} = {val}: {exc}")
+    cursor.close()
+
+
+def reset_connections(readonly=None):
+    """Discards SQLite connections inherited from a parent process
+
+    Connections must not be shared across processes, so this should be called
+    at the start of each forked worker. Inherited connections are released
+    without being closed so that the parent process can keep using them.
+    In-memory databases exist only in the inherited connection and are left
+    alone.
+
+    Parameters
+    ----------
+    readonly : list of sessionmaker
+        sessions whose new connections should be opened as read-only
+    """
+    readonly = {id(s) for s in readonly} if readonly else set()
+    engines = {}
+    for session in _sessions:
+        engine = session.kw.get("bind")
+        if engine is not None and engine.url.database not in (None, "", ":memory:"):
+            engines.setdefault(id(engine), [engine, False])
+            if id(session) in readonly:
+                engines[id(engine)][1] = True
+    for engine, query_only in engines.values():
+        if query_only and not event.contains(engine, "connect", _set_query_only):
+            event.listen(engine, "connect", _set_query_only)
+        engine.dispose(close=False)
+
+
+def _set_query_only(dbapi_connection, connection_record):
+    """Prevents changes to the database over a connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+
+
+def iter_keyset(query, column, batch_size=10000):
+    """Iterates through the rows returned by a query in batches
+
+    Each batch resumes after the last value of column from the previous
+    batch instead of using OFFSET, which requires SQLite to scan every row
+    that it skips. The time needed to read each batch therefore does not
+    depend on its position in the table.
+
+    Parameters
+    ----------
+    query : sqlalchemy.orm.Query
+        an unordered query
+    column : sqlalchemy.orm.InstrumentedAttribute
+        a unique, indexed column returned by the query, usually the primary key
+    batch_size : int
+        number of rows to read per batch
+
+    Yields
+    ------
+    row
+        rows returned by the query sorted by column
+    """
+    query = query.order_by(column)
+    last = None
+    while True:
+        batch = query if last is None else query.filter(column > last)
+        rows = batch.limit(batch_size).all()
+        if not rows:
+            return
+        last = getattr(rows[-1], column.key)
+        yield from rows
+
+
 def time_query(query):
     compiled = query.statement.compile(compile_kwargs={"literal_binds": True})
     start_time = dt.datetime.now()
@@ -14,6 +14,7 @@ from xmu import EMuRecord
 from .core import Record
 from ..bots.geonames import CODES_MARINE, GeoNamesBot
 from ..databases.admin import AdminFeatures
+from ..databases.admin_polygons import AdminIndex
 from ..databases.cache import CacheDict
 from ..databases.geonames import GeoNamesFeatures
 from ..databases.geohelper import get_alt_geometry
@@ -30,6 +31,7 @@ from ..utils import (
     LocStandardizer,
     as_list,
     as_str,
+    clock_stage,
     combine,
     dedupe,
     del_immutable,
@@ -248,6 +250,7 @@ class Site(Record):
     std = None
 
     # Normal class attributes
+    admin_index = None
     cache = {}
     config = CONFIG
     pipe = None
@@ -490,6 +493,7 @@ class Site(Record):
         if self.geometry and not self.geometry.is_valid:
             raise ValueError(f"GeoMetry invalid: {self.geometry}")
 
+    @clock_stage("parse_locality")
     def parse_locality(self, val):
         """Parses a locality string"""
         # If attribute given, convert to value
@@ -592,6 +596,7 @@ class Site(Record):
                 self.continent_code = self.adm.get_continent_code(self.continent)
         return self
 
+    @clock_stage("map_admin")
     def map_admin(self):
         # Check cache for polygons
         adm_fields = ["continent", "country", "state_province", "county"]
@@ -602,10 +607,13 @@ class Site(Record):
 
         vkey = json.dumps(vals)
         try:
-            gdf, result, interpreted = self.admin_cache[vkey]
+            cached = self.admin_cache[vkey]
         except KeyError:
-            pass
-        else:
+            cached = self._read_admin_index(vkey)
+            if cached is not None:
+                self.admin_cache[vkey] = cached
+        if cached is not None:
+            gdf, result, interpreted = cached
             with mutable(self):
                 for key, val in result.items():
                     setattr(self, key, val if isinstance(val, str) else val.copy())
@@ -734,6 +742,10 @@ class Site(Record):
         key = json.dumps([getattr(self, a) for a in adm_fields])
         self.admin_cache[key] = (gdf, result, interpreted)
         self.admin_cache[vkey] = self.admin_cache[key]
+        if self.admin_index is not None:
+            self.admin_index.save(
+                dedupe([key, vkey]), gdf, result, val_to_id, id_to_field
+            )
 
         return gdf.copy()
 
@@ -859,7 +871,7 @@ class Site(Record):
         # Only use intersections for non-point geometries
         if self.geom_type != "Point" and other.geom_type != "Point":
             xtn = self.intersection(other)
-            if xtn.geom[0].is_empty:
+            if xtn.shape.is_empty:
                 raise ValueError(f"Could not restrict {self} to {other}")
             site = self.copy()
             with mutable(site):
@@ -1080,6 +1092,26 @@ class Site(Record):
         """Enables persistent caching of locality parsing"""
         Site.cache = LocalityCache(path)
 
+    @staticmethod
+    def enable_admin_index(path=None):
+        """Enables lookups of precomputed admin polygons in map_admin"""
+        Site.admin_index = AdminIndex(path)
+
+    def _read_admin_index(self, key):
+        """Reads admin polygons and names from the precomputed index"""
+        if self.admin_index is None:
+            return None
+        try:
+            gdf, result, val_to_id = self.admin_index[key]
+        except KeyError:
+            return None
+        sites = {}
+        for rec in GeoNamesFeatures().get_many(list(set(val_to_id.values()))):
+            site = Site(rec)
+            sites[site.location_id] = site
+        interpreted = {k: sites[v] for k, v in val_to_id.items()}
+        return gdf, result, interpreted
+
     def _build_geometry(self, geom, **kwargs):
         # if not hasattr(geom, "crs") or not geom.crs:
         #    kwargs.setdefault(
@@ -5,6 +5,7 @@ import json
 from ....databases.cache import CacheDict
 from ....tools.geographic_names.parsers.between import BetweenParser
 from ....tools.geographic_names.parsers.border import BorderParser
+from ....tools.geographic_names.parsers.core import Parser
 from ....tools.geographic_names.parsers.direction import DirectionParser
 from ....tools.geographic_names.parsers.feature import FeatureParser
 from ....tools.geographic_names.parsers.modified import ModifiedParser
@@ -35,17 +36,34 @@ class LocalityCache(CacheDict):
 
     @staticmethod
     def writer(vals):
-        """Stores features as verbatim plus parser and includes leftovers"""
+        """Stores parsed features and leftovers
+
+        Features are stored as serialized objects so they can be restored
+        without parsing. Features that cannot be serialized are stored as the
+        parser name plus verbatim instead.
+        """
         if not vals[0]:
             return None
         features, leftover = vals
-        features = [(f.__class__.__name__, f.verbatim) for f in features]
-        return json.dumps([features, leftover])
+        serialized = []
+        for feature in features:
+            try:
+                serialized.append(feature.to_dict())
+            except ValueError:
+                serialized.append((feature.__class__.__name__, feature.verbatim))
+        return json.dumps([serialized, leftover])
 
     @staticmethod
     def reader(row):
-        """Reinflates verbatim values using the named parser"""
+        """Restores serialized features or reparses verbatim values"""
         if row.val is None:
             return [], row.key
         features, leftover = json.loads(row.val)
-        return [PARSERS[parser](verb) for parser, verb in features], leftover
+        restored = []
+        for feature in features:
+            if isinstance(feature, dict):
+                restored.append(Parser.from_dict(feature))
+            else:
+                parser, verbatim = feature
+                restored.append(PARSERS[parser](verbatim))
+        return restored, leftover
@@ -1,29 +1,90 @@
 """Defines class for caching results from GeoNames matching"""
 
 import json
+import struct
+import zlib
+from collections import OrderedDict
 
-from ....databases.cache import CacheDict
+from ....databases.cache import Cache, CacheDict
 from ....databases.geonames import GeoNamesFeatures
-from ....utils import LazyAttr
+from ....tools.geographic_operations.geometry import GeoMetry
+from ....utils import LazyAttr, mutable
+
+
+# Version of the format used to store fully built sites. Blobs written using
+# a different version are treated as missing.
+_FORMAT_VERSION = 2
+
+# Site attributes set by Site.map_admin
+_ADMIN_ATTRS = (
+    "continent",
+    "continent_code",
+    "country",
+    "country_code",
+    "state_province",
+    "admin_div_1",
+    "admin_code_1",
+    "county",
+    "admin_div_2",
+    "admin_code_2",
+)
 
 
 class RecordCache(CacheDict):
-    """Caches list of sites matching a query"""
+    """Caches list of sites matching a query
+
+    By default, sites are stored as location_ids and filters and are rebuilt
+    from the GeoNames database when read. If full is True, each site is
+    stored as compressed binary data containing its GeoNames record, filter,
+    admin names and codes, and geometry as WKB, so it can be restored without
+    querying the GeoNames database or mapping admin divisions. Both formats
+    can be read regardless of the mode. Binary data that cannot be read, for
+    example because it was written by an older version, is treated as a
+    miss and removed from the cache.
+
+    Parameters
+    ----------
+    path : str
+        path to the cache database
+    full : bool
+        whether to store fully built sites
+    """
 
     # Deferred class attributes are defined at the end of the file
     local = None
 
-    def __init__(self, path=None):
+    def __init__(self, path=None, full=False):
         super().__init__()
+        self.full = full
         if path is not None:
             self.init_db(path)
 
-    @staticmethod
-    def writer(vals):
-        """Stores sites as lists of integers and filters"""
+    def __getitem__(self, key):
+        try:
+            return super().__getitem__(key)
+        except _UnreadableSites:
+            # Existing rows are never overwritten, so remove the unreadable
+            # row to allow the sites to be cached again
+            key = self.keyer(key)
+            with self._lock:
+                self.pending.pop(key, None)
+                self.session.query(Cache).filter_by(key=key).delete()
+                self.session.commit()
+            raise KeyError(f"{repr(key)} not found")
+
+    def writer(self, vals):
+        """Stores sites as lists of integers and filters or as binary data"""
         if not vals:
             return None
         assert isinstance(vals, list), "must be a list"
+        if self.full:
+            return self._write_sites(vals)
+        return self._write_ids(vals)
+
+    @staticmethod
+    def _write_ids(vals):
+        """Stores sites as lists of integers and filters"""
+        assert isinstance(vals, list), "must be a list"
         try:
             loc_ids = [int(r.location_id) for r in vals]
         except TypeError:
@@ -32,20 +93,132 @@ class RecordCache(CacheDict):
         return json.dumps([loc_ids, filters])
 
     @staticmethod
-    def reader(row):
-        """Reinflates sites from location_id"""
+    def _write_sites(vals):
+        """Stores sites as binary data
+
+        The data consists of a version byte followed by a compressed block
+        containing the length of a JSON header, the header, and the WKB for
+        each geometry. The header lists the GeoNames record, filter, admin
+        names and codes, and geometry metadata for each site.
+        """
+        header = []
+        geoms = []
+        for site in vals:
+            if not isinstance(site.verbatim, dict):
+                raise ValueError("site must be created from a GeoNames record")
+            rec = {
+                "api": site.verbatim,
+                "filter": site.filter,
+                "admin": {a: getattr(site, a) for a in _ADMIN_ATTRS},
+                "geometry": None,
+            }
+            if site.geometry is not None:
+                geom = site.geometry.wkb
+                rec["geometry"] = {
+                    "size": len(geom),
+                    "crs": site.geometry.crs.to_string(),
+                    "radius_km": site.geometry._radius_km,
+                }
+                geoms.append(geom)
+            header.append(rec)
+        header = json.dumps(header).encode("utf-8")
+        data = struct.pack("<I", len(header)) + header + b"".join(geoms)
+        return bytes([_FORMAT_VERSION]) + zlib.compress(data)
+
+    @staticmethod
+    def _read_sites(val):
+        """Rebuilds sites stored as binary data"""
+        from ....records import Site  # lazy load to avoid import conflict
+
+        if val[:1] != bytes([_FORMAT_VERSION]):
+            raise _UnreadableSites("Unsupported format")
+        try:
+            data = zlib.decompress(val[1:])
+            (size,) = struct.unpack_from("<I", data)
+            offset = 4 + size
+            sites = []
+            for rec in json.loads(data[4:offset]):
+                site = Site(rec["api"])
+                with mutable(site):
+                    for attr, value in rec["admin"].items():
+                        setattr(site, attr, value)
+                    geom = rec["geometry"]
+                    if geom is not None:
+                        end = offset + geom["size"]
+                        site.geometry = GeoMetry(
+                            data[offset:end],
+                            crs=geom["crs"],
+                            radius_km=geom["radius_km"],
+                        )
+                        offset = end
+                site.filter = rec["filter"]
+                sites.append(site)
+        except (KeyError, TypeError, ValueError, struct.error, zlib.error) as exc:
+            raise _UnreadableSites(str(exc)) from exc
+        return sites
+
+    @staticmethod
+    def reader(row, records=None):
+        """Reinflates sites from location_id
+
+        Parameters
+        ----------
+        row : Cache
+            row from the cache database
+        records : dict
+            GeoNames records keyed by location_id. Records for this row are
+            retrieved from the GeoNames database if not given.
+        """
         from ....records import Site  # lazy load to avoid import conflict
 
         if row.val is None:
             return []
+        # Fully built sites are stored as bytes
+        if isinstance(row.val, bytes):
+            sites = RecordCache._read_sites(row.val)
+            for site in sites:
+                site.from_cache = True
+            return sites
         loc_ids, fltrs = json.loads(row.val)
-        records = RecordCache.local.get_many(loc_ids)
-        sites = [Site(rec) for rec in records]
-        for site, fltr in zip(sites, fltrs):
+        if records is None:
+            records = RecordCache.local.get_batch(loc_ids)
+        sites = []
+        for loc_id, fltr in zip(loc_ids, fltrs):
+            try:
+                site = Site(records[loc_id])
+            except KeyError:
+                continue
             site.filter = fltr
             site.from_cache = True
+            sites.append(site)
         return sites
 
+    def fill_recent(self):
+        """Fills the recent dictionary with previously cached entries
+
+        Records for all cached entries are retrieved from the GeoNames
+        database at once instead of one entry at a time.
+        """
+        if self.session:
+            with self._lock:
+                self.flush()
+                rows = self.session.query(Cache).limit(self.max_recent).all()
+            loc_ids = set()
+            for row in rows:
+                if isinstance(row.val, str):
+                    loc_ids.update(json.loads(row.val)[0])
+            records = self.local.get_batch(loc_ids)
+            self.recent = OrderedDict()
+            for row in rows:
+                try:
+                    self.recent[row.key] = self.reader(row, records)
+                except _UnreadableSites:
+                    pass
+
+
+class _UnreadableSites(KeyError):
+    """Raised when fully built sites cannot be read from the cache"""
+
 
 # Define deferred class attributes
 LazyAttr(RecordCache, "local", GeoNamesFeatures)
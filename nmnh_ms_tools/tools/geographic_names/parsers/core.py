@@ -14,6 +14,12 @@ class Parser:
     attributes = ["kind", "verbatim", "unconsumed", "feature"]
     feature_parser = None
     cache = {}
+    _registry = {}
+    _defaults = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        Parser._registry[cls.__name__] = cls
 
     def __init__(self, val=None, **kwargs):
         self.verbatim = None  # original text passed to the parser
@@ -46,6 +52,66 @@ class Parser:
         """
         return iter([[self]])
 
+    def to_dict(self):
+        """Serializes the parsed object to a JSON-compatible dict
+
+        Only attributes that differ from those of an unparsed instance of the
+        same class are included.
+
+        Returns
+        -------
+        dict
+            the name of the parser class and the state of the object
+
+        Raises
+        ------
+        ValueError
+            if an attribute cannot be serialized
+        """
+        defaults = self._default_state()
+        state = {}
+        for key, val in vars(self).items():
+            if key in defaults and defaults[key] == val:
+                continue
+            state[key] = _encode(val)
+        return {"parser": self.__class__.__name__, "state": state}
+
+    @staticmethod
+    def from_dict(data):
+        """Restores a parsed object serialized using to_dict without parsing
+
+        Parameters
+        ----------
+        data : dict
+            the name of the parser class and the state of the object
+
+        Returns
+        -------
+        Parser
+            the restored object
+        """
+        cls = Parser._registry[data["parser"]]
+        try:
+            inst = cls()
+        except TypeError:
+            # Some parsers require arguments when created
+            inst = cls.__new__(cls)
+        inst.__dict__.update({k: _decode(v) for k, v in data["state"].items()})
+        return inst
+
+    @classmethod
+    def _default_state(cls):
+        """Gets the attributes of an unparsed instance of this class"""
+        try:
+            return Parser._defaults[cls]
+        except KeyError:
+            try:
+                defaults = vars(cls())
+            except TypeError:
+                defaults = {}
+            Parser._defaults[cls] = defaults
+            return defaults
+
     def variants(self):
         """Returns a list of possible interpretations for a given string"""
         return [str(self)]
@@ -110,3 +176,31 @@ class Parser:
                 return self
         # Raise error if not possible to expand the term
         raise ValueError(f"Could not expand {self.feature}")
+
+
+def _encode(val):
+    """Encodes an attribute of a parsed object as JSON-compatible data"""
+    if val is None or isinstance(val, (bool, int, float, str)):
+        return val
+    if isinstance(val, Parser):
+        return {"__parser__": val.to_dict()}
+    if isinstance(val, list):
+        return [_encode(v) for v in val]
+    if isinstance(val, tuple):
+        return {"__tuple__": [_encode(v) for v in val]}
+    if isinstance(val, dict) and all(isinstance(k, str) for k in val):
+        return {"__dict__": {k: _encode(v) for k, v in val.items()}}
+    raise ValueError(f"Cannot serialize {repr(val)}")
+
+
+def _decode(val):
+    """Decodes an attribute encoded using _encode"""
+    if isinstance(val, list):
+        return [_decode(v) for v in val]
+    if isinstance(val, dict):
+        if "__parser__" in val:
+            return Parser.from_dict(val["__parser__"])
+        if "__tuple__" in val:
+            return tuple(_decode(v) for v in val["__tuple__"])
+        return {k: _decode(v) for k, v in val["__dict__"].items()}
+    return val
@@ -1,3 +1,8 @@
 """Defines classes and functions for manipulating geographic data"""
 
-from .geometry import GeoMetry, geoms_to_geodataframe, geoms_to_geoseries
+from .geometry import (
+    GeoMetry,
+    geoms_to_geodataframe,
+    geoms_to_geoseries,
+    query_pairs,
+)
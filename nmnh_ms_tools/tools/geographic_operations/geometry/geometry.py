@@ -3,12 +3,15 @@
 import logging
 import re
 import warnings
-from functools import cached_property
+from collections import OrderedDict
+from functools import cached_property, lru_cache
 from math import isclose
 
 import geopandas as gpd
 import numpy as np
-from shapely import union_all, wkb, wkt, to_wkt, to_wkb
+import shapely
+from pyproj import CRS, Transformer
+from shapely import STRtree, union_all, wkb, wkt, to_wkt, to_wkb
 from shapely.affinity import translate
 from shapely.geometry.base import BaseGeometry
 from shapely.geometry import (
@@ -34,6 +37,7 @@ from ....utils import (
     del_immutable,
     draw_polygon,
     get_dist_km,
+    get_dists_km,
     mutable,
     parse_measurement,
     set_immutable,
@@ -48,6 +52,7 @@ from ....utils import (
 
 
 logger = logging.getLogger(__name__)
+_transformers = {}
 
 
 class GeoMetry:
@@ -64,6 +69,9 @@ class GeoMetry:
     equal_area_mask = "+proj=eck4 +lat_0={lat:.1f} +lon_0={lon:.1f} +x_0=0 +y_0=0 +datum=WGS84 +units=m +no_defs"
     equal_area_bounds = (-16921202.92, -8460500, 16921202.92, 8460500)
 
+    # Maximum number of reprojections kept by each geometry
+    max_reprojected = 4
+
     cached = (
         "x",
         "y",
@@ -87,9 +95,13 @@ class GeoMetry:
         "ellipse",
         "main",
         "polygon",
+        "prepared",
         "drawable",
+        "geoseries",
         "wkb",
         "wkt",
+        "cache_key",
+        "_reprojected",
     )
 
     def __init__(self, geom=None, crs=None, radius_km=0, validate=True):
@@ -101,7 +113,8 @@ class GeoMetry:
             self.parents = []
             self.modifer = None
 
-            self._geom = None
+            self._shape = None
+            self._crs = None
             self._radius_km = radius_km
             self._resized = {}
 
@@ -139,9 +152,13 @@ class GeoMetry:
                 if crs is None:
                     raise ValueError("Could not infer CRS")
 
-                # Parsed geometries are always saved as GeoSeries
-                self.verbatim_geom = gpd.GeoSeries(parsed, crs=crs)
-                self.geom = gpd.GeoSeries(parsed, crs=crs)
+                # Parsed geometries are stored as shapely objects. A GeoSeries is
+                # only created if requested using the geom attribute.
+                crs = _get_crs(crs)
+                self.verbatim_shape = parsed
+                self.verbatim_crs = crs
+                self._crs = crs
+                self.geom = parsed
 
     def __setattr__(self, attr, val):
         set_immutable(self, attr, val)
@@ -165,37 +182,55 @@ class GeoMetry:
 
     @property
     def geom(self):
-        return self._geom
+        """The geometry as a one-item GeoSeries"""
+        return self.geoseries
 
     @geom.setter
     def geom(self, geom):
 
-        if not isinstance(geom, gpd.GeoSeries):
-            raise TypeError(f"geom must be a GeoSeries ({repr(type(geom))} given)")
+        if isinstance(geom, gpd.GeoSeries):
+            shape = geom.iloc[0] if len(geom) else None
+            crs = _get_crs(geom.crs) if geom.crs is not None else self._crs
+        elif isinstance(geom, BaseGeometry):
+            shape = geom
+            crs = self._crs
+        else:
+            raise TypeError(
+                f"geom must be a GeoSeries or shapely geometry ({repr(type(geom))} given)"
+            )
 
-        if not geom.any():
+        if shape is None or shape.is_empty:
             raise ValueError(f"Passed geometry is empty: {geom}")
 
-        self._geom = geom
+        self._shape = shape
+        self._crs = crs
 
-        # Clear cached properties when geom changes
+        # Clear cached properties when geom changes. Cached properties are stored
+        # in the instance dict and are removed directly to avoid del_immutable.
         for attr in self.cached:
-            try:
-                delattr(self, attr)
-            except AttributeError:
-                pass
+            self.__dict__.pop(attr, None)
 
         # Validate the geoemtry once set
         if self.validate:
             self.validate_shape()
 
+    @property
+    def shape(self):
+        """The geometry as a shapely object"""
+        return self._shape
+
+    @property
+    def verbatim_geom(self):
+        """The verbatim geometry as a one-item GeoSeries"""
+        return gpd.GeoSeries([self.verbatim_shape], crs=self.verbatim_crs)
+
     @property
     def crs(self):
-        return self.geom.crs
+        return self._crs
 
     @property
     def geom_type(self):
-        return self.geom.geom_type[0]
+        return self._shape.geom_type
 
     @cached_property
     def x(self):
@@ -222,7 +257,7 @@ class GeoMetry:
         except NotImplementedError:
             logger.debug("Getting meridians from subgeoms")
             meridians = []
-            for geom in self.as_wgs84.geom.iloc[0].geoms:
+            for geom in self.as_wgs84.shape.geoms:
                 for x, _ in geom.exterior.coords:
                     meridians.append(int(x))
         return get_meridians(meridians)
@@ -239,12 +274,12 @@ class GeoMetry:
     def coords(self):
         if self.geom_type == "Polygon":
             logger.debug("Getting coords for Polygon")
-            return list(self.geom.iloc[0].exterior.coords)
+            return list(self.shape.exterior.coords)
         elif self.geom_type == "LineString":
             logger.debug("Getting coords for LineString")
-            return list(self.geom.iloc[0].coords)
+            return list(self.shape.coords)
         elif self.geom_type == "Point":
-            return [(self.geom.iloc[0].x, self.geom.iloc[0].y)]
+            return [(self.shape.x, self.shape.y)]
         logger.debug(f"Getting coords for {self.geom_type} (crs={self.crs})")
         return list(self.convex_hull.coords)
 
@@ -259,40 +294,41 @@ class GeoMetry:
             with mutable(geom):
                 geom._radius_km = 0
             return geom
-        return self.match(self.as_equal_area.geom.centroid)
+        geom = self.as_equal_area
+        return self.match(geom.shape.centroid, other_crs=geom.crs)
 
     @cached_property
     def convex_hull(self):
-        return self.match(self.as_equal_area.geom.convex_hull)
+        geom = self.as_equal_area
+        return self.match(geom.shape.convex_hull, other_crs=geom.crs)
 
     @cached_property
     def center(self):
-        logger.debug(f"Calculating the center of {_truncate(self.geom.iloc[0])}")
-        if self.geom.iloc[0].is_empty:
-            raise ValueError(
-                f"Cannot calculate center of empty shape: {self.geom.iloc[0]}"
-            )
+        logger.debug(f"Calculating the center of {_truncate(self.shape)}")
+        if self.shape.is_empty:
+            raise ValueError(f"Cannot calculate center of empty shape: {self.shape}")
         # Return point
         if self.geom_type == "Point":
-            return self.match(self.geom.iloc[0])
+            return self.match(self.shape, other_crs=self.crs)
         # Return centroid if polygon does not cross the dateline
-        geom = self.geom.to_crs(4326)
-        x1, y1, x2, y2 = geom.total_bounds
+        geom = transform_shape(self.shape, self.crs, 4326)
+        x1, y1, x2, y2 = geom.bounds
         lat = 0  # (y1 + y2) / 2
         lon = get_meridian([(x1 + x2) / 2])
         # Return centroid if polygon does not cross the dateline
         if abs(x1 - x2) < 180:
             proj_string = self.equal_area_mask.format(lat=lat, lon=lon)
-            centroid = geom.to_crs(proj_string).centroid
-            return self.match(centroid)
+            centroid = transform_shape(geom, 4326, proj_string).centroid
+            return self.match(centroid, other_crs=_get_crs(proj_string))
         # Reproject until polygon is in one piece
         for lon in range(-180, 180, 60):
-            reproj = geom.to_crs(self.lat_lon_mask.format(lat=lat, lon=lon))
-            x1_, _, x2_, _ = reproj.total_bounds
+            lat_lon = self.lat_lon_mask.format(lat=lat, lon=lon)
+            reproj = transform_shape(geom, 4326, lat_lon)
+            x1_, _, x2_, _ = reproj.bounds
             if abs(x1_ - x2_) < 180:
                 proj_string = self.equal_area_mask.format(lat=lat, lon=lon)
-                centroid = reproj.to_crs(proj_string).centroid
-                return self.match(centroid)
+                centroid = transform_shape(reproj, lat_lon, proj_string).centroid
+                return self.match(centroid, other_crs=_get_crs(proj_string))
         # Assign center=0 for features that span the full range of longitude
         # that can't otherwise be mapped to a coherent polygon
         maxx = max((x1, x2))
@@ -308,19 +344,19 @@ class GeoMetry:
 
     @cached_property
     def area(self):
-        logger.debug(f"Calculating the area of {_truncate(self.geom)}")
-        return self.as_equal_area.polygon.geom.iloc[0].area
+        logger.debug(f"Calculating the area of {_truncate(self.shape)}")
+        return self.as_equal_area.polygon.shape.area
 
     @cached_property
     def bounds(self):
-        logger.debug(f"Calculating the bounds of {_truncate(self.geom)}")
+        logger.debug(f"Calculating the bounds of {_truncate(self.shape)}")
         if self.geom_type == "Point":
-            return self.polygon.geom.total_bounds
-        return self.geom.total_bounds
+            return np.array(self.polygon.shape.bounds)
+        return np.array(self.shape.bounds)
 
     @cached_property
     def radius_km(self):
-        logger.debug(f"Calculating the radius in km of {_truncate(self.geom)}")
+        logger.debug(f"Calculating the radius in km of {_truncate(self.shape)}")
         if self.geom_type == "Point":
             return float(self._radius_km)
         lon1, lat1, lon2, lat2 = self.as_wgs84.bounds
@@ -328,7 +364,7 @@ class GeoMetry:
 
     @cached_property
     def height_km(self):
-        logger.debug(f"Calculating the height in km of {_truncate(self.geom)}")
+        logger.debug(f"Calculating the height in km of {_truncate(self.shape)}")
         if self.geom_type == "Point":
             return self._radius_km * 2
         lon1, lat1, lon2, _ = self.as_wgs84.bounds
@@ -336,7 +372,7 @@ class GeoMetry:
 
     @cached_property
     def width_km(self):
-        logger.debug(f"Calculating the width in km of {_truncate(self.geom)}")
+        logger.debug(f"Calculating the width in km of {_truncate(self.shape)}")
         if self.geom_type == "Point":
             return self._radius_km * 2
         lon1, lat1, _, lat2 = self.as_wgs84.bounds
@@ -393,8 +429,8 @@ class GeoMetry:
     def main(self):
         if self.geom_type == "MultiPolygon":
             logger.debug(f"Finding the main polygon in {_truncate(self)}")
-            geoms = {g.area: g for g in self.geom.iloc[0].geoms}
-            return self.match(geoms[max(geoms)])
+            geoms = {g.area: g for g in self.shape.geoms}
+            return self.match(geoms[max(geoms)], other_crs=self.crs)
         return self.copy()
 
     @cached_property
@@ -402,6 +438,19 @@ class GeoMetry:
         """A representation of the geometry as a polygon"""
         return self.ellipse if self.geom_type == "Point" else self
 
+    @cached_property
+    def prepared(self):
+        """The polygon as a shapely object prepared for repeated predicates
+
+        Preparing builds a spatial index of the edges of the shape, which
+        makes repeated containment and intersection tests against large
+        polygons much faster. The index is attached to the shapely object
+        itself and is discarded with it when geom changes.
+        """
+        shape = self.polygon.shape
+        shapely.prepare(shape)
+        return shape
+
     @cached_property
     def drawable(self):
         x1, _, x2, _ = self.bounds
@@ -411,43 +460,87 @@ class GeoMetry:
             and not isclose(max(x1, x2), 180)
             and not isclose(min(x1, x2), -180)
         ):
-            return self.split_at_dateline().geom.iloc[0]
-        return self.polygon.geom.iloc[0]
+            return self.split_at_dateline().shape
+        return self.polygon.shape
+
+    @cached_property
+    def geoseries(self):
+        return gpd.GeoSeries([self.shape], crs=self.crs)
 
     @cached_property
     def wkb(self):
-        return self.geom.iloc[0].wkb
+        return self.shape.wkb
+
+    @cached_property
+    def cache_key(self):
+        """Key identifying this geometry in the operations cache"""
+        return (
+            _crs_key(self.crs),
+            self._radius_km,
+            self.shape.bounds,
+            hash(self.wkb),
+        )
+
+    @cached_property
+    def _reprojected(self):
+        """Maps CRS to recently reprojected copies of this geometry"""
+        return OrderedDict()
 
     @cached_property
     def wkt(self):
-        return to_wkt(self.geom.iloc[0], rounding_precision=6)
+        return to_wkt(self.shape, rounding_precision=6)
 
     @property
     def is_empty(self):
-        return self.geom.iloc[0].is_empty
+        return self.shape.is_empty
 
     @property
     def is_valid(self):
-        return self.geom.iloc[0].is_valid
+        return self.shape.is_valid
 
     def to_crs(self, crs, validate=True):
         """Reprojects geometry to another crs"""
+        # Return a copy so that changes made by the caller do not affect the
+        # cached reprojection
+        return _shallow_copy(self._to_crs(crs, validate=validate))
+
+    def _to_crs(self, crs, validate=True):
+        """Reprojects geometry to another crs, reusing cached reprojections
+
+        The returned object is shared with later calls and must not be
+        modified. Use to_crs to get an object that can be modified.
+        """
+
+        # GeoMetry objects are immutable, so reprojections can be reused as long
+        # as the metadata copied below has not changed
+        key = (_crs_key(crs), validate)
+        reprojected = self._reprojected
+        try:
+            geom = reprojected[key]
+        except KeyError:
+            pass
+        else:
+            if geom.name == self.name and geom._radius_km == self._radius_km:
+                reprojected.move_to_end(key)
+                return geom
 
-        geom = self.verbatim_geom.copy(True)
+        crs = _get_crs(crs)
+        shape = self.verbatim_shape
 
-        if not geom.crs.equals(crs):
+        if not self.verbatim_crs.equals(crs):
             logger.debug(
-                f"Reprojecting from {repr(str(self.verbatim_geom.crs))}"
+                f"Reprojecting from {repr(str(self.verbatim_crs))}"
                 f" to {repr(str(crs))}"
             )
-            geom = geom.to_crs(crs)
+            shape = transform_shape(shape, self.verbatim_crs, crs)
 
-        # Defer validation of the reprojected shape until the verbatim_geom from
-        # the parent can be copied over to the new object. This allows the original
-        # geometry to be used when reassessing an invalid shape.
-        geom = self.__class__(geom, validate=False)
+        # Defer validation of the reprojected shape until the verbatim geometry
+        # from the parent can be copied over to the new object. This allows the
+        # original geometry to be used when reassessing an invalid shape.
+        geom = self.__class__(shape, crs=crs, validate=False)
         with mutable(geom):
-            geom.verbatim_geom = self.verbatim_geom.copy()
+            geom.verbatim_shape = self.verbatim_shape
+            geom.verbatim_crs = self.verbatim_crs
             if validate:
                 geom.validate_shape()
             geom.validate = validate
@@ -457,10 +550,18 @@ class GeoMetry:
             geom.parents = self.parents.copy()
             geom._radius_km = self._radius_km
 
+        # The copy is reprojected from the same verbatim shape, so it shares
+        # this cache instead of creating its own. Cached properties are stored
+        # in the instance dict.
+        geom.__dict__["_reprojected"] = reprojected
+
+        reprojected[key] = geom
+        while len(reprojected) > self.max_reprojected:
+            reprojected.popitem(last=False)
         return geom
 
     def representative_point(self, crs=None):
-        point = self.match(self.geom.representative_point()[0])
+        point = self.match(self.shape.representative_point(), other_crs=self.crs)
         if crs is not None:
             point = point.to_crs(crs)
         return point
@@ -473,8 +574,8 @@ class GeoMetry:
     def to_json(self):
         return {
             "name": self.name,
-            "geometry": self.verbatim_geom.iloc[0].wkt,
-            "crs": self.verbatim_geom.crs,
+            "geometry": self.verbatim_shape.wkt,
+            "crs": self.verbatim_crs,
             "radius_km": self._radius_km,
             "validate": self.validate,
         }
@@ -503,11 +604,11 @@ class GeoMetry:
                 f"Simplifying {_truncate(self)} (tolerance={tolerance}, num_points={num_points})"
             )
             # geom = (
-            #    self.geom.iloc[0]
+            #    self.shape
             #    if self.geom_type == "Polygon"
-            #    else self.convex_hull.geom.iloc[0]
+            #    else self.convex_hull.shape
             # )
-            geom = self.geom.iloc[0]
+            geom = self.shape
             simplified = None
             coords = None
             while simplified is None or len(coords) > num_points:
@@ -520,7 +621,9 @@ class GeoMetry:
                         coords = simplified.coords
                     except NotImplementedError:
                         break
-            return self.match(geom if simplified is None else simplified)
+            return self.match(
+                geom if simplified is None else simplified, other_crs=self.crs
+            )
         return self.copy()
 
     def customize_proj_string(self, proj_string):
@@ -528,89 +631,84 @@ class GeoMetry:
         return proj_string.format(lat=0, lon=get_meridian([point.x]))
 
     def equals_exact(self, other, tolerance=0.1):
-        geom, other = self.reproject(other)
-        return geom.geom.iloc[0].equals_exact(other.geom.iloc[0], tolerance=tolerance)
+        geom, other = self._reproject(other)
+        return geom.shape.equals_exact(other.shape, tolerance=tolerance)
 
     def contains(self, other):
         logger.debug(f"Checking if {_truncate(self)} contains {_truncate(other)}")
-        geom, other = self.reproject(other)
-        return geom.polygon.geom.iloc[0].contains(other.polygon.geom.iloc[0])
+        geom, other = self._reproject(other)
+        return geom.prepared.contains(other.polygon.shape)
 
     def crosses(self, other):
         logger.debug(f"Checking if {_truncate(self)} crosses {_truncate(other)}")
-        geom, other = self.reproject(other)
-        return geom.polygon.geom.iloc[0].crosses(other.polygon.geom.iloc[0])
+        geom, other = self._reproject(other)
+        return geom.polygon.shape.crosses(other.polygon.shape)
 
     def disjoint(self, other):
         logger.debug(
             f"Checking if {_truncate(self)} is disjoint from {_truncate(other)}"
         )
-        geom, other = self.reproject(other)
-        return geom.polygon.geom.iloc[0].disjoint(other.polygon.geom.iloc[0])
+        geom, other = _order_by_complexity(*self._reproject(other))
+        return geom.prepared.disjoint(other.polygon.shape)
 
     def intersects(self, other):
         logger.debug(f"Checking if {_truncate(self)} intersects {_truncate(other)}")
-        geom, other = self.reproject(other)
-        return geom.polygon.geom.iloc[0].intersects(other.polygon.geom.iloc[0])
+        geom, other = _order_by_complexity(*self._reproject(other))
+        return geom.prepared.intersects(other.polygon.shape)
 
     def touches(self, other):
         logger.debug(f"Checking if {_truncate(self)} touches {_truncate(other)}")
-        geom, other = self.reproject(other)
-        return geom.polygon.geom.iloc[0].touches(other.polygon.geom.iloc[0])
+        geom, other = self._reproject(other)
+        return geom.polygon.shape.touches(other.polygon.shape)
 
     def within(self, other):
         logger.debug(f"Checking if {_truncate(self)} is within {_truncate(other)}")
-        geom, other = self.reproject(other)
+        geom, other = self._reproject(other)
         return other.contains(self)
         # NOTE: within throws a Topology Error sometimes
-        return geom.polygon.geom.iloc[0].within(other.polygon.geom.iloc[0])
+        return geom.polygon.shape.within(other.polygon.shape)
 
     def difference(self, other):
         logger.debug(
             f"Calculating the difference between {_truncate(self)} and {_truncate(other)}"
         )
-        geom, other = self.reproject(other)
+        geom, other = self._reproject(other)
         crs = geom.crs
-        geom = geom.polygon.geom.iloc[0].difference(other.polygon.geom.iloc[0])
+        geom = geom.polygon.shape.difference(other.polygon.shape)
         return self.match(geom, other_crs=crs)
 
     def intersection(self, other):
         logger.debug(
             f"Calculating the intersection between {_truncate(self)} and {_truncate(other)}"
         )
-        geom, other = self.reproject(other)
+        geom, other = self._reproject(other)
         crs = geom.crs
-        geom = geom.polygon.geom.iloc[0].intersection(other.polygon.geom.iloc[0])
+        geom = geom.polygon.shape.intersection(other.polygon.shape)
         return self.match(geom, other_crs=crs)
 
     def intersects_all(self, others, transitive=True):
         """Tests if list of shapes all intersect"""
-        others = self.reproject(others)
-        geom = others.pop(0)
+        geoms = [self] + [self._as_geometry(o) for o in as_list(others)]
+        pairs = query_pairs(geoms)
         # If transitive is False, shape must itself intersect all others
         if not transitive:
-            for other in others:
-                if not geom.intersects(other):
-                    return False
-            return True
+            return len(set(pairs[pairs[:, 0] == 0, 1])) == len(geoms) - 1
         # If transitive is True, look for chains of intersection
-        intersecting = [geom]
-        last = None
-        while intersecting != last:
-            disjoint = []
-            for geom in intersecting[:]:
-                for other in others:
-                    if geom.intersects(other):
-                        intersecting.append(other)
-                    else:
-                        disjoint.append(other)
-            last = intersecting
-            others = disjoint
-        return not disjoint
+        neighbors = {}
+        for i, j in pairs:
+            neighbors.setdefault(i, []).append(j)
+        intersecting = {0}
+        queue = [0]
+        while queue:
+            for i in neighbors.get(queue.pop(), []):
+                if i not in intersecting:
+                    intersecting.add(i)
+                    queue.append(i)
+        return len(intersecting) == len(geoms)
 
     def overlap(self, other, percent=False):
         """Calculates the overlap between two objects"""
-        geom, other = self.reproject(other)
+        geom, other = self._reproject(other)
         try:
             site, other = [s.envelope for s in [geom, other]]
             if site.disjoint(other):
@@ -631,19 +729,17 @@ class GeoMetry:
 
     def nearest_points(self, other):
         """Calculates nearest points between this and another geometry"""
-        geom, other = self.reproject(other)
+        geom, other = self._reproject(other)
         crs = geom.crs
         # Use centroids where radius is estimated
-        geom = (geom.centroid if geom.geom_type == "Point" else geom).geom.union_all()
-        other = (
-            other.centroid if other.geom_type == "Point" else other
-        ).geom.union_all()
+        geom = (geom.centroid if geom.geom_type == "Point" else geom).shape
+        other = (other.centroid if other.geom_type == "Point" else other).shape
 
         return [self.match(g, other_crs=crs) for g in nearest_points(geom, other)]
 
     def similar_to(self, other, *args, dist_km=0.1, **kwargs):
         """Tests if centroid and radius of two shapes are within 100 m"""
-        geom, other = self.reproject(other)
+        geom, other = self._reproject(other)
         if args or kwargs:
             return geom._similar_to(other, *args, **kwargs)
         if geom.centroid_dist_km(other) <= dist_km:
@@ -652,7 +748,7 @@ class GeoMetry:
 
     def combine(self, others, allow_hull=True):
         """Combines list of shapes using their union or convex hull"""
-        geoms = [s.geom.iloc[0] for s in self.reproject(others)]
+        geoms = [s.shape for s in self._reproject(others)]
         # geom = geoms[0]
         # others = geoms[1:]
         return self.match(union_all(geoms))
@@ -772,7 +868,7 @@ class GeoMetry:
 
     def crop(self, other, left=True, bottom=True, right=True, top=True):
         """Crops shape to bounding box for all directions given as True"""
-        geom, other = self.reproject(other)
+        geom, other = self._reproject(other)
         bounds = list(self.bounds)
         for i, val in enumerate([left, bottom, right, top]):
             if val:
@@ -782,47 +878,82 @@ class GeoMetry:
 
     def centroid_dist_km(self, other, *args, **kwargs):
         """Calculates distance in km between centroids of two geometries"""
-        geom, other = self.reproject(other)
+        geom, other = self._reproject(other)
         return geom.centroid.min_dist_km(other.centroid, *args, **kwargs)
 
     def max_dist_km(self, other):
-        """Estimates the maximum distance in km between two geometries"""
+        """Estimates the maximum distance in km between two geometries
+
+        The farthest points between two shapes are vertices of their convex
+        hulls, so distances are calculated between every pair of hull
+        vertices at once.
+        """
         geom = self.as_wgs84
         other = other.as_wgs84
-        # Simplify the geometries to hulls to partially mitigate the awfulness
-        # of this appraoch
         geom = geom.convex_hull if geom.geom_type != "Point" else geom
         other = other.convex_hull if other.geom_type != "Point" else other
-        dists_km = []
-        for lon, lat in geom.coords:
-            for olon, olat in other.coords:
-                dists_km.append(get_dist_km(lat, lon, olat, olon))
-        return max(dists_km)
+        lons, lats = np.array(geom.coords).T
+        olons, olats = np.array(other.coords).T
+        # Compare vertices in chunks to limit the size of the distance matrix
+        step = max(1, 1000000 // len(olats))
+        return float(
+            max(
+                get_dists_km(
+                    lats[i : i + step, None], lons[i : i + step, None], olats, olons
+                ).max()
+                for i in range(0, len(lats), step)
+            )
+        )
 
     def min_dist_km(self, other, threshold_km=None):
         """Calculates minimum distance in km between two geometries"""
-        # FIXME: Should this be a reproject?
-        geom = self.as_wgs84
-        other = other.as_wgs84
+        return float(self.min_dists_km([other])[0])
+
+    def min_dists_km(self, others):
+        """Calculates minimum distances in km to a list of geometries
+
+        Nearest points to all geometries are found at once in a common
+        projection and converted to geodesic distances in one call.
+
+        Parameters
+        ----------
+        others : list of GeoMetry
+            geometries to measure the distance to
+
+        Returns
+        -------
+        numpy.ndarray
+            distance in km to each geometry
+        """
+        if not isinstance(others, (list, tuple)):
+            others = [others]
+        if not others:
+            return np.empty(0)
         # Use centroids where radius is estimated
-        geom = geom.centroid if geom.geom_type == "Point" else geom
-        other = other.centroid if other.geom_type == "Point" else other
-        if geom.intersects(other):
-            return 0.0
-        pts = [p.centroid.geom.iloc[0] for p in geom.nearest_points(other)]
-        dist_km = get_dist_km(pts[0].y, pts[0].x, pts[1].y, pts[1].x)
-        # If threshold specified and exceeded, check variants
-        # if threshold_km is not None and dist_km > threshold_km:
-        #    dists_km = []
-        #    for geom in geom.variants():
-        #        geom = geom.centroid if geom.geom_type == "Point" else geom
-        #        pts = geom.nearest_points(other)
-        #        vdist_km = get_dist_km(pts[0].y, pts[0].x, pts[1].y, pts[1].x)
-        #        if vdist_km < threshold_km:
-        #            return vdist_km
-        #        dists_km.append(vdist_km)
-        #    return min(dists_km)
-        return dist_km
+        geoms = []
+        for geom in [self] + list(others):
+            geom = geom.as_wgs84
+            geoms.append(geom.centroid if geom.geom_type == "Point" else geom)
+        try:
+            projected = geoms[0]._reproject(geoms[1:])
+        except ValueError:
+            # Geometries too far apart to share a projection are compared
+            # one at a time
+            if len(geoms) == 2:
+                raise
+            return np.concatenate([self.min_dists_km([o]) for o in others])
+        geom = projected[0]
+        others = projected[1:]
+        intersects = shapely.intersects(
+            geom.polygon.shape, np.array([o.polygon.shape for o in others])
+        )
+        lines = shapely.shortest_line(geom.shape, np.array([o.shape for o in others]))
+        coords = shapely.get_coordinates(lines)
+        transformer = _get_transformer(geom.crs, geoms[0].crs)
+        lons, lats = transformer.transform(coords[:, 0], coords[:, 1])
+        dists_km = get_dists_km(lats[::2], lons[::2], lats[1::2], lons[1::2])
+        dists_km[intersects] = 0.0
+        return dists_km
 
     def encompass(self, other, how="ellipse"):
         """Creates a polygon centered on a point that encompasses another geometry"""
@@ -839,7 +970,18 @@ class GeoMetry:
             return self.crs
         if not isinstance(others, (list, tuple)):
             others = [others]
-        others = [self.__class__(o) for o in others]
+        others = [self._as_geometry(o) for o in others]
+        # Use the cached projection if these geometries have been compared before
+        key = ("common_projection", self.cache_key) + tuple(o.cache_key for o in others)
+        try:
+            return self.op_cache[key]
+        except KeyError:
+            proj = self._get_common_projection(others)
+            self.op_cache[key] = proj
+            return proj
+
+    def _get_common_projection(self, others):
+        """Finds an equal-area projection suitable for this and other geometries"""
         # Order geometrics with largest first
         geoms = sorted([self] + others, key=lambda g: -g.area)
         meridians = [g.meridians for g in geoms]
@@ -863,11 +1005,19 @@ class GeoMetry:
 
     def reproject(self, others, other_crs=None):
         """Reprojects geometries to a common projection"""
-        geoms = [self] + [self.__class__(o) for o in as_list(others)]
+        return [_shallow_copy(g) for g in self._reproject(others)]
+
+    def _reproject(self, others):
+        """Reprojects geometries to a common projection, reusing cached objects
+
+        The returned objects are shared with later calls and must not be
+        modified. Use reproject to get objects that can be modified.
+        """
+        geoms = [self] + [self._as_geometry(o) for o in as_list(others)]
         if len(geoms) == 1:
             return [self.as_equal_area]
         crs = geoms[0].get_common_projection(geoms[1:])
-        return [g.to_crs(crs) for g in geoms]
+        return [g._to_crs(crs) for g in geoms]
 
     def crosses_dateline(self):
         x1, _, x2, _ = self.bounds
@@ -876,7 +1026,7 @@ class GeoMetry:
     def split_at_dateline(self):
         if self.crosses_dateline():
             logger.debug("Splitting geometry at dateline")
-            translated = translate(self.geom.iloc[0], xoff=180)
+            translated = translate(self.shape, xoff=180)
             geom = split(translated, LineString([(180, 90), (180, -90)]))
             geoms = []
             for geom in translate(geom, xoff=-180).geoms:
@@ -889,10 +1039,10 @@ class GeoMetry:
 
     def validate_shape(self):
         if not self.is_valid:
-            geom = self.geom.simplify(0.001)
-            if geom.is_valid.all():
+            shape = self.shape.simplify(0.001)
+            if shape.is_valid:
                 logger.debug("Simplified to fix invalid shape")
-                self.geom = geom
+                self.geom = shape
         if not self.is_valid:
             try:
                 geom = self.buffer(0.1)
@@ -901,14 +1051,14 @@ class GeoMetry:
             else:
                 if geom.is_valid:
                     logger.debug("Buffered to fix invalid shape")
-                    self.geom = geom.geom
+                    self.geom = geom.shape
         if not self.is_valid:
-            geom = geom.convex_hull
-            if geom.is_valid.all():
+            shape = shape.convex_hull
+            if shape.is_valid:
                 logger.debug("Took convex hull to fix invalid shape")
-                self.geom = geom
+                self.geom = shape
         if not self.is_valid:
-            warnings.warn(f"GeoMetry invalid: {self.geom.iloc[0]}")
+            warnings.warn(f"GeoMetry invalid: {self.shape}")
         return
         if not self.is_valid:
             geom = self.clip(validate=False)
@@ -934,7 +1084,7 @@ class GeoMetry:
                 lat = max((y1, y2)) if 90 in common else min((y1, y2))
 
                 # Create the edge in WGS84. Using another CRS may clip the edge.
-                edge = wgs84.edge("S" if 90 in common else "N").geom.iloc[0]
+                edge = wgs84.edge("S" if 90 in common else "N").shape
 
                 # Fill in the edge with additional points. Use the interpolated
                 # line to
@@ -974,7 +1124,7 @@ class GeoMetry:
                 return gpd.GeoSeries(Polygon(coords), crs=self.crs)
 
         # Otherwise tweak the polygon to correct minor errors
-        geom = self.geom.iloc[0]
+        geom = self.shape
         if not geom.is_valid:
             geom = geom.buffer(0.1)
         if not geom.is_valid:
@@ -1010,10 +1160,11 @@ class GeoMetry:
             proj_string = self.equal_area_mask.format(
                 lat=0, lon=get_meridian([self.representative_point(4326).x])
             )
-            geom = self.envelope.geom if self.geom_type == "Point" else self.geom
-            geom = geom.to_crs(proj_string)
-            buffered = geom.buffer(dist).clip(self.equal_area_bounds)
+            geom = self.envelope if self.geom_type == "Point" else self
+            shape = transform_shape(geom.shape, geom.crs, proj_string)
+            buffered = shapely.clip_by_rect(shape.buffer(dist), *self.equal_area_bounds)
             # Revert to original CRS
+            buffered = transform_shape(buffered, proj_string, self.crs)
             return self.__class__(buffered, crs=self.crs)
         return self.copy()
 
@@ -1140,8 +1291,8 @@ class GeoMetry:
 
         Needed when the split line cuts through a gap in a polygon.
         """
-        line = self.match(line).geom.iloc[0]
-        geoms = list(split(self.geom.iloc[0], line).geoms)
+        line = self.match(line).shape
+        geoms = list(split(self.shape, line).geoms)
         if len(geoms) > 2:
             bounds = line.bounds
             val = bounds[0] if bounds[0] == bounds[2] else bounds[1]
@@ -1173,24 +1324,17 @@ class GeoMetry:
 
         if isinstance(obj, GeoMetry):
             logger.debug("Parsed geometry from GeoMetry")
-            geom = obj.geom.copy()
+            geom = obj.shape
             if crs and not obj.crs.equals(crs):
-                geom = geom.to_crs(crs)
+                geom = transform_shape(geom, obj.crs, crs)
             return geom, crs
 
-        # Object is a GeoDataFrame
-        if isinstance(obj, gpd.GeoDataFrame):
-            logger.debug("Parsed geometry from GeoDataFrame")
-            if crs and not obj.crs.equals(crs):
-                obj = obj.to_crs(crs)
-            return obj.geometry.iloc[-1:].reset_index(drop=True), crs
-
-        # Object is a GeoSeries
-        if isinstance(obj, gpd.GeoSeries):
-            logger.debug("Parsed geometry from GeoSeries")
+        # Object is a GeoDataFrame or GeoSeries
+        if isinstance(obj, (gpd.GeoDataFrame, gpd.GeoSeries)):
+            logger.debug(f"Parsed geometry from {obj.__class__.__name__}")
             if crs and not obj.crs.equals(crs):
                 obj = obj.to_crs(crs)
-            return obj.geometry.iloc[-1:].reset_index(drop=True), crs
+            return obj.geometry.iloc[-1] if len(obj) else None, crs
 
         # Shape is a shapely geometry object
         if isinstance(obj, BaseGeometry):
@@ -1296,10 +1440,10 @@ class GeoMetry:
                 logger.debug("Parsed as a series of GeoMetry objects")
                 geoms = []
                 for geom in obj:
-                    geom = self.__class__(geom.verbatim_geom, crs=geom.verbatim.crs)
+                    geom = self.__class__(geom.verbatim_shape, crs=geom.verbatim_crs)
                     if not geom.crs.equals(crs):
                         geom = geom.to_crs(crs)
-                    geoms.append(geom.geom.iloc[0])
+                    geoms.append(geom.shape)
                 obj = geoms
 
             # Interpret lists of shapely objects
@@ -1410,6 +1554,12 @@ class GeoMetry:
         except ValueError:
             return float({"lat": EMuLatitude, "lon": EMuLongitude}[kind](val))
 
+    def _as_geometry(self, obj):
+        """Converts object to this class, reusing existing instances"""
+        if isinstance(obj, self.__class__):
+            return obj
+        return self.__class__(obj)
+
     def _similar_to(self, other, min_overlap=0.9, min_area_ratio=0.5):
         """Tests if two geometries have similar positions and sizes"""
         other = self.match(other)
@@ -1432,18 +1582,75 @@ class GeoMetry:
         return obj.is_valid
 
 
+def query_pairs(geoms, others=None, predicate="intersects"):
+    """Finds pairs of geometries that satisfy a spatial predicate
+
+    Geometries are reprojected to a common projection and tested in bulk
+    against an STRtree, so only pairs with overlapping bounds are compared.
+
+    Parameters
+    ----------
+    geoms : list of GeoMetry
+        geometries to test
+    others : list of GeoMetry
+        geometries to test against. If omitted, geometries in geoms are
+        tested against each other but not against themselves.
+    predicate : str
+        a predicate supported by STRtree.query, for example, intersects,
+        contains, or within
+
+    Returns
+    -------
+    numpy.ndarray
+        (i, j) index pairs for which geoms[i] satisfies the predicate with
+        respect to others[j], sorted by i then j
+    """
+    geoms = list(geoms)
+    others_ = list(others) if others is not None else []
+    if not geoms or others is not None and not others_:
+        return np.empty((0, 2), dtype=int)
+    first = geoms[0] if isinstance(geoms[0], GeoMetry) else GeoMetry(geoms[0])
+    try:
+        projected = first._reproject(geoms[1:] + others_)
+    except ValueError:
+        # Geometries with no common projection are compared pair by pair
+        return _query_pairs_pairwise(geoms, others, predicate)
+    shapes = np.array([g.polygon.shape for g in projected], dtype=object)
+    left = shapes[: len(geoms)]
+    right = shapes[len(geoms) :] if others is not None else left
+    if predicate == "within":
+        # Test containment from the other side for consistency with within
+        pairs = STRtree(left).query(right, predicate="contains")[::-1].T
+    else:
+        pairs = STRtree(right).query(left, predicate=predicate).T
+    if others is None:
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+
+def _query_pairs_pairwise(geoms, others=None, predicate="intersects"):
+    """Finds pairs of geometries that satisfy a predicate one pair at a time"""
+    pairs = []
+    for i, geom in enumerate(geoms):
+        geom = geom if isinstance(geom, GeoMetry) else GeoMetry(geom)
+        for j, other in enumerate(others if others is not None else geoms):
+            if others is None and i == j:
+                continue
+            if getattr(geom, predicate)(other):
+                pairs.append((i, j))
+    return np.array(pairs, dtype=int).reshape(-1, 2)
+
+
 def geoms_to_geoseries(geoms, crs=None):
     """Converts list of geoms to a GeoSeries with a coherent equal-area CRS"""
     if crs is None:
         geoms = reproject(geoms)
-    return gpd.GeoSeries([g.geom.iloc[0] for g in geoms], crs=geoms[0].crs)
+    return gpd.GeoSeries([g.shape for g in geoms], crs=geoms[0].crs)
 
 
 def geoms_to_geodataframe(geoms, **kwargs):
     geoms = reproject(geoms)
-    kwargs["geometry"] = gpd.GeoSeries(
-        [g.geom.iloc[0] for g in geoms], crs=geoms[0].crs
-    )
+    kwargs["geometry"] = gpd.GeoSeries([g.shape for g in geoms], crs=geoms[0].crs)
     gdf = gpd.GeoDataFrame(kwargs)
     gdf["area"] = gdf["geometry"].area
     return gdf.sort_values("area", ascending=False)
@@ -1467,6 +1674,84 @@ def reproject(geoms):
     return geoms[0].reproject(geoms[1:])
 
 
+def transform_shape(shape, src_crs, dst_crs):
+    """Reprojects a shapely geometry between two coordinate reference systems
+
+    Parameters
+    ----------
+    shape : shapely.geometry.base.BaseGeometry
+        the geometry to reproject
+    src_crs : Any
+        the CRS of the geometry in any format understood by pyproj
+    dst_crs : Any
+        the CRS to reproject to in any format understood by pyproj
+
+    Returns
+    -------
+    shapely.geometry.base.BaseGeometry
+        the reprojected geometry
+    """
+    transformer = _get_transformer(_get_crs(src_crs), _get_crs(dst_crs))
+
+    def _transform(coords):
+        return np.column_stack(transformer.transform(coords[:, 0], coords[:, 1]))
+
+    return shapely.transform(shape, _transform)
+
+
+def _crs_key(crs):
+    """Converts a CRS to a hashable key"""
+    return _get_crs(crs).srs
+
+
+def _shallow_copy(geom):
+    """Copies a geometry without copying its shape or cached properties"""
+    copied = object.__new__(geom.__class__)
+    copied.__dict__.update(geom.__dict__)
+    copied.__dict__["parents"] = geom.parents.copy()
+    copied.__dict__["_resized"] = geom._resized.copy()
+    return copied
+
+
+def _get_crs(crs):
+    """Converts user input to a pyproj CRS, caching hashable inputs"""
+    if crs is None or isinstance(crs, CRS):
+        return crs
+    try:
+        return _get_crs_cached(crs)
+    except TypeError:
+        return CRS.from_user_input(crs)
+
+
+@lru_cache(maxsize=256)
+def _get_crs_cached(crs):
+    return CRS.from_user_input(crs)
+
+
+def _order_by_complexity(geom, other):
+    """Orders geometries for a symmetric predicate so the larger is prepared
+
+    The shape with more vertices is usually the admin division or body of
+    water being tested against many sites, so it is the one worth preparing.
+    """
+    num_coords = shapely.get_num_coordinates([geom.polygon.shape, other.polygon.shape])
+    return (other, geom) if num_coords[1] > num_coords[0] else (geom, other)
+
+
+def _get_transformer(src_crs, dst_crs):
+    """Gets a reusable transformer between two CRS"""
+    # Hashing a CRS object exports it to WKT, so key on the source string instead
+    key = (_crs_key(src_crs), _crs_key(dst_crs))
+    try:
+        return _transformers[key]
+    except KeyError:
+        if len(_transformers) >= 256:
+            _transformers.clear()
+        transformer = Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+        _transformers[key] = transformer
+        return transformer
+
+
 def _truncate(val):
     """Truncates string for log"""
     if isinstance(val, (gpd.GeoDataFrame, gpd.GeoSeries)):
@@ -9,7 +9,7 @@ from ....bots.geonames import CODES_COUNTRIES
 from ....config import CONFIG
 from ....databases.georef_job import Session, Localities, Uncertainties
 from ....tools.geographic_operations.kml import Kml
-from ....utils import LazyAttr, LocStandardizer, mutable, oxford_comma
+from ....utils import LazyAttr, LocStandardizer, clock_stage, mutable, oxford_comma
 
 
 logger = logging.getLogger(__name__)
@@ -77,6 +77,7 @@ class MatchAnnotator(MatchEvaluator):
         """Tests if georeference appears strong"""
         return len(self.selected) == 1 and not self.missed() and not self.leftovers
 
+    @clock_stage("kml")
     def kml(self, fn, refsite=None):
         """Saves results as KML"""
         kml = Kml()
@@ -1,7 +1,6 @@
 """Defines methods to evaluate and summarize georeferencing information"""
 
 import logging
-import itertools
 import re
 
 from shapely.geometry import GeometryCollection
@@ -19,10 +18,17 @@ from ....bots.geonames import (
 )
 from ....config import CONFIG, GEOCONFIG
 from ....databases.geohelper import OceanQuery
-from ....tools.geographic_operations.geometry import GeoMetry
+from ....tools.geographic_operations.geometry import GeoMetry, query_pairs
 from ....records import sites_to_geodataframe
 from ....tools.geographic_names.parsers.modified import abbreviate_direction
-from ....utils import as_set, custom_copy, most_common, mutable
+from ....utils import (
+    as_set,
+    clock_stage,
+    custom_copy,
+    get_dist_km,
+    most_common,
+    mutable,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -61,6 +67,7 @@ REJECTED = {
 }
 # Job parameters
 MAX_SITES = 150
+MAX_COMBINATIONS = 10000
 CONT_SHELF_WIDTH_KM = 50
 RESIZE = 1.1
 
@@ -79,11 +86,13 @@ class MatchEvaluator:
         self.leftovers = {}  # fields with unparseable info
         self.intersecting = False
         self.sources = []
+        self.pipe_matches = {}  # number of matches by pipe
         self.admin_match_type = {}
         self.ocean = OceanQuery()
         self.multiples = {}
         self.smallest_encompassing = None
         self.max_dist_km = 100
+        self.max_combinations = MAX_COMBINATIONS
         # Configure sites property
         self._sites = None
         self.sites = []
@@ -174,6 +183,7 @@ class MatchEvaluator:
         self.features = {}
         self.leftovers = {}  # fields with unparseable info
         self.intersecting = False
+        self.pipe_matches = {}
         self.admin_match_type = {}
         self.smallest_encompassing = None
         # Configure sites property
@@ -207,7 +217,10 @@ class MatchEvaluator:
         base = basepipe.load(self.site).prepare_all()
         for pipe in self.pipes:
             try:
-                self.extend(pipe.copy_from(base).process())
+                matches = pipe.copy_from(base).process()
+                self.extend(matches)
+                if matches:
+                    self.pipe_matches[pipe.__class__.__name__] = len(matches)
                 for key, vals in pipe.leftovers.items():
                     self.leftovers.setdefault(self.field(key), []).extend(vals)
             except Exception as e:
@@ -218,6 +231,7 @@ class MatchEvaluator:
         self.leftovers = {k: set(v) for k, v in self.leftovers.items()}
         self.features = basepipe.extract(self.site)
 
+    @clock_stage("encompass")
     def encompass(self, sites=None, max_dist_km=None):
         """Calculate coordinates and radius using info from results"""
         if not self.results:
@@ -508,8 +522,13 @@ class MatchEvaluator:
                 logger.debug("Matched most specific feature (fallback)")
                 return self.select(specific)
 
-            # Fall back to simple combinations (one site per name)
-            if len(self.find_combinations(specific)) == 1:
+            # Fall back to simple combinations (one site per name). If there
+            # are too many candidates to tell, skip this fallback.
+            try:
+                combinations = self.find_combinations(specific, max_dist_km)
+            except ValueError:
+                combinations = []
+            if len(combinations) == 1:
                 geom, _ = self.most_specific_combination(specific)
                 logger.debug("Matched most specific combination (fallback)")
                 return self.select(specific, geom)
@@ -820,9 +839,9 @@ class MatchEvaluator:
             # Map intersection of geometry with ocean
             tiles = self.ocean.query(resized.to_crs(4326), ocean=ocean)
             logger.debug("Got tiles")
-            if tiles:
+            if not tiles.empty:
                 # Get intersection of proposed geometry with the world ocean
-                shape = GeoMetry(self.adjacent(tiles), crs=4326)
+                shape = GeoMetry(self.adjacent(list(tiles.geometry)), crs=4326)
                 shape.plot()
                 geom = resized.intersection(shape)
 
@@ -969,7 +988,9 @@ class MatchEvaluator:
         if gdf.empty:
             return terr
 
-        smallest = gdf.iloc[-1:].buffer(100000)
+        # Convert the buffer once so that its reprojections and prepared
+        # shapes are reused for every site
+        smallest = GeoMetry(gdf.iloc[-1:].buffer(100000))
         in_bounds = []
         for site in terr:
             if site.is_marine() or site.intersects(smallest):
@@ -1103,7 +1124,7 @@ class MatchEvaluator:
                 gdf = self.to_gdf(sites)
                 eq_area_poly = polygon.to_crs(gdf.crs)
                 gdf["geometry"] = gdf["geometry"].centroid
-                xing = gdf.iloc[gdf.sindex.query(eq_area_poly.geom.iloc[0], "contains")]
+                xing = gdf.iloc[gdf.sindex.query(eq_area_poly.shape, "contains")]
                 in_bounds.extend(self.expand([r.id for _, r in xing.iterrows()]))
                 for site in in_bounds:
                     self.admin_match_type.setdefault(site.location_id, "centroid")
@@ -1113,9 +1134,7 @@ class MatchEvaluator:
                 gdf = self.to_gdf(sites)
                 eq_area_poly = polygon.to_crs(gdf.crs)
                 gdf["geometry"] = gdf["geometry"].scale(RESIZE, RESIZE, how="rel")
-                xing = gdf.iloc[
-                    gdf.sindex.query(eq_area_poly.geom.iloc[0], "intersects")
-                ]
+                xing = gdf.iloc[gdf.sindex.query(eq_area_poly.shape, "intersects")]
                 in_bounds.extend(self.expand([r.id for _, r in xing.iterrows()]))
                 for site in in_bounds:
                     self.admin_match_type.setdefault(site.location_id, "polygon")
@@ -1336,11 +1355,12 @@ class MatchEvaluator:
         logger.debug("Finding the most specific combination of sites")
         if sites is None or sites == self.sites:
             sites = self.sites[:]
-        combinations = []
-        for group in self.find_combinations(sites):
-            geom = self.encompass_sites(group)
-            combinations.append((geom, group))
-        combinations.sort(key=lambda c: c[0].radius_km)
+        groups = list(self.group_by_name(sites).values())
+        if len(groups) < 2:
+            raise ValueError("Sites must match at least two names to be combined")
+        combinations = self._search_combinations(groups, smallest=True)
+        if not combinations:
+            raise ValueError("No combination of distinct sites found")
         geom, selected = combinations[0]
         return geom, selected
 
@@ -1384,7 +1404,7 @@ class MatchEvaluator:
         if len(geoms) == 1:
             return geoms[0]
         return GeoMetry(
-            GeometryCollection([g.geom.iloc[0] for g in geoms]).convex_hull,
+            GeometryCollection([g.shape for g in geoms]).convex_hull,
             crs=geoms[0].crs,
         )
 
@@ -1410,12 +1430,19 @@ class MatchEvaluator:
             return geom, True
         return geom, False
 
-    def encompass_combinations(self, sites=None):
+    def encompass_combinations(self, sites=None, max_dist_km=None):
         """Selects combination including each name with smallest radius"""
         if sites is None or sites == self.sites:
             sites = self.sites[:]
+        if max_dist_km is None:
+            max_dist_km = self.max_dist_km
+        try:
+            groups = self.find_combinations(sites, max_dist_km)
+        except ValueError:
+            # Too many candidates to tell whether only one combination exists
+            return None
         combinations = []
-        for group in self.find_combinations(sites):
+        for group in groups:
             encompassed, encompassing = self.encompassed(group)
             if encompassed:
                 combinations.append((encompassed, encompassing))
@@ -1452,16 +1479,15 @@ class MatchEvaluator:
         if len(groups) > 1:
             logger.debug("Looking for mutually intersecting site")
             intersections = {}
-            for i, site in enumerate(sites):
-                sid = site.location_id
-                intersections.setdefault(sid, []).append(sid)
-                for other in sites[i + 1 :]:
-                    if site.resize(RESIZE, how="rel").intersects(
-                        other.resize(RESIZE, how="rel")
-                    ):
-                        oid = other.location_id
-                        intersections.setdefault(sid, []).append(oid)
-                        intersections.setdefault(oid, []).append(sid)
+            for site in sites:
+                intersections.setdefault(site.location_id, []).append(site.location_id)
+            resized = [s.resize(RESIZE, how="rel") for s in sites]
+            for i, j in query_pairs(resized):
+                if i < j:
+                    sid = sites[i].location_id
+                    oid = sites[j].location_id
+                    intersections[sid].append(oid)
+                    intersections[oid].append(sid)
             # Group each result by how many names it matches
             matched = {}
             for group in intersections.values():
@@ -1506,8 +1532,9 @@ class MatchEvaluator:
             for i, site in enumerate(sites):
                 radii[site.location_id] = site.radius_km
                 others = [s for s in sites[i + 1 :] if self.key(s) != self.key(site)]
-                for other in others:
-                    dist_km = site.min_dist_km(other)
+                if not others:
+                    continue
+                for other, dist_km in zip(others, site.min_dists_km(others)):
                     dists.setdefault(site.location_id, []).append(dist_km)
                     dists.setdefault(other.location_id, []).append(dist_km)
             outliers = []
@@ -1630,24 +1657,112 @@ class MatchEvaluator:
                 logger.debug(f"{name} matches {len(group)} records")
         return groups
 
-    def find_combinations(self, sites=None):
-        """Creates combinations of sites grouped by name"""
+    def find_combinations(self, sites=None, max_dist_km=None):
+        """Creates combinations of sites grouped by name
+
+        Parameters
+        ----------
+        sites : list of Site
+            the sites to combine. Defaults to all sites.
+        max_dist_km : float
+            the maximum radius of a combination. If given, partial combinations
+            are discarded as soon as their extent exceeds this radius.
+
+        Returns
+        -------
+        list of tuple
+            combinations including one site matching each name
+
+        Raises
+        ------
+        ValueError
+            if the search stops after max_combinations partial combinations
+        """
         if sites is None or sites == self.sites:
             sites = self.sites[:]
         groups = list(self.group_by_name(sites).values())
         if len(groups) > 1:
-            groups = list(itertools.product(*groups))
-            # Remove combinations that include duplicates
-            nums = [[s.location_id for s in grp] for grp in groups]
-            indexes = []
-            for i, grp in enumerate(nums):
-                if len(grp) != len(set(grp)) or grp in nums[:i]:
-                    indexes.append(i)
-            for i in sorted(indexes)[::-1]:
-                del groups[i]
-            return groups
+            return [c for _, c in self._search_combinations(groups, max_dist_km)]
         return []
 
+    def _search_combinations(self, groups, max_dist_km=None, smallest=False):
+        """Searches combinations of one site per group depth first
+
+        Partial combinations are pruned once the radius of their bounds exceeds
+        max_dist_km. The radius of the bounds can only grow as sites are added,
+        so no valid combination is lost. If smallest is True, the limit shrinks
+        to the radius of the best combination found so far and only the first
+        combination with the smallest radius is returned. The search fails after
+        visiting max_combinations partial combinations because the combinations
+        found by then may not be complete.
+
+        Returns
+        -------
+        list of tuple
+            (geometry, combination) for each combination found. The geometry is
+            only calculated if smallest is True.
+
+        Raises
+        ------
+        ValueError
+            if the search visits more than max_combinations partial combinations
+        """
+        # Remove duplicate sites from each group
+        unique = []
+        for group in groups:
+            sites = {}
+            for site in group:
+                sites.setdefault(site.location_id, site)
+            unique.append(list(sites.values()))
+        groups = unique
+
+        bounds = {}
+        if max_dist_km is not None or smallest:
+            for group in groups:
+                for site in group:
+                    bounds[site.location_id] = site.geometry.as_wgs84.shape.bounds
+
+        combinations = []
+        visited = 0
+        stack = [((), None)]
+        while stack:
+            combo, bbox = stack.pop()
+
+            # Evaluate complete combinations
+            if len(combo) == len(groups):
+                if not smallest:
+                    combinations.append((None, combo))
+                    continue
+                geom = self.encompass_sites(list(combo))
+                if not combinations or geom.radius_km < combinations[0][0].radius_km:
+                    combinations = [(geom, combo)]
+                    max_dist_km = geom.radius_km
+                continue
+
+            visited += 1
+            if visited > self.max_combinations:
+                raise ValueError(
+                    f"Too many candidates to encompass (stopped after"
+                    f" {self.max_combinations:,} partial combinations)"
+                )
+
+            # Extend the combination using sites from the next group. Children
+            # are added in reverse so they are popped in their original order.
+            loc_ids = {s.location_id for s in combo}
+            children = []
+            for site in groups[len(combo)]:
+                if site.location_id in loc_ids:
+                    continue
+                bbox_ = None
+                if bounds:
+                    bbox_ = _combine_bounds(bbox, bounds[site.location_id])
+                    if max_dist_km is not None and _radius_km(bbox_) > max_dist_km:
+                        continue
+                children.append((combo + (site,), bbox_))
+            stack.extend(children[::-1])
+
+        return combinations
+
     def interpret(self, sites, status, reject_similar=False):
         """Assigns an interpretation to a list of sites"""
         if status not in STATUSES:
@@ -1881,3 +1996,21 @@ class MatchEvaluator:
             shapes = [s for s in shapes if s not in adjacent]
             geom = unary_union([geom] + adjacent)
         return geom
+
+
+def _combine_bounds(bbox, other):
+    """Combines two bounding boxes"""
+    if bbox is None:
+        return other
+    return (
+        min(bbox[0], other[0]),
+        min(bbox[1], other[1]),
+        max(bbox[2], other[2]),
+        max(bbox[3], other[3]),
+    )
+
+
+def _radius_km(bbox):
+    """Estimates radius of a bounding box the same way as GeoMetry.radius_km"""
+    lon1, lat1, lon2, lat2 = bbox
+    return get_dist_km(lat1, lon1, lat2, lon2) / 2
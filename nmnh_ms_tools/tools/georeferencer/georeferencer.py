@@ -3,12 +3,19 @@ import datetime as dt
 import hashlib
 import json
 import logging
+import multiprocessing as mp
 import os
 import pprint as pp
 import re
 import shutil
 import sys
+import time
 import warnings
+from array import array
+from collections import ChainMap, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from multiprocessing.util import Finalize
 
 import numpy as np
 
@@ -22,14 +29,21 @@ from .pipes import (
     MatchOffshore,
     MatchPLSS,
 )
+from ...databases.admin import Session as AdminSession
+from ...databases.cache import flush_caches
+from ...databases.georef_job import CheckpointStore
+from ...databases.geonames import Session as GeoNamesSession
+from ...databases.helpers import reset_connections
 from ...records import RecordEncoder, Site
 from ...utils import (
     LazyAttr,
+    StageClock,
     as_list,
     clear_empty,
     configure_log,
     fast_hash,
     mutable,
+    set_stage_clock,
     skip_hashed,
     to_attribute,
 )
@@ -43,6 +57,17 @@ class Georeferencer:
     # Deferred class attributes are defined at the end of the file
     _site_attrs = None
 
+    # Stages and events included in the summary
+    summary_stages = (
+        "prepare",
+        "parse_locality",
+        "filter_records",
+        "map_admin",
+        "encompass",
+        "kml",
+    )
+    summary_counts = ("cache_hits", "cache_misses", "db_queries", "bot_requests")
+
     def __init__(
         self,
         records=None,
@@ -80,19 +105,27 @@ class Georeferencer:
         self.include_failed = True
         self.raise_on_error = False
         self.eval_params = {}
+        # Set number of worker processes used to georeference records. Records
+        # are sent to each worker in chunks of the given size.
+        self.processes = 1
+        self.chunk_size = 10
+        # Set number of results held in memory before they are appended to
+        # results_path. If 0, all results are held in memory.
+        self.stream_size = 0
+        self.results_path = "results.jsonl"
         # Set read params
         self.id_key = r".*"
         self.skip = skip
         self.limit = limit
         self.report = report
         self.callback = callback
+        # Set expected number of records, used to estimate time remaining
+        self.total = None
         # Initialize containers
         self.key = None
-        try:
-            with open("evaluated.json", encoding="utf-8") as f:
-                self.evaluated = json.load(f)
-        except:
-            self.evaluated = {}
+        # Results for each distinct site are stored in the job database so
+        # that an interrupted job can be resumed
+        self.evaluated = CheckpointStore()
         self.results = []
         self.misses = {}
         self.admin_failed = {}
@@ -100,6 +133,14 @@ class Georeferencer:
         self._index = 0
         self._loc_id = None
         self._notified = False
+        self._outcomes = None
+        self._start_time = None
+        self._succeeded = 0
+        self._cached = 0
+        self.counts = {"status": {}, "error": {}, "pipe": {}}
+        self.stages = StageClock()
+        # Initialize variables to track results written to results_path
+        self._streamed = 0
         # Capture any tests
         self.tests = self.read_tests(tests)
         # Get records
@@ -108,12 +149,14 @@ class Georeferencer:
     def __iter__(self):
         if self.require_coords:
             return iter(self.evaluated.values())
+        if self._streamed:
+            return chain(self._read_streamed(), self.results)
         return iter(self.results)
 
     def __len__(self):
         if self.require_coords:
             return len(self.evaluated)
-        return len(self.results)
+        return self._streamed + len(self.results)
 
     @property
     def coord_type(self):
@@ -164,42 +207,152 @@ class Georeferencer:
     def georeference(self):
         """Georeferences a set of records"""
         logger.info(f"Limit is {self.limit}")
+        if self._start_time is None:
+            self._start_time = time.monotonic()
         if self.skip:
             logger.debug(f"Skipping first {self.skip:,} records...")
+        if self.processes > 1 and not self.tests:
+            try:
+                context = mp.get_context("fork")
+            except ValueError:
+                warnings.warn(
+                    "Parallel georeferencing requires the fork start method."
+                    " Georeferencing sequentially instead."
+                )
+            else:
+                self._georeference_parallel(context)
+                if self.stream_size:
+                    self.flush()
+                self.evaluated.flush()
+                return
         for i, rec in enumerate(self.records):
-            self._notified = False
-            self._index = i
-            self._loc_id = self.get_location_id(rec)
+            stop = not self._georeference_record(i, rec)
+
+            if not stop and not self._notified:
+                raise RuntimeError("Notify did not run")
+
+            if self.stream_size and len(self.results) >= self.stream_size:
+                self.flush()
 
-            if i and not i % 1000:
-                print(f"{i:,} records processed")
-                logger.debug(f"{i:,} records processed")
+            if stop or self.limit and len(self) >= self.limit:
+                break
+        if self.stream_size:
+            self.flush()
+        self.evaluated.flush()
+
+    def _georeference_record(self, i, rec):
+        """Georeferences a single row from the source data
+
+        Returns
+        -------
+        bool
+            False if the georeferencing job should stop, True otherwise
+        """
+        self._notified = False
+        self._index = i
+        self._loc_id = self.get_location_id(rec)
 
-            if self.tests and self._loc_id not in self.tests:
-                continue
+        if i and not i % 1000:
+            print(f"{i:,} records processed")
+            logger.debug(f"{i:,} records processed")
 
-            kill = False
-            try:
-                site = self.build_site(rec)
-                self.georeference_one(site)
-            except Exception as e:
-                self.handle_exception(e, rec)
-                site = pp.pformat(rec)
-                kill = True
-            finally:
-                # Check if tests are exhausted
-                if self.tests:
-                    logger.debug(f"Index: {i + self.skip}")
-                    logger.debug(site)
-                    self.tests.remove(self._loc_id)
-                    if not self.tests or kill:
+        if self.tests and self._loc_id not in self.tests:
+            # Notify is not called for skipped records
+            self._notified = True
+            return True
+
+        kill = False
+        stages = StageClock()
+        previous = set_stage_clock(stages)
+        try:
+            site = self.build_site(rec)
+            self.georeference_one(site)
+        except Exception as e:
+            self.handle_exception(e, rec)
+            site = pp.pformat(rec)
+            kill = True
+        finally:
+            set_stage_clock(previous)
+            self.stages.add(stages)
+            logger.debug(f"{self._loc_id}: Stages: {stages.to_dict()}")
+            # Check if tests are exhausted
+            if self.tests:
+                logger.debug(f"Index: {i + self.skip}")
+                logger.debug(site)
+                self.tests.remove(self._loc_id)
+                if not self.tests or kill:
+                    return False
+        return True
+
+    def _georeference_parallel(self, context):
+        """Georeferences a set of records using a pool of worker processes
+
+        Each worker georeferences its records using a copy of this object
+        made when the worker is forked. Results are merged back into this
+        object in the order the records were read.
+        """
+        records = enumerate(self.records)
+        # Workers can only see checkpoints that have been written. Caches are
+        # written too so that workers do not inherit and rewrite pending pairs.
+        self.evaluated.flush()
+        flush_caches()
+        with ProcessPoolExecutor(
+            self.processes,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self,),
+        ) as executor:
+            while True:
+                batch = list(islice(records, self.processes * self.chunk_size))
+                if not batch:
+                    break
+                for output in executor.map(
+                    _georeference_worker, batch, chunksize=self.chunk_size
+                ):
+                    self._merge_output(output)
+                    if self.stream_size and len(self.results) >= self.stream_size:
+                        self.flush()
+                    if self.limit and len(self) >= self.limit:
+                        executor.shutdown(cancel_futures=True)
                         return
 
-            if not self._notified:
-                raise RuntimeError("Notify did not run")
+    def _merge_output(self, output):
+        """Merges the output from a worker process into this object"""
+        self._index = output["index"]
+        self._loc_id = output["location_id"]
+        self.evaluated.update(output["evaluated"])
+        self.results.extend(output["results"])
+        for key, count in output["admin_failed"].items():
+            self.admin_failed[key] = self.admin_failed.get(key, 0) + count
+        self.stages.add(output["stages"])
+        self._notified = False
+        for outcome in output["outcomes"]:
+            self.notify(*outcome)
+        if not self._notified:
+            raise RuntimeError("Notify did not run")
+
+    def flush(self):
+        """Appends results held in memory to results_path
+
+        Results are written as one JSON object per line and removed from
+        memory.
+        """
+        if not self.results:
+            return
+        # Overwrite results from previous jobs when the first batch is written
+        mode = "a" if self._streamed else "w"
+        with open(self.results_path, mode, encoding="utf-8") as f:
+            for result in self.results:
+                f.write(json.dumps(result, cls=RecordEncoder) + "\n")
+        logger.debug(f"Wrote {len(self.results):,} results to {self.results_path}")
+        self._streamed += len(self.results)
+        self.results = []
 
-            if len(self) >= self.limit:
-                break
+    def _read_streamed(self):
+        """Reads results written to results_path"""
+        with open(self.results_path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
 
     # @clock
     def georeference_one(self, site):
@@ -209,7 +362,7 @@ class Georeferencer:
             result = self.evaluated[self.key].copy()
             result["location_id"] = site.location_id
             self.results.append(result)
-            self.notify("Retrieved from cache")
+            self.notify("Retrieved from cache", status=result["result"])
             return result
         except KeyError:
             try:
@@ -280,7 +433,7 @@ class Georeferencer:
         )
         self.evaluated[self.key] = result
         self.results.append(result)
-        self.notify("Succeeded")
+        self.notify("Succeeded", pipes=list(evaluator.pipe_matches))
         return result
 
     def read_gbif(self, encoding="utf-8-sig"):
@@ -391,7 +544,9 @@ class Georeferencer:
             ):
                 warnings.warn(str(exc))
             else:
-                self.notify(f"Failed to parse site: {exc}")
+                self.notify(
+                    f"Failed to parse site: {exc}", error=exc.__class__.__name__
+                )
                 logger.error(f"{location_id}: {exc}", exc_info=exc)
                 if self.raise_on_error:
                     raise exc
@@ -412,7 +567,7 @@ class Georeferencer:
             self.results.append(result)
             if evaluator is not None:
                 evaluator.kml(f"miss_{site.location_id}", refsite=site)
-        self.notify(f"Failed: {exc}")
+        self.notify(f"Failed: {exc}", error=exc.__class__.__name__)
         # Count misses on admin names
         if (
             "Could not map admin" in str(exc)
@@ -444,7 +599,15 @@ class Georeferencer:
                 raise exc
 
     def summarize(self, archive):
-        """Summarizes performance for sites with known coordinates"""
+        """Summarizes performance for sites with known coordinates
+
+        Totals are calculated from the distinct sites in the job database,
+        which are read one at a time, so the summary is the same whether or
+        not results are streamed to results_path.
+        """
+        totals = self._init_totals()
+        for result in self.evaluated.values():
+            self._tally(totals, result)
         timestamp = archive.split("_", 1)[0]
         filename = archive.split("_", 1)[-1].rsplit("_", 1)[0]
         summary = dict(
@@ -452,35 +615,20 @@ class Georeferencer:
             filename=filename,
             archive=archive,
             total=len(self),
-            has_coords=0,
-            found=0,
-            within_unc=0,
-            within_est=0,
+            has_coords=totals["has_coords"],
+            found=totals["found"],
+            within_unc=totals["within_unc"],
+            within_est=totals["within_est"],
             dist_km_median=0,
             radius_km_median=0,
             dist_km_mean=0,
             radius_km_mean=0,
-            dist_km=[],
-            radius_km=[],
+            dist_km=totals["dist_km"],
+            radius_km=totals["radius_km"],
         )
-        for result in self.evaluated.values():
-            if result["found"]:
-                summary["found"] += 1
-            if result["has_coords"]:
-                summary["has_coords"] += 1
-            try:
-                summary["radius_km"].append(result["radius_km"])
-                summary["dist_km"].append(result["dist_km"])
-                if result["within_unc"]:
-                    summary["within_unc"] += 1
-                if result["within_est"]:
-                    summary["within_est"] += 1
-            except KeyError as e:
-                pass
         for key in list(summary.keys()):
             vals = summary[key]
             if key in {"dist_km", "radius_km"}:
-                vals = [n for n in vals if n is not None]
                 summary[key + "_median"] = self._median(vals) if vals else ""
                 summary[key + "_mean"] = self._mean(vals) if vals else ""
                 del summary[key]
@@ -491,8 +639,13 @@ class Georeferencer:
                 else:
                     summary[key] = "-"
             elif key == "found":
-                count = len(self.evaluated)
-                summary[key] = f"{100 * vals / count:.1f}%"
+                count = totals["count"]
+                summary[key] = f"{100 * vals / count:.1f}%" if count else "-"
+        # Add total seconds spent in each stage and counts of events
+        for stage in self.summary_stages:
+            summary[f"{stage}_s"] = f"{self.stages.times.get(stage, 0):.1f}"
+        for key in self.summary_counts:
+            summary[key] = self.stages.counts.get(key, 0)
         return summary
 
     def archive(self, path="archived", min_results=100):
@@ -538,8 +691,11 @@ class Georeferencer:
                 writer.writerow(keys)
                 for rec in self:
                     writer.writerow([self._prep(rec.get(k, "")) for k in keys])
-            # Copy KML and database files to archive directory
+            # Copy KML, results, and database files to archive directory
             shutil.move("kml", os.path.join(path, archive))
+            self.evaluated.close()
+            if self._streamed:
+                shutil.move(self.results_path, os.path.join(path, archive))
             shutil.move("job.sqlite", os.path.join(path, archive))
             # Copy clocked
             try:
@@ -578,16 +734,80 @@ class Georeferencer:
         else:
             configure_log("geo", level=level, stream=stream)
 
-    def notify(self, outcome):
-        succeeded = len([r for r in self.results if r["result"] == "success"])
+    def notify(self, outcome, status=None, error=None, pipes=None):
+        """Reports and counts the outcome of georeferencing a record
+
+        Parameters
+        ----------
+        outcome : str
+            description of the outcome
+        status : str
+            one of success, failed, or skipped. Inferred from outcome if not
+            given.
+        error : str
+            name of the exception class raised when the record failed
+        pipes : list of str
+            names of the pipes that matched features in the record
+        """
+        # Worker processes pass outcomes back to the main process to report
+        if self._outcomes is not None:
+            self._outcomes.append((outcome, status, error, pipes))
+            self._notified = True
+            return
+        if status is None:
+            if outcome == "Succeeded":
+                status = "success"
+            elif outcome.startswith("Skipped"):
+                status = "skipped"
+            else:
+                status = "failed"
+        counts = self.counts
+        counts["status"][status] = counts["status"].get(status, 0) + 1
+        if status == "success":
+            self._succeeded += 1
+        if outcome == "Retrieved from cache":
+            self._cached += 1
+        if error:
+            counts["error"][error] = counts["error"].get(error, 0) + 1
+        for pipe in pipes or []:
+            counts["pipe"][pipe] = counts["pipe"].get(pipe, 0) + 1
         msg = (
             f"{self._loc_id}: {outcome}"
-            f" ({succeeded:,}/{self._index + 1:,} succeeded)"
+            f" ({self._succeeded:,}/{self._index + 1:,} succeeded)"
         )
         print(msg)
         logger.info(msg)
         self._notified = True
 
+    def progress(self):
+        """Summarizes the progress of the current job
+
+        Returns
+        -------
+        dict
+            number of records processed and succeeded, elapsed time, rate in
+            records per second, estimated seconds remaining, success ratio,
+            and copies of the counts by status, error class, and pipe
+        """
+        processed = sum(self.counts["status"].values())
+        elapsed = time.monotonic() - self._start_time if self._start_time else 0
+        rate = processed / elapsed if elapsed else 0
+        eta = None
+        if self.total and rate:
+            eta = max(self.total - processed, 0) / rate
+        return {
+            "processed": processed,
+            "succeeded": self._succeeded,
+            "cached": self._cached,
+            "elapsed": elapsed,
+            "rate": rate,
+            "eta": eta,
+            "success_ratio": self._succeeded / processed if processed else 0,
+            "status": self.counts["status"].copy(),
+            "error": self.counts["error"].copy(),
+            "pipe": self.counts["pipe"].copy(),
+        }
+
     def build_site(self, rowdict):
         from ...bots.geonames import GeoNamesBot
 
@@ -638,6 +858,39 @@ class Georeferencer:
             json.dumps(site_dict, sort_keys=True, cls=RecordEncoder).lower()
         )
 
+    @staticmethod
+    def _init_totals():
+        """Creates the running totals used to summarize results"""
+        return dict(
+            count=0,
+            found=0,
+            has_coords=0,
+            within_unc=0,
+            within_est=0,
+            dist_km=array("d"),
+            radius_km=array("d"),
+        )
+
+    @staticmethod
+    def _tally(totals, result):
+        """Adds a single result to a set of running totals
+
+        Missing keys are treated as empty because results from other sources,
+        like a resumed job, may not include every key.
+        """
+        totals["count"] += 1
+        if result.get("result") == "success":
+            totals["found"] += 1
+            for key in ("dist_km", "radius_km"):
+                if result.get(key) is not None:
+                    totals[key].append(result[key])
+            if result.get("within_unc"):
+                totals["within_unc"] += 1
+            if result.get("within_est"):
+                totals["within_est"] += 1
+        if result.get("has_coords"):
+            totals["has_coords"] += 1
+
     @staticmethod
     def _prep(val):
         """Conditionally formats a string"""
@@ -655,5 +908,51 @@ class Georeferencer:
         return f"{np.median(vals):.1f} ± {iqr / 2:.1f} km"
 
 
+# Georeferencer used by the current worker process
+_worker = None
+# Number of recent results kept by each worker process
+_MAX_RECENT = 1000
+
+
+def _init_worker(geo):
+    """Prepares a forked process to georeference records"""
+    global _worker
+    reset_connections(readonly=[AdminSession, GeoNamesSession])
+    geo.evaluated.reopen()
+    # Workers exit without running atexit handlers, so pending cache writes are
+    # made by a multiprocessing finalizer, which runs when the worker exits
+    Finalize(None, flush_caches, exitpriority=10)
+    # Results for the current record are collected in the first map, then
+    # moved to the second map so they can be reused by this worker. Older
+    # results are read from the job database once the parent has written them.
+    geo.evaluated = ChainMap({}, OrderedDict(), geo.evaluated)
+    _worker = geo
+
+
+def _georeference_worker(item):
+    """Georeferences a single record in a worker process"""
+    geo = _worker
+    recent = geo.evaluated.maps[1]
+    recent.update(geo.evaluated.maps[0])
+    while len(recent) > _MAX_RECENT:
+        recent.popitem(last=False)
+    geo.evaluated.maps[0] = {}
+    geo.results = []
+    geo.admin_failed = {}
+    geo.stages = StageClock()
+    geo._outcomes = []
+    i, rec = item
+    geo._georeference_record(i, rec)
+    return {
+        "index": i,
+        "location_id": geo._loc_id,
+        "evaluated": geo.evaluated.maps[0],
+        "results": geo.results,
+        "admin_failed": geo.admin_failed,
+        "stages": geo.stages,
+        "outcomes": geo._outcomes,
+    }
+
+
 # Define deferred class attributes
 LazyAttr(Georeferencer, "_site_attrs", lambda: Site({}).attributes)
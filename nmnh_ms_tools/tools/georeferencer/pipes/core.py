@@ -10,7 +10,7 @@ from ....tools.geographic_names.parsers import (
     FeatureParser,
     MultiFeatureParser,
 )
-from ....utils import LazyAttr, LocStandardizer, as_list, mutable
+from ....utils import LazyAttr, LocStandardizer, as_list, clock_stage, mutable
 
 
 logger = logging.getLogger(__name__)
@@ -100,6 +100,7 @@ class MatchPipe:
         #    setattr(self.std_site, attr, self.std(getattr(self.std_site, attr)))
         return self
 
+    @clock_stage("prepare")
     def prepare(self, field):
         """Parses the current field"""
         self.field = field["field"]
@@ -26,5 +26,5 @@ class MatchCustom(MatchGeoNames):
         return
 
     @staticmethod
-    def enable_sqlite_cache(path=None):
-        MatchCustom.cache = RecordCache(path)
+    def enable_sqlite_cache(path=None, full=False):
+        MatchCustom.cache = RecordCache(path, full=full)
@@ -12,7 +12,7 @@ from ....databases.geohelper import get_preferred
 from ....records import Site
 from ....tools.geographic_names.caches import RecordCache
 from ....tools.geographic_names.parsers.modified import has_direction
-from ....utils import LazyAttr, as_list, mutable
+from ....utils import LazyAttr, as_list, clock_stage, count_stage, mutable
 
 
 logger = logging.getLogger(__name__)
@@ -197,11 +197,13 @@ class MatchGeoNames(MatchPipe):
                         cloned.sources = site.sources
                     cached.append(cloned)
                 logger.debug(f"Resolved from cache: {key}")
+                count_stage("cache_hits")
                 return cached
             except ValueError:
                 logger.error(f"Could not restore cached records: {key}")
             except KeyError:
                 pass
+            count_stage("cache_misses")
         logger.debug(f"Searching for {key[:256]}...")
         # Create and filter a list of sites. If no records found, retry the
         # search with fewer constraints but require any remaining records to
@@ -225,6 +227,7 @@ class MatchGeoNames(MatchPipe):
             self.cache[key] = records
         return records
 
+    @clock_stage("filter_records")
     def filter_records(self, records, name, codes=None, min_size=0, std_func=None):
         """Filters list of raw results, returning a list of matching sites"""
         if codes is None:
@@ -435,18 +438,20 @@ class MatchGeoNames(MatchPipe):
             # webservice data. Default to filling that data in, although it does
             # slow down the process a lot.
             kwargs.setdefault("fill_record", True)
+            count_stage("db_queries")
             return self.local.get_json(geoname_id, **kwargs)
         return self.bot.get_json(geoname_id)
 
     def search_json(self, st_name, **kwargs):
         """Retrieves records mathing the given search parameters"""
         if self.use_local:
+            count_stage("db_queries")
             return self.local.search_json(st_name, **kwargs)
         return self.bot.search_json(st_name, **kwargs).all()
 
     @staticmethod
-    def enable_sqlite_cache(path=None):
-        MatchGeoNames.cache = RecordCache(path)
+    def enable_sqlite_cache(path=None, full=False):
+        MatchGeoNames.cache = RecordCache(path, full=full)
         MatchGeoNames.use_cache = True
 
 
@@ -16,7 +16,17 @@ with _ImportClock("utils"):
         str_class,
         set_immutable,
     )
-    from .clock import Clocker, clock, clock_all_methods, clock_snippet, report
+    from .clock import (
+        Clocker,
+        StageClock,
+        clock,
+        clock_all_methods,
+        clock_snippet,
+        clock_stage,
+        count_stage,
+        report,
+        set_stage_clock,
+    )
     from .coords import (
         Coordinate,
         Latitude,
@@ -69,6 +79,7 @@ with _ImportClock("utils"):
         get_dist_km_geolib,
         get_dist_km_haversine,
         get_dist_km_pyproj,
+        get_dists_km,
         pm_longitudes,
         slope,
         sort_geoms,
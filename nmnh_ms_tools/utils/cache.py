@@ -1,11 +1,22 @@
+import csv
+import os
 from pathlib import Path
 
 import pandas as pd
 
 
 class PersistentLookup:
+    """Dict-like lookup persisted to a CSV file
 
-    dfs = {}
+    Lookups are served from a dict shared by all instances using the same file.
+    New and changed values are appended to the end of the CSV instead of
+    rewriting the whole file, and the file is compacted once it contains more
+    superseded rows than current ones. Keys and values are stored as strings.
+    """
+
+    lookups = {}
+    rows = {}
+    min_compact = 1000
 
     def __init__(self, cache_name="lookup.csv"):
         self.cache_name = cache_name
@@ -16,58 +27,104 @@ class PersistentLookup:
         return Path(self.cache_name).resolve()
 
     @property
-    def df(self):
-        df = self.__class__.dfs.get(self.path)
-        if df is None:
+    def lookup(self):
+        lookup = self.__class__.lookups.get(self.path)
+        if lookup is None:
+            lookup = {}
+            rows = 0
             try:
-                df = pd.read_csv(self.cache_name).set_index("key")
-                self.__class__.dfs[self.path] = df
+                with open(self.path, encoding="utf-8-sig", newline="") as f:
+                    reader = csv.reader(f)
+                    next(reader, None)
+                    for row in reader:
+                        if row:
+                            lookup[row[0]] = row[1]
+                            rows += 1
             except FileNotFoundError:
                 pass
-        return df
+            self.__class__.lookups[self.path] = lookup
+            self.__class__.rows[self.path] = rows
+        return lookup
+
+    @property
+    def df(self):
+        if not self.lookup:
+            return None
+        df = pd.DataFrame(
+            {"key": list(self.lookup), "value": list(self.lookup.values())}
+        )
+        return df.set_index("key")
 
     @df.setter
     def df(self, df):
-        self.__class__.dfs[self.path] = df
+        self.__class__.lookups[self.path] = {
+            str(key): str(val) for key, val in zip(df.index, df["value"])
+        }
+        self.save()
 
     def __str__(self):
-        return str(dict(zip(self.df.index, self.df["value"])))
+        return str(self.lookup)
 
     def __repr__(self):
-        return repr(dict(zip(self.df.index, self.df["value"])))
+        return repr(self.lookup)
 
     def __setitem__(self, key, val):
-        df = pd.DataFrame([{"key": key, "value": val}]).set_index("key")
-        if self.df is None:
-            self.df = df
-        else:
-            try:
-                self.df = pd.concat([self.df, df], verify_integrity=True)
-            except ValueError:
-                self.df.loc[self.df.index == key, "value"] = val
-        self.save()
+        self.update({key: val})
 
     def __getitem__(self, key):
-        if self.df is None:
-            raise KeyError(repr(key))
         try:
-            return self.df[self.df.index == key].iloc[0]["value"]
-        except IndexError:
+            return self.lookup[str(key)]
+        except KeyError:
             raise KeyError(repr(key))
 
     def __delitem__(self, key):
-        if self.df is None:
+        try:
+            del self.lookup[str(key)]
+        except KeyError:
             raise KeyError(repr(key))
-        self.df = self.df.drop(index=key)
         self.save()
 
+    def __contains__(self, key):
+        return str(key) in self.lookup
+
+    def __len__(self):
+        return len(self.lookup)
+
     def update(self, *args, **kwargs):
-        self._save_on_change = False
+        lookup = self.lookup
+        changed = {}
         for key, val in dict(*args, **kwargs).items():
-            self[key] = val
-        self._save_on_change = True
-        self.save()
+            key = str(key)
+            val = str(val)
+            if lookup.get(key) != val:
+                lookup[key] = val
+                changed[key] = val
+        if changed and self._save_on_change:
+            self._append(changed)
 
     def save(self):
+        """Rewrites the CSV file so that it contains one row per key"""
         if self._save_on_change:
-            self.df.to_csv(self.cache_name, encoding="utf-8-sig")
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8-sig", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["key", "value"])
+                writer.writerows(self.lookup.items())
+            os.replace(tmp, self.path)
+            self.__class__.rows[self.path] = len(self.lookup)
+
+    def compact(self):
+        """Rewrites the CSV file if it contains too many superseded rows"""
+        stale = self.__class__.rows.get(self.path, 0) - len(self.lookup)
+        if stale > max(len(self.lookup), self.min_compact):
+            self.save()
+
+    def _append(self, changed):
+        """Appends changed key-value pairs to the CSV file"""
+        if not self.path.exists():
+            self.save()
+            return
+        with open(self.path, "a", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerows(changed.items())
+        self.__class__.rows[self.path] += len(changed)
+        self.compact()
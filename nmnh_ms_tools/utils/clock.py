@@ -3,11 +3,17 @@
 import csv
 import datetime as dt
 import inspect
+import time
 from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import wraps
 
 
 CLOCKED = {}
+# The active stage clock is tracked per thread. New threads, including those
+# used by Bot.map, start without an active stage clock.
+_stage_clock = ContextVar("stage_clock", default=None)
 Call = namedtuple("Call", ["function", "args", "kwargs", "start", "end"])
 Result = namedtuple("Result", ["function", "count", "total", "mean", "max"])
 
@@ -26,6 +32,41 @@ class Clocker:
         update_results(Call(self.name, [], {}, self.start, dt.datetime.now()))
 
 
+class StageClock:
+    """Accumulates durations of named stages and counts of named events
+
+    Stages may overlap, so the time spent in a stage includes the time spent
+    in any stages it calls. A stage that is entered again before it exits,
+    for example, by a recursive method, is only timed once.
+    """
+
+    def __init__(self):
+        self.times = {}
+        self.calls = {}
+        self.counts = {}
+        self._running = set()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_running"] = set()
+        return state
+
+    def add(self, other):
+        """Adds the times and counts from another stage clock"""
+        for attr in ("times", "calls", "counts"):
+            totals = getattr(self, attr)
+            for key, val in getattr(other, attr).items():
+                totals[key] = totals.get(key, 0) + val
+
+    def to_dict(self):
+        """Returns the times, calls, and counts as a dict"""
+        return {
+            "times": self.times.copy(),
+            "calls": self.calls.copy(),
+            "counts": self.counts.copy(),
+        }
+
+
 def clock(func):
     """Clocks the decorated function"""
 
@@ -47,6 +88,53 @@ def clock_snippet(name):
     return Clocker(name)
 
 
+@contextmanager
+def clock_stage(name):
+    """Times a stage using the active stage clock
+
+    Can be used as a context manager or a decorator. Does nothing if no
+    stage clock is active.
+    """
+    stage_clock = _stage_clock.get()
+    if stage_clock is None or name in stage_clock._running:
+        yield
+        return
+    stage_clock._running.add(name)
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_clock._running.discard(name)
+        duration = time.perf_counter() - start_time
+        stage_clock.times[name] = stage_clock.times.get(name, 0) + duration
+        stage_clock.calls[name] = stage_clock.calls.get(name, 0) + 1
+
+
+def count_stage(name, num=1):
+    """Counts an event using the active stage clock"""
+    stage_clock = _stage_clock.get()
+    if stage_clock is not None:
+        stage_clock.counts[name] = stage_clock.counts.get(name, 0) + num
+
+
+def set_stage_clock(stage_clock):
+    """Sets the active stage clock, returning the previous one
+
+    Parameters
+    ----------
+    stage_clock : StageClock
+        clock used to time stages. If None, stages are not timed.
+
+    Returns
+    -------
+    StageClock
+        the previously active stage clock
+    """
+    previous = _stage_clock.get()
+    _stage_clock.set(stage_clock)
+    return previous
+
+
 def update_results(call):
     """Updates results for clocked function"""
     duration = (call.end - call.start).total_seconds()
@@ -125,6 +125,40 @@ def get_dist_km_pyproj(lat1, lon1, lat2, lon2):
     return dist_km
 
 
+def get_dists_km(lats1, lons1, lats2, lons2):
+    """Calculates distances in km between arrays of points using pyproj.Geod
+
+    Arrays are broadcast against each other, so passing a column and a row
+    returns the distance between every pair of points.
+
+    Parameters
+    ----------
+    lats1, lons1 : array-like
+        coordinates of the first set of points
+    lats2, lons2 : array-like
+        coordinates of the second set of points
+
+    Returns
+    -------
+    numpy.ndarray
+        distances in km with the broadcast shape of the inputs
+    """
+    arrs = np.broadcast_arrays(
+        *[np.asarray(a, dtype=float) for a in (lats1, lons1, lats2, lons2)]
+    )
+    lats1, lons1, lats2, lons2 = [a.ravel() for a in arrs]
+    # Normalize longitudes to between -180 and 180 as in pm_longitudes
+    lons1, lons2 = [
+        np.where(a > 180, a - 360, np.where(a < -180, a + 360, a))
+        for a in (lons1, lons2)
+    ]
+    _, _, dists_m = GEODESIC_PYPROJ.inv(lons1, lats1, lons2, lats2)
+    dists_km = np.asarray(dists_m).reshape(arrs[0].shape) / 1000
+    if np.isnan(dists_km).any():
+        raise ValueError("Invalid distance")
+    return dists_km
+
+
 def translate(lats, lons, bearings, dists_km):
     """Calculates point at a distance along a bearing"""
     return translate_pyproj(lats, lons, bearings, dists_km)
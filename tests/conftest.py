@@ -23,6 +23,7 @@ from nmnh_ms_tools.databases.admin import (
     AdminNames,
     init_db as init_admin_db,
 )
+from nmnh_ms_tools.databases.admin_polygons import init_db as init_admin_polygons_db
 from nmnh_ms_tools.databases.custom import (
     CustomFeatures,
     init_db as init_custom_db,
@@ -81,6 +82,9 @@ from_csv(
     dtype=str,
 )
 
+# Initialize admin polygon index
+init_admin_polygons_db(":memory:")
+
 # Initialize custom feature database
 init_custom_db(":memory:")
 CustomFeatures().from_csv(os.path.join(TEST_DIR, "db_custom.csv"))
@@ -1,7 +1,12 @@
 """Tests geographic name parsers"""
 
+import gc
+import os
+import threading
+
 import pytest
 
+from nmnh_ms_tools.databases.cache import CacheDict, flush_caches
 from nmnh_ms_tools.databases.geonames import (
     GeoNamesFeatures,
     AllCountries,
@@ -28,6 +33,94 @@ def test_locality_cache():
         assert cache[i] == rec
 
 
+def test_cache_dict(tmp_path):
+    cache = CacheDict()
+    cache.init_db(str(tmp_path / "cache.sqlite"))
+    cache.max_recent = 3
+    cache.max_pending = 4
+    for i in range(3):
+        cache[str(i)] = str(i)
+    # Reading the oldest key should keep it in memory
+    assert cache["0"] == "0"
+    cache["3"] = "3"
+    assert list(cache.recent) == ["2", "0", "3"]
+    # Pairs are written in a batch once max_pending is reached
+    assert not cache.pending
+    cache["4"] = "4"
+    cache["5"] = "5"
+    assert cache.pending == {"4": "4", "5": "5"}
+    # Evicted and pending keys can still be retrieved without writing
+    assert cache["1"] == "1"
+    assert cache["2"] == "2"
+    assert list(cache.recent) == ["5", "1", "2"]
+    assert cache["4"] == "4"
+    assert cache.pending == {"4": "4", "5": "5"}
+    cache.close()
+    assert cache["5"] == "5"
+    with pytest.raises(KeyError):
+        cache["6"]
+
+
+def test_cache_dict_miss(tmp_path):
+    cache = CacheDict()
+    cache.init_db(str(tmp_path / "cache.sqlite"))
+    for i in range(10):
+        with pytest.raises(KeyError):
+            cache[str(i)]
+        cache[str(i)] = str(i)
+    # Misses do not write pending pairs to the database
+    assert len(cache.pending) == 10
+    cache.close()
+    assert not cache.pending
+
+
+def test_cache_dict_finalize(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = CacheDict()
+    cache.init_db(path)
+    cache["0"] = "0"
+    assert cache.pending
+    # Pending pairs are written when the cache is garbage collected
+    del cache
+    gc.collect()
+    cache = CacheDict()
+    cache.init_db(path)
+    assert cache["0"] == "0"
+    cache.close()
+
+
+def test_flush_caches(tmp_path):
+    cache = CacheDict()
+    cache.init_db(str(tmp_path / "cache.sqlite"))
+    cache["0"] = "0"
+    flush_caches()
+    assert not cache.pending
+    cache.close()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_cache_dict_fork(tmp_path):
+    cache = CacheDict()
+    cache.init_db(str(tmp_path / "cache.sqlite"))
+    held = threading.Event()
+
+    def hold_lock():
+        with cache._lock:
+            held.set()
+            threading.Event().wait(0.2)
+
+    thread = threading.Thread(target=hold_lock)
+    thread.start()
+    held.wait()
+    # The fork waits for the lock so that the child does not inherit it held
+    pid = os.fork()
+    if not pid:
+        os._exit(0 if cache._lock.acquire(timeout=1) else 1)
+    thread.join()
+    assert os.waitpid(pid, 0)[1] == 0
+    cache.close()
+
+
 # @pytest.mark.skip("Does not restore records correctly")
 def test_record_cache():
     cache = RecordCache(":memory:")
@@ -49,3 +142,55 @@ def test_record_cache():
     for i, rec in enumerate(records):
         for inst, other in zip(rec, cache[i]):
             assert inst == other
+
+
+def test_record_cache_fill_recent():
+    cache = RecordCache(":memory:")
+    records = {}
+    for row in GeoNamesFeatures().session.query(AllCountries).limit(10):
+        rec = Site(to_geonames_api(row))
+        rec.filter = {"name": f"fake site {row.geoname_id}"}
+        records[str(row.geoname_id)] = [rec]
+        cache[str(row.geoname_id)] = [rec]
+    cache.recent = {}
+    cache.fill_recent()
+    assert set(cache.recent) == set(records)
+    for key, rec in records.items():
+        assert cache.recent[key] == rec
+
+
+def test_record_cache_full():
+    cache = RecordCache(":memory:", full=True)
+    cache.max_recent = 5
+    records = []
+    for row in GeoNamesFeatures().session.query(AllCountries).limit(10):
+        rec = Site(to_geonames_api(row))
+        rec.filter = {"name": f"fake site {row.geoname_id}"}
+        rec.map_admin()
+        records.append([rec])
+    for i, rec in enumerate(records):
+        cache[i] = rec
+    for i, rec in enumerate(records):
+        for inst, other in zip(rec, cache[i]):
+            assert inst.to_dict(inst.terms) == other.to_dict(other.terms)
+            assert inst.filter == other.filter
+            assert inst.geometry.shape.equals_exact(other.geometry.shape, 0)
+            assert inst.geometry.crs == other.geometry.crs
+            assert inst.radius_km == other.radius_km
+            assert other.from_cache
+
+
+def test_record_cache_full_unreadable():
+    cache = RecordCache(":memory:", full=True)
+    row = GeoNamesFeatures().session.query(AllCountries).first()
+    cache.pending["0"] = b"\x00not a site"
+    with pytest.raises(KeyError):
+        cache["0"]
+    cache.pending["0"] = b"\x02not a site"
+    with pytest.raises(KeyError):
+        cache["0"]
+    # The unreadable row is removed so that the key can be cached again
+    rec = Site(to_geonames_api(row))
+    cache["0"] = [rec]
+    cache.recent.clear()
+    assert [s.location_id for s in cache["0"]] == [rec.location_id]
@@ -4,11 +4,13 @@ import json
 import os
 
 import pytest
+from sqlalchemy import text
 
 from nmnh_ms_tools.config import TEST_DIR
 from nmnh_ms_tools.databases.admin import AdminFeatures, AdminThesaurus
 from nmnh_ms_tools.databases.custom import CustomFeatures
-from nmnh_ms_tools.databases.geonames import GeoNamesFeatures
+from nmnh_ms_tools.databases.geonames import GeoNamesFeatures, Session, init_db
+from nmnh_ms_tools.databases.helpers import iter_keyset
 
 
 def test_get_json():
@@ -23,6 +25,53 @@ def test_get_many():
     expected = {r.geoname_id for r in rows}
     results = feat_db.get_many(expected)
     assert {r["geonameId"] for r in results} == expected
+    # Records are returned in the order given whether or not they are cached
+    geoname_ids = sorted(expected)
+    feat_db.api_cache.clear()
+    feat_db.get_many(geoname_ids[-2:])
+    results = feat_db.get_many(geoname_ids)
+    assert [r["geonameId"] for r in results] == geoname_ids
+
+
+def test_get_batch():
+    feat_db = GeoNamesFeatures()
+    feat_db.max_params = 2
+    rows = feat_db.session.query(feat_db.features.geoname_id)
+    expected = {r.geoname_id for r in rows}
+    feat_db.api_cache.clear()
+    results = feat_db.get_batch(list(expected) + [1])
+    assert set(results) == expected
+    assert all(results[k]["geonameId"] == k for k in results)
+    # Records are returned from the cache after the first call
+    assert feat_db.get_batch(expected) == results
+
+
+def test_get_json_cached():
+    feat_db = GeoNamesFeatures()
+    result = feat_db.get_json(5793639)
+    result["name"] = "Modified"
+    assert feat_db.get_json(5793639)["name"] == "Ellensburg"
+
+
+def test_precompute_api_records():
+    feat_db = GeoNamesFeatures()
+    session = feat_db.session
+    geoname_ids = [r.geoname_id for r in session.query(feat_db.features.geoname_id)]
+    expected = feat_db.get_many(geoname_ids)
+    feat_db.precompute_api_records()
+    try:
+        assert feat_db.has_api_records
+        feat_db.api_cache.clear()
+        assert feat_db.get_many(geoname_ids) == expected
+    finally:
+        feat_db.clear_api_records()
+    assert not feat_db.has_api_records
+    session.close()
+
+
+def test_precompute_api_records_undefined():
+    with pytest.raises(ValueError, match="No api_records table"):
+        CustomFeatures().precompute_api_records()
 
 
 def test_search_json():
@@ -71,6 +120,42 @@ def test_update_alt_names(feat_db_class):
     session.close()
 
 
+def test_iter_keyset():
+    feat_db = GeoNamesFeatures()
+    session = feat_db.session
+    query = session.query(feat_db.features)
+    expected = [r.geoname_id for r in query.order_by(feat_db.features.geoname_id)]
+    rows = iter_keyset(query, feat_db.features.geoname_id, batch_size=2)
+    assert [r.geoname_id for r in rows] == expected
+    session.close()
+
+
+@pytest.mark.parametrize("st_name", ["ellen", "burg", "washington", "pacific"])
+def test_search_json_fts(st_name):
+    feat_db = GeoNamesFeatures()
+    expected = feat_db.search_json(st_name)
+    feat_db.index_names_fts()
+    assert feat_db.has_fts
+    try:
+        assert feat_db.search_json(st_name) == expected
+    finally:
+        feat_db.index_names_fts(create=False)
+    assert not feat_db.has_fts
+
+
+@pytest.mark.parametrize("how", ["prefix", "suffix", "substring"])
+def test_search_partial(how):
+    feat_db = GeoNamesFeatures()
+    expected = feat_db.search_partial("ensbur", how=how)
+    feat_db.index_names_fts()
+    try:
+        assert feat_db.search_partial("ensbur", how=how) == expected
+    finally:
+        feat_db.index_names_fts(create=False)
+    ids = {r["geonameId"] for r in expected}
+    assert (5793639 in ids) == (how == "substring")
+
+
 def test_index_names():
     feat_db = GeoNamesFeatures()
     feat_db.index_names(False, True)
@@ -79,6 +164,18 @@ def test_index_names():
     feat_db.index_names(False, False)
 
 
+def test_index_names_keeps_fts():
+    feat_db = GeoNamesFeatures()
+    feat_db.index_names_fts()
+    try:
+        feat_db.drop_indexes()
+        assert feat_db.has_fts
+        feat_db.create_indexes()
+        assert feat_db.has_fts
+    finally:
+        feat_db.index_names_fts(create=False)
+
+
 def test_to_csv(tmp_path):
     feat_db = GeoNamesFeatures()
     fp = tmp_path / "temp.csv"
@@ -109,6 +206,44 @@ def test_from_csv(feat_db_class, fn):
     session.close()
 
 
+@pytest.mark.parametrize("processes", [1, 2])
+def test_from_csv_chunked(processes):
+    feat_db = GeoNamesFeatures()
+    feat_db.keys = None
+    feat_db.delim = "|"
+    feat_db.csv_kwargs = {"dialect": "excel"}
+    feat_db.chunk_size = 2
+    feat_db.commit_size = 4
+    session = feat_db.session
+    expected_features = set(session.query(feat_db.features.geoname_id))
+    expected_names = set(session.query(feat_db.names.st_name))
+    feat_db.from_csv(os.path.join(TEST_DIR, "db_geonames.csv"), processes=processes)
+    assert set(session.query(feat_db.features.geoname_id)) == expected_features
+    assert set(session.query(feat_db.names.st_name)) == expected_names
+    session.close()
+
+
+def test_from_csv_file(tmp_path):
+    # Engine profiles are only applied to databases stored in files
+    bind = Session.kw["bind"]
+    init_db(str(tmp_path / "geonames.sqlite"))
+    engine = Session.kw["bind"]
+    try:
+        feat_db = GeoNamesFeatures()
+        feat_db.keys = None
+        feat_db.delim = "|"
+        feat_db.csv_kwargs = {"dialect": "excel"}
+        feat_db.from_csv(os.path.join(TEST_DIR, "db_geonames.csv"))
+        session = feat_db.session
+        assert session.query(feat_db.features).filter_by(geoname_id=5793639).first()
+        journal_mode = session.execute(text("PRAGMA journal_mode")).scalar()
+        assert journal_mode == "delete"
+        session.close()
+    finally:
+        engine.dispose()
+        Session.configure(bind=bind)
+
+
 def test_from_included_gazetteer(mocker):
     def open_file(inst, fp, *args, **kwargs):
         with open(fp, "r"):
@@ -0,0 +1,65 @@
+"""Tests queries against the ocean tiles in the geohelper database"""
+
+import pytest
+from shapely import Point, box
+
+from nmnh_ms_tools.databases.geohelper import OceanQuery
+
+
+@pytest.fixture
+def ocean():
+    OceanQuery.gdf = None
+    yield OceanQuery()
+    OceanQuery.gdf = None
+
+
+def test_query(ocean):
+    tiles = ocean.query(Point(-160, 15))
+    assert len(tiles) == 1
+    assert tiles.intersects(Point(-160, 15)).all()
+
+
+def test_query_matches_scan(ocean):
+    geom = box(-100, 20, -60, 70)
+    gdf = ocean.query()
+    expected = gdf[gdf.intersects(geom)]
+    assert ocean.query(geom).index.tolist() == expected.index.tolist()
+
+
+def test_query_returns_copy(ocean):
+    ocean.query()["ocean"] = "Fake"
+    assert not (ocean.gdf["ocean"] == "Fake").any()
+
+
+def test_query_many(ocean):
+    geoms = [Point(-160, 15), box(-100, 20, -60, 70), Point(-160, 15)]
+    tiles = ocean.query_many(geoms)
+    for i, geom in enumerate(geoms):
+        expected = ocean.query(geom).index.tolist()
+        assert tiles[tiles["query"] == i].index.tolist() == expected
+
+
+def test_query_many_empty(ocean):
+    assert ocean.query_many([]).empty
+
+
+def test_cache(ocean, tmp_path):
+    path = tmp_path / "ocean.pickle"
+    ocean.cache_path = path
+    gdf = ocean.query()
+    assert path.exists()
+    OceanQuery.gdf = None
+    cached = OceanQuery(cache_path=path).query()
+    # Some tiles are invalid, so compare them exactly instead of topologically
+    assert cached.geom_equals_exact(gdf, 0).all()
+
+
+def test_cache_unreadable(ocean, tmp_path):
+    path = tmp_path / "ocean.pickle"
+    path.write_bytes(b"not a pickle")
+    ocean.cache_path = path
+    gdf = ocean.query()
+    assert not gdf.empty
+    # The unreadable file is replaced
+    OceanQuery.gdf = None
+    assert OceanQuery(cache_path=path).query().geom_equals_exact(gdf, 0).all()
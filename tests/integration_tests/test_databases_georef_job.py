@@ -0,0 +1,82 @@
+"""Tests the georeferencing job database"""
+
+import pytest
+
+from nmnh_ms_tools.databases.georef_job import CheckpointStore
+
+
+def test_checkpoint_store():
+    store = CheckpointStore(max_pending=3)
+    for i in range(10):
+        result = "success" if i % 2 else "failed"
+        store[f"test_key_{i}"] = {"location_id": f"test_{i}", "result": result}
+    # Results are readable before and after they are written
+    assert store.pending
+    assert store["test_key_9"]["location_id"] == "test_9"
+    store.flush()
+    assert not store.pending
+    assert store["test_key_9"]["location_id"] == "test_9"
+    assert "test_key_10" not in store
+    with pytest.raises(KeyError):
+        store["test_key_10"]
+
+
+def test_checkpoint_store_delete():
+    store = CheckpointStore()
+    store["test_key_delete"] = {"location_id": "test_delete", "result": "success"}
+    count = len(store)
+    del store["test_key_delete"]
+    assert "test_key_delete" not in store
+    assert len(store) == count - 1
+    store["test_key_delete"] = {"location_id": "test_delete", "result": "success"}
+    store.flush()
+    del store["test_key_delete"]
+    assert "test_key_delete" not in store
+    assert len(store) == count - 1
+    with pytest.raises(KeyError):
+        del store["test_key_delete"]
+
+
+def test_checkpoint_store_len():
+    store = CheckpointStore()
+    count = len(store)
+    store["test_key_len"] = {"location_id": "test_len", "result": "success"}
+    store["test_key_len"] = {"location_id": "test_len", "result": "failed"}
+    # The count is kept without writing pending results
+    assert len(store) == count + 1
+    assert store.pending
+    store.flush()
+    assert len(store) == count + 1
+    # Stored keys are not counted again once written
+    store["test_key_len"] = {"location_id": "test_len", "result": "success"}
+    store.flush()
+    assert len(store) == count + 1
+
+
+def test_checkpoint_store_resume():
+    store = CheckpointStore()
+    store["test_key_resume"] = {"location_id": "test_resume", "result": "success"}
+    store.close()
+    assert CheckpointStore()["test_key_resume"]["result"] == "success"
+
+
+def test_checkpoint_store_status():
+    store = CheckpointStore()
+    store["test_key_status"] = {"location_id": "test_status", "result": "failed"}
+    assert store.status("test_key_status") == "failed"
+    assert store.status(location_id="test_status") == "failed"
+    assert store.status("test_key_missing") is None
+    # Later results replace earlier ones
+    store["test_key_status"] = {"location_id": "test_status", "result": "success"}
+    assert store.status(location_id="test_status") == "success"
+
+
+def test_checkpoint_store_compact():
+    store = CheckpointStore()
+    store["test_key_compact"] = {"location_id": "test_compact", "result": "failed"}
+    assert store.counts().get("failed", 0) >= 1
+    count = len(store)
+    store.compact(drop_failed=True)
+    assert "failed" not in store.counts()
+    assert "test_key_compact" not in store
+    assert len(store) < count
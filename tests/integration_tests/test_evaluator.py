@@ -1,5 +1,6 @@
 """Tests evaluator"""
 
+import itertools
 from random import randint
 
 import pytest
@@ -50,6 +51,31 @@ def evaluator():
     return MatchEvaluator(ref_site, None, [ref_site])
 
 
+@pytest.fixture
+def combinable():
+    sites = []
+    coords = {
+        "alpha": [(47.0, -120.5), (10.0, 10.0), (47.1, -120.4), (-30.0, 150.0)],
+        "beta": [(46.9, -120.6), (11.0, 11.0), (1.0, 1.0)],
+        "gamma": [(47.0, -120.5), (47.2, -120.3), (-29.0, 151.0)],
+    }
+    for name, lat_lons in coords.items():
+        for lat, lng in lat_lons:
+            site = Site(
+                {
+                    "location_id": f"{lat},{lng}",
+                    "latitude": lat,
+                    "longitude": lng,
+                    "crs": 4326,
+                    "radius_km": 1,
+                }
+            )
+            site.field = "locality"
+            site.filter["name"] = name
+            sites.append(site)
+    return sites
+
+
 @pytest.fixture
 def site():
     site = Site()
@@ -194,3 +220,49 @@ def test_encompass_name_with_max_dist_km(evaluator, helpers):
     lng, lat = result.centroid.coords[0]
     assert lat == pytest.approx(21.31, rel=1e-2)
     assert lng == pytest.approx(-157.86, rel=1e-2)
+
+
+def test_find_combinations(evaluator, combinable):
+    groups = list(evaluator.group_by_name(combinable).values())
+    expected = []
+    for combo in itertools.product(*groups):
+        loc_ids = [s.location_id for s in combo]
+        if len(loc_ids) == len(set(loc_ids)) and loc_ids not in expected:
+            expected.append(loc_ids)
+    result = evaluator.find_combinations(combinable)
+    assert [[s.location_id for s in c] for c in result] == expected
+
+
+def test_find_combinations_with_max_dist_km(evaluator, combinable):
+    result = evaluator.find_combinations(combinable, max_dist_km=100)
+    assert result
+    for combo in result:
+        assert evaluator.encompass_sites(list(combo)).radius_km <= 100
+
+
+def test_find_combinations_budget(evaluator, combinable):
+    evaluator.max_combinations = 3
+    with pytest.raises(ValueError, match="Too many candidates to encompass"):
+        evaluator.find_combinations(combinable)
+
+
+def test_most_specific_combination(evaluator, combinable):
+    expected = []
+    for combo in evaluator.find_combinations(combinable):
+        expected.append((evaluator.encompass_sites(list(combo)).radius_km, combo))
+    expected.sort(key=lambda c: c[0])
+    geom, selected = evaluator.most_specific_combination(combinable)
+    assert geom.radius_km == expected[0][0]
+    assert selected == expected[0][1]
+
+
+def test_most_specific_combination_budget(evaluator, combinable):
+    evaluator.max_combinations = 0
+    with pytest.raises(ValueError, match="Too many candidates to encompass"):
+        evaluator.most_specific_combination(combinable)
+
+
+def test_most_specific_combination_one_name(evaluator, combinable):
+    group = list(evaluator.group_by_name(combinable).values())[0]
+    with pytest.raises(ValueError, match="at least two names"):
+        evaluator.most_specific_combination(group)
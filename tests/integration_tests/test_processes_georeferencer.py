@@ -5,6 +5,7 @@ import os
 import pytest
 
 from nmnh_ms_tools.config import TEST_DIR
+from nmnh_ms_tools.databases.georef_job import Checkpoints
 from nmnh_ms_tools.records import Site
 from nmnh_ms_tools.tools.georeferencer import Georeferencer
 from nmnh_ms_tools.tools.georeferencer.pipes import (
@@ -54,6 +55,63 @@ def test_from_file_with_tests(mocker):
     geo.georeference()
 
 
+def test_from_file_parallel(mocker):
+    mocker.patch("nmnh_ms_tools.tools.georeferencer.Georeferencer.configure_log")
+    fp = os.path.join(TEST_DIR, "test_georeferencer.csv")
+    results = []
+    for processes in (1, 2):
+        geo = Georeferencer(fp, pipes=[MatchGeoNames()], limit=4)
+        # Clear results from earlier runs so every record is georeferenced
+        geo.evaluated.session.query(Checkpoints).delete()
+        geo.evaluated.session.commit()
+        geo.id_key = r"\btest(_[a-z]+)+\b"
+        geo.processes = processes
+        geo.chunk_size = 1
+        geo.georeference()
+        assert not geo._cached
+        results.append([(r["location_id"], r["result"]) for r in geo])
+    assert results[0] == results[1]
+
+
+def test_from_file_streamed(mocker, tmp_path):
+    mocker.patch("nmnh_ms_tools.tools.georeferencer.Georeferencer.configure_log")
+    fp = os.path.join(TEST_DIR, "test_georeferencer.csv")
+    results = []
+    summaries = []
+    for stream_size in (0, 1):
+        geo = Georeferencer(fp, pipes=[MatchGeoNames()], limit=4)
+        # Clear results from earlier runs so every record is georeferenced
+        geo.evaluated.session.query(Checkpoints).delete()
+        geo.evaluated.session.commit()
+        geo.id_key = r"\btest(_[a-z]+)+\b"
+        geo.stream_size = stream_size
+        geo.results_path = str(tmp_path / "results.jsonl")
+        geo.georeference()
+        assert not geo._cached
+        if stream_size:
+            assert not geo.results
+        results.append([(r["location_id"], r["result"]) for r in geo])
+        summary = geo.summarize("20250101T000000_test_4")
+        summaries.append({k: v for k, v in summary.items() if not k.endswith("_s")})
+    assert results[0] == results[1]
+    assert summaries[0] == summaries[1]
+
+
+def test_progress(mocker):
+    mocker.patch("nmnh_ms_tools.tools.georeferencer.Georeferencer.configure_log")
+    fp = os.path.join(TEST_DIR, "test_georeferencer.csv")
+    geo = Georeferencer(fp, pipes=[MatchGeoNames()], limit=4)
+    geo.id_key = r"\btest(_[a-z]+)+\b"
+    geo.total = 100
+    geo.georeference()
+    progress = geo.progress()
+    assert progress["processed"] == sum(progress["status"].values())
+    assert progress["succeeded"] == progress["status"].get("success", 0)
+    assert progress["success_ratio"] == progress["succeeded"] / progress["processed"]
+    assert progress["rate"] > 0
+    assert progress["eta"] >= 0
+
+
 def test_simple_locality(geo):
     result = geo.georeference_one(test_data["test_simple_locality"])
     assert result["dist_km"] <= result["radius_km"]
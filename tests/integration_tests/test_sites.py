@@ -1,7 +1,11 @@
 """Tests implementation of GeoMetry in Site"""
 
+import json
+
 import pytest
 
+from nmnh_ms_tools.databases.admin_polygons import AdminIndex
+from nmnh_ms_tools.databases.cache import CacheDict
 from nmnh_ms_tools.records import Site
 
 
@@ -23,6 +27,14 @@ def site():
     )
 
 
+@pytest.fixture
+def admin_index(monkeypatch):
+    index = AdminIndex()
+    monkeypatch.setattr(Site, "admin_index", index)
+    monkeypatch.setattr(Site, "admin_cache", CacheDict())
+    return index
+
+
 def test_name(site):
     assert site.name == "Ellensburg"
 
@@ -63,6 +75,40 @@ def test_map_admin(site):
     assert site.county == ["Kittitas County"]
 
 
+def test_map_admin_from_index(site, admin_index):
+    expected = site.map_admin()
+    assert (
+        json.dumps(["North America", "United States", ["Washington"], ["Kittitas Co"]])
+        in admin_index
+    )
+
+    # Clear the in-memory cache so that the result is read from the index
+    Site.admin_cache.recent.clear()
+    other = site.copy()
+    gdf = other.map_admin()
+    assert gdf.crs == expected.crs
+    assert list(gdf["field"]) == list(expected["field"])
+    assert list(gdf["area"]) == list(expected["area"])
+    assert gdf.geom_equals_exact(expected, tolerance=1e-6).all()
+    assert other.admin_code_2 == ["037"]
+    assert other.interpreted.keys() == site.interpreted.keys()
+
+
+def test_admin_index_query(site, admin_index):
+    site.map_admin()
+    rows = admin_index.query(46.99, -120.55)
+    assert [r.field for r in rows] == [
+        "continent",
+        "country",
+        "state_province",
+        "county",
+    ]
+    assert [r.name for r in admin_index.query(46.99, -120.55, "county")] == [
+        "Kittitas County"
+    ]
+    assert not admin_index.query(46.99, 120.55, "county")
+
+
 def test_map_continent(site):
     site.map_admin()
     assert site.continent_code == "NA"
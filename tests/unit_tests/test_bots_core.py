@@ -0,0 +1,148 @@
+"""Tests concurrent, rate-limited requests using a local stand-in server"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from nmnh_ms_tools.bots import Bot
+from nmnh_ms_tools.bots.core import TokenBucket
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Responds after an optional delay, failing with 429 if requested"""
+
+    def do_GET(self):
+        server = self.server
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        with server.lock:
+            server.requests.append(time.monotonic())
+            key = params.get("key")
+            server.hits[key] = server.hits.get(key, 0) + 1
+            hits = server.hits[key]
+        time.sleep(float(params.get("delay", 0)))
+        if hits <= int(params.get("fail", 0)):
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        body = json.dumps({"key": key, "hits": hits}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        with self.server.lock:
+            self.server.requests.append(time.monotonic())
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.hits = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def bot():
+    bot = Bot(wait=0.05, max_workers=10)
+    bot.local_hosts = ()
+    bot.buckets = {}
+    return bot
+
+
+def url(server, **params):
+    query = "&".join(f"{k}={v}" for k, v in params.items())
+    return f"http://127.0.0.1:{server.server_address[1]}/?{query}"
+
+
+def test_token_bucket():
+    bucket = TokenBucket(0.05)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.19
+
+
+def test_token_bucket_burst():
+    bucket = TokenBucket(0.05, capacity=3)
+    time.sleep(0.15)
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.05
+
+
+def test_token_bucket_interval():
+    bucket = TokenBucket(0.05)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire(0.01)
+    assert time.monotonic() - start < 0.05
+    # Intervals passed to acquire apply only to that request
+    assert bucket.interval == 0.05
+
+
+def test_token_bucket_pause():
+    bucket = TokenBucket(0.01)
+    bucket.pause(0.1)
+    assert bucket.acquire() >= 0.09
+
+
+def test_map_concurrent(server, bot):
+    urls = [url(server, key=i, delay=0.3) for i in range(10)]
+    start = time.monotonic()
+    responses = bot.map(bot.get, urls)
+    elapsed = time.monotonic() - start
+    assert [r.json()["key"] for r in responses] == [str(i) for i in range(10)]
+    # Ten requests taking 0.3 s each would take at least 3 s sequentially
+    assert elapsed < 1.5
+
+
+def test_map_honors_rate_limit(server, bot):
+    bot.map("get", [url(server, key=i) for i in range(10)])
+    requests = sorted(server.requests)
+    assert requests[-1] - requests[0] >= 0.9 * 0.05 * 9
+
+
+def test_map_head(server, bot):
+    bot.wait = 1
+    bot.map(bot.head, [url(server, key=i) for i in range(5)])
+    requests = sorted(server.requests)
+    # HEAD requests use a shorter wait without changing the wait for the bot
+    assert 0.9 * 0.1 * 4 <= requests[-1] - requests[0] < 1
+    assert bot.wait == 1
+
+
+def test_map_retries_429(server, bot):
+    urls = [url(server, key=i, fail=2) for i in range(5)]
+    responses = bot.map(bot.get, urls)
+    assert all(r.status_code == 200 for r in responses)
+    assert [r.json()["hits"] for r in responses] == [3] * 5
+
+
+def test_map_cached(server, bot):
+    bot.install_cache(":memory:")
+    bot.get(url(server, key="cached"))
+    start = time.monotonic()
+    responses = bot.map(bot.get, [url(server, key="cached")] * 10)
+    assert all(r.from_cache for r in responses)
+    assert server.hits == {"cached": 1}
+    # Cached responses do not use tokens from the bucket
+    assert time.monotonic() - start < 0.05 * 9
@@ -33,3 +33,36 @@ def test_find(test_input, expected, gvp):
 )
 def test_find_volcano(test_input, expected, gvp):
     assert gvp.find_volcano(test_input)["site_num"] == expected
+
+
+def test_find_synonym(gvp):
+    assert gvp.find("Tacoman").iloc[0]["site_num"] == "321030"
+
+
+def test_find_does_not_modify_df(gvp):
+    gvp.find(kind="province")
+    assert "index" in gvp.df
+
+
+@pytest.mark.parametrize(
+    "test_input, expected",
+    [
+        (("Rainier",), "321030"),
+        (("Mount Rainier",), "321030"),
+        (("St. Helens", "volcano"), "321050"),
+        (("Helens",), "321050"),
+    ],
+)
+def test_search(test_input, expected, gvp):
+    assert expected in set(gvp.search(*test_input)["site_num"])
+
+
+def test_search_no_match(gvp):
+    assert gvp.search("Rainier Sakurajima").empty
+
+
+def test_nearest(gvp):
+    matches = gvp.nearest(46.85, -121.76, 3)
+    assert matches.iloc[0]["site_num"] == "321030"
+    assert list(matches["dist_km"]) == sorted(matches["dist_km"])
+    assert matches.iloc[0]["dist_km"] < 1
@@ -0,0 +1,50 @@
+"""Tests helper functions for SQLite databases"""
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from nmnh_ms_tools.databases.helpers import (
+    engine_profile,
+    get_engine_profile,
+    set_engine_profile,
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.sqlite'}")
+    yield engine
+    engine.dispose()
+
+
+def pragma(engine, key):
+    with engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {key}")).scalar()
+
+
+def test_get_engine_profile():
+    assert get_engine_profile("read")["journal_mode"] == "wal"
+    assert get_engine_profile("default") == {}
+    assert get_engine_profile({"cache_size": -1024}) == {"cache_size": -1024}
+
+
+def test_get_engine_profile_default():
+    assert get_engine_profile() == {}
+
+
+def test_get_engine_profile_invalid():
+    with pytest.raises(ValueError, match="Unknown database profile"):
+        get_engine_profile("invalid")
+
+
+def test_set_engine_profile(engine):
+    set_engine_profile(engine, "read")
+    assert pragma(engine, "journal_mode") == "wal"
+    assert pragma(engine, "temp_store") == 2
+
+
+def test_engine_profile(engine):
+    set_engine_profile(engine, {"cache_size": -1024})
+    with engine_profile(engine, {"cache_size": -4096}):
+        assert pragma(engine, "cache_size") == -4096
+    assert pragma(engine, "cache_size") == -1024
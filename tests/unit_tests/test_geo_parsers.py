@@ -1,7 +1,11 @@
 """Tests geographic name parsers"""
 
+import json
+from collections import namedtuple
+
 import pytest
 
+from nmnh_ms_tools.tools.geographic_names.caches import LocalityCache
 from nmnh_ms_tools.tools.geographic_names.parsers import (
     BetweenParser,
     BorderParser,
@@ -322,3 +326,31 @@ def test_parse_localities(test_input, expected):
                 feature = [feature]
             features.extend([str(f).lower().strip() for f in feature])
     assert set(features) == set([f.lower() for f in expected])
+
+
+@pytest.mark.parametrize(
+    "test_input",
+    [
+        "20 km south of Iceland; Atlantic Ocean, North",
+        "Aranjuez surroundings. Circa 7 km NW, S of jct. E-5 and M-40",
+        "BR 156, road between Calçoene and Oiapoque, 60 Km SSE of Oiapoque",
+        "Bouanane, 30 Km NE",
+        "Carteret Co, S Part Of Cedar Island, At U.S. Condor Installation",
+        "Castle Hayne, 4.5mi NE of; end of NC Route 2023",
+        "West Coast Of Florida",
+        "Western Cape; Central Vishayas",
+        "Wyville--Thomson Ridge; between the Faroe Islands and Scotland",
+    ],
+)
+def test_locality_cache_round_trip(test_input):
+    features = parse_localities(test_input)
+    row = namedtuple("Row", ["key", "val"])(
+        test_input, LocalityCache.writer((features, "leftover"))
+    )
+    # Features should be restored without being parsed again
+    assert all(isinstance(f, dict) for f in json.loads(row.val)[0])
+    restored, leftover = LocalityCache.reader(row)
+    assert leftover == "leftover"
+    assert restored == features
+    assert [str(f) for f in restored] == [str(f) for f in features]
+    assert [vars(f) for f in restored] == [vars(f) for f in features]
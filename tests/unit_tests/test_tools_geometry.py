@@ -0,0 +1,112 @@
+"""Tests GeoMetry operations"""
+
+import pytest
+import shapely
+from shapely import Point, box
+
+from nmnh_ms_tools.tools.geographic_operations.geometry import GeoMetry, query_pairs
+from nmnh_ms_tools.utils import get_dist_km, mutable
+
+
+@pytest.fixture
+def geoms():
+    return [
+        GeoMetry(box(-120.6, 46.9, -120.4, 47.1), crs=4326),
+        GeoMetry(box(-120.5, 47.0, -120.3, 47.2), crs=4326),
+        GeoMetry(box(-110.0, 40.0, -109.9, 40.1), crs=4326),
+        GeoMetry(Point(-120.55, 46.95), crs=4326, radius_km=1),
+    ]
+
+
+@pytest.mark.parametrize("predicate", ["intersects", "contains", "within"])
+def test_query_pairs(geoms, predicate):
+    expected = []
+    for i, geom in enumerate(geoms):
+        for j, other in enumerate(geoms):
+            if i != j and getattr(geom, predicate)(other):
+                expected.append([i, j])
+    assert query_pairs(geoms, predicate=predicate).tolist() == expected
+
+
+def test_query_pairs_others(geoms):
+    others = [GeoMetry(box(-121, 46, -120, 48), crs=4326)]
+    assert query_pairs(geoms, others, predicate="within").tolist() == [
+        [0, 0],
+        [1, 0],
+        [3, 0],
+    ]
+
+
+def test_query_pairs_empty(geoms):
+    assert query_pairs(geoms, []).shape == (0, 2)
+
+
+def test_intersects_all(geoms):
+    assert geoms[0].intersects_all(geoms[1])
+    assert not geoms[0].intersects_all(geoms[1:3])
+
+
+def test_intersects_all_transitive(geoms):
+    chain = [geoms[1], GeoMetry(box(-120.35, 47.15, -120.2, 47.3), crs=4326)]
+    assert geoms[0].intersects_all(chain)
+    assert not geoms[0].intersects_all(chain, transitive=False)
+
+
+def test_max_dist_km(geoms):
+    geom = geoms[0].as_wgs84.convex_hull
+    other = geoms[2].as_wgs84.convex_hull
+    expected = max(
+        get_dist_km(lat, lon, olat, olon)
+        for lon, lat in geom.coords
+        for olon, olat in other.coords
+    )
+    assert geoms[0].max_dist_km(geoms[2]) == pytest.approx(expected)
+
+
+def test_min_dists_km(geoms):
+    dists_km = geoms[0].min_dists_km(geoms[1:])
+    assert dists_km[0] == 0
+    assert dists_km[2] == 0
+    pts = [p.centroid.shape for p in geoms[0].nearest_points(geoms[2])]
+    expected = get_dist_km(pts[0].y, pts[0].x, pts[1].y, pts[1].x)
+    assert dists_km[1] == pytest.approx(expected, rel=1e-3)
+    assert geoms[0].min_dist_km(geoms[2]) == pytest.approx(dists_km[1])
+
+
+def test_prepared(geoms):
+    geom = geoms[0]
+    assert shapely.is_prepared(geom.prepared)
+    assert geom.prepared is geom.prepared
+    assert geom.contains(geoms[3])
+    assert geoms[3].intersects(geom)
+    # Prepared shapes are discarded when the geometry changes
+    with mutable(geom):
+        geom.geom = box(-110.0, 40.0, -109.9, 40.1)
+    assert "prepared" not in geom.__dict__
+    assert geom.prepared.equals(box(-110.0, 40.0, -109.9, 40.1))
+    assert shapely.is_prepared(geom.prepared)
+
+
+def test_to_crs_returns_copy(geoms):
+    geom = geoms[0].to_crs(3857)
+    assert geom is not geoms[0].to_crs(3857)
+    with mutable(geom):
+        geom.name = "Changed"
+        geom.parents.append("Parent")
+    cached = geoms[0].to_crs(3857)
+    assert cached.name is None
+    assert not cached.parents
+
+
+def test_to_crs_cache_size(geoms):
+    geom = geoms[0]
+    copies = [geom._to_crs(f"+proj=eck4 +lon_0={lon}") for lon in range(-50, 50, 10)]
+    assert len(geom._reprojected) == geom.max_reprojected
+    # Reprojected copies share the cache of the original geometry
+    assert all(c._reprojected is geom._reprojected for c in copies)
+    assert geom._to_crs(4326)._to_crs(3857) is geom._to_crs(3857)
+
+
+def test_to_crs_dict(geoms):
+    crs = {"proj": "longlat", "datum": "WGS84", "no_defs": True}
+    assert geoms[0].to_crs(crs).shape.equals_exact(geoms[0].shape, 1e-6)
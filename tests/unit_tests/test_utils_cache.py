@@ -0,0 +1,64 @@
+"""Tests the PersistentLookup class"""
+
+import pandas as pd
+import pytest
+
+from nmnh_ms_tools.utils import PersistentLookup
+
+
+@pytest.fixture
+def lookup(tmp_path):
+    PersistentLookup.lookups.clear()
+    PersistentLookup.rows.clear()
+    yield PersistentLookup(tmp_path / "lookup.csv")
+    PersistentLookup.lookups.clear()
+    PersistentLookup.rows.clear()
+
+
+def read_csv(lookup):
+    with open(lookup.path, encoding="utf-8-sig") as f:
+        return f.read().splitlines()
+
+
+def test_persistent_lookup(lookup):
+    lookup["a"] = "1"
+    lookup.update({"b": "2", "c": '{"x": [1, 2]}'})
+    assert lookup["a"] == "1"
+    assert lookup["c"] == '{"x": [1, 2]}'
+    assert "b" in lookup
+    assert len(lookup) == 3
+    with pytest.raises(KeyError):
+        lookup["d"]
+
+
+def test_persistent_lookup_append(lookup):
+    lookup["a"] = "1"
+    lookup["b"] = "2"
+    lookup["a"] = "3"
+    assert read_csv(lookup) == ["key,value", "a,1", "b,2", "a,3"]
+    # Reload from file
+    PersistentLookup.lookups.clear()
+    assert PersistentLookup(lookup.cache_name)["a"] == "3"
+
+
+def test_persistent_lookup_delete(lookup):
+    lookup.update({"a": "1", "b": "2"})
+    del lookup["a"]
+    assert read_csv(lookup) == ["key,value", "b,2"]
+    with pytest.raises(KeyError):
+        del lookup["a"]
+
+
+def test_persistent_lookup_compact(lookup):
+    lookup.min_compact = 2
+    for i in range(4):
+        lookup["a"] = str(i)
+    assert read_csv(lookup) == ["key,value", "a,3"]
+
+
+def test_persistent_lookup_legacy_csv(lookup):
+    df = pd.DataFrame([{"key": "a", "value": "1"}, {"key": "b", "value": "x,y"}])
+    df.set_index("key").to_csv(lookup.path, encoding="utf-8-sig")
+    assert lookup["a"] == "1"
+    assert lookup["b"] == "x,y"
+    assert list(lookup.df["value"]) == ["1", "x,y"]
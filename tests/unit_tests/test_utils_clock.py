@@ -1,15 +1,20 @@
 """Tests clock functions"""
 
 import re
+import threading
 
 import pytest
 
 
 from nmnh_ms_tools.utils import (
+    StageClock,
     clock,
     clock_snippet,
+    clock_stage,
+    count_stage,
     report,
     clock_all_methods,
+    set_stage_clock,
 )
 
 
@@ -91,3 +96,60 @@ def test_report(fakeclass, tmp_path):
     # Clocked methods sometimes take slightly longer that 0.0 seconds
     result = re.sub(r"\b0\.0\d+", "0.0", f.read_text(encoding="utf-8-sig"))
     assert result == expected
+
+
+@clock_stage("fake_stage")
+def fake_recursive_stage(num):
+    return fake_recursive_stage(num - 1) if num else 0
+
+
+def test_clock_stage():
+    stages = StageClock()
+    previous = set_stage_clock(stages)
+    try:
+        for i in range(5):
+            fake_recursive_stage(3)
+            count_stage("fake_count")
+        with clock_stage("fake_snippet"):
+            pass
+    finally:
+        set_stage_clock(previous)
+    # Recursive calls are only timed once
+    assert stages.calls == {"fake_stage": 5, "fake_snippet": 1}
+    assert stages.counts == {"fake_count": 5}
+    assert set(stages.times) == {"fake_stage", "fake_snippet"}
+
+
+def test_clock_stage_inactive():
+    previous = set_stage_clock(None)
+    try:
+        fake_recursive_stage(3)
+        count_stage("fake_count")
+    finally:
+        set_stage_clock(previous)
+    assert previous is None
+
+
+def test_clock_stage_thread():
+    stages = StageClock()
+    previous = set_stage_clock(stages)
+    try:
+        # Other threads do not share the active stage clock
+        thread = threading.Thread(target=count_stage, args=("fake_count",))
+        thread.start()
+        thread.join()
+        count_stage("fake_count")
+    finally:
+        set_stage_clock(previous)
+    assert stages.counts == {"fake_count": 1}
+
+
+def test_stage_clock_add():
+    stages = StageClock()
+    stages.counts["fake_count"] = 2
+    other = StageClock()
+    other.counts["fake_count"] = 3
+    other.times["fake_stage"] = 1.5
+    stages.add(other)
+    assert stages.counts == {"fake_count": 5}
+    assert stages.times == {"fake_stage": 1.5}
@@ -8,6 +8,7 @@ from nmnh_ms_tools.utils import (
     get_dist_km_geolib,
     get_dist_km_haversine,
     get_dist_km_pyproj,
+    get_dists_km,
     translate,
     translate_geolib,
     translate_pyproj,
@@ -72,6 +73,23 @@ def test_get_dist_km_pyproj(lat1, lon1, lat2, lon2, expected):
     )
 
 
+def test_get_dists_km():
+    lats1, lons1 = [46.999, 47], [-120.577, -121]
+    lats2, lons2 = [47.068, 47], [-120.671, -121]
+    expected = [get_dist_km(*args) for args in zip(lats1, lons1, lats2, lons2)]
+    assert get_dists_km(lats1, lons1, lats2, lons2).tolist() == pytest.approx(expected)
+
+
+def test_get_dists_km_broadcast():
+    lats1, lons1 = [46.999, 47], [-120.577, -121]
+    dists_km = get_dists_km(
+        [[lat] for lat in lats1], [[lon] for lon in lons1], lats1, lons1
+    )
+    assert dists_km.shape == (2, 2)
+    assert dists_km[0, 1] == pytest.approx(dists_km[1, 0])
+    assert dists_km.diagonal().tolist() == [0, 0]
+
+
 @pytest.mark.parametrize(
     "lats,lons,bearing,dist_km,expected",
     [